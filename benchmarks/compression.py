@@ -0,0 +1,89 @@
+"""
+Shows the bandwidth/latency tradeoff of gzip compression (`Connection(compression=True)`) on a batch
+commit request body (10k rows) and a scanner response body (10k rows): payload sizes, compression and
+decompression times and the estimated total time of sending the payload over links of various bandwidths.
+"""
+import base64
+import json
+import os
+import sys
+import timeit
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from starbase import Connection
+from starbase.client.table.batch import Batch
+from starbase.client.transport import gzip_compress
+
+NUMBER_OF_ROWS = 10000
+REPEAT = 5
+LEVELS = (1, 6, 9)
+# Link bandwidths, in Mbit/s
+BANDWIDTHS = (10, 100, 1000)
+
+def encode(value):
+    return base64.b64encode(value.encode('utf8')).decode('utf8')
+
+table = Connection().table('table1')
+batch = Batch(table)
+for i in range(NUMBER_OF_ROWS):
+    batch._append('PUT', 'row-{0:06d}'.format(i), {
+        'column1': {'id': str(i), 'name': 'Name {0}'.format(i), 'email': 'user{0}@example.com'.format(i)},
+        'column2': {'age': str(i % 100), 'city': 'Amsterdam'},
+        })
+
+scanner_response = {
+    'Row': [
+        {
+            'key': encode('row-{0:06d}'.format(i)),
+            'Cell': [
+                {'column': encode('column1:id'), '$': encode(str(i)), 'timestamp': 1369030584274},
+                {'column': encode('column1:name'), '$': encode('Name {0}'.format(i)), 'timestamp': 1369030584274},
+                {'column': encode('column2:age'), '$': encode(str(i % 100)), 'timestamp': 1369030584274},
+            ]
+        }
+        for i in range(NUMBER_OF_ROWS)
+    ]
+}
+
+payloads = (
+    ('batch commit', json.dumps({"Row": batch._stack}).encode('utf8')),
+    ('scanner response', json.dumps(scanner_response).encode('utf8')),
+)
+
+def transfer_time(size, bandwidth):
+    return size * 8.0 / (bandwidth * 1000000)
+
+header = '{0:<18} {1:>10} {2:>7} {3:>10} {4:>10}'.format('', 'bytes', 'ratio', 'compress', 'decompress')
+header += ''.join(' {0:>10}'.format('{0} Mbit/s'.format(bandwidth)) for bandwidth in BANDWIDTHS)
+
+for name, payload in payloads:
+    print(name)
+    print(header)
+
+    line = '{0:<18} {1:>10} {2:>7.2f} {3:>10.4f} {4:>10.4f}'.format('uncompressed', len(payload), 1, 0, 0)
+    line += ''.join(' {0:>10.4f}'.format(transfer_time(len(payload), bandwidth)) for bandwidth in BANDWIDTHS)
+    print(line)
+
+    for level in LEVELS:
+        compressed = gzip_compress(payload, level)
+        assert zlib.decompress(compressed, 16 + zlib.MAX_WBITS) == payload
+
+        compress = min(timeit.repeat(lambda: gzip_compress(payload, level), number=1, repeat=REPEAT))
+        decompress = min(timeit.repeat(lambda: zlib.decompress(compressed, 16 + zlib.MAX_WBITS),
+                                       number=1, repeat=REPEAT))
+
+        line = '{0:<18} {1:>10} {2:>7.2f} {3:>10.4f} {4:>10.4f}'.format(
+            'gzip level {0}'.format(level), len(compressed), len(payload) / float(len(compressed)),
+            compress, decompress
+            )
+        line += ''.join(
+            ' {0:>10.4f}'.format(compress + transfer_time(len(compressed), bandwidth) + decompress)
+            for bandwidth in BANDWIDTHS
+            )
+        print(line)
+
+    print('')
+
+print('Times in seconds. Bandwidth columns: compression + transfer + decompression.')
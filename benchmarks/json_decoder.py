@@ -0,0 +1,42 @@
+"""
+Compares the generic `json_decode` with the specialised `decode_cell_set` on a 10k rows (30k cells)
+Stargate response.
+"""
+import base64
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from starbase.json_decoder import json_decode, decode_cell_set
+
+NUMBER_OF_ROWS = 10000
+REPEAT = 5
+
+def encode(value):
+    return base64.b64encode(value.encode('utf8')).decode('utf8')
+
+cell_set = {
+    'Row': [
+        {
+            'key': encode('row-{0:06d}'.format(i)),
+            'Cell': [
+                {'column': encode('column1:id'), '$': encode(str(i)), 'timestamp': 1369030584274},
+                {'column': encode('column1:name'), '$': encode('Name {0}'.format(i)), 'timestamp': 1369030584274},
+                {'column': encode('column2:age'), '$': encode(str(i % 100)), 'timestamp': 1369030584274},
+            ]
+        }
+        for i in range(NUMBER_OF_ROWS)
+    ]
+}
+
+assert json_decode(cell_set) == decode_cell_set(cell_set)
+
+results = []
+for func in (json_decode, decode_cell_set):
+    duration = min(timeit.repeat(lambda: func(cell_set), number=1, repeat=REPEAT))
+    results.append(duration)
+    print('{0:<16} {1:.4f} seconds'.format(func.__name__, duration))
+
+print('speedup          {0:.1f}x'.format(results[0] / results[1]))
@@ -0,0 +1,165 @@
+"""
+Micro-benchmarks of the CPU-bound client paths: `json_decode`, `build_json_data` (data structures #1
+and #2, with and without encoding), `Table._extract_usable_data` (perfect dict on and off) and
+`Table._build_url_parts` (list and dict column specs), across row counts, row widths and value sizes.
+
+Each case reports the operations (calls) per second and the rows per second, along with the
+allocations per row as traced by `tracemalloc`: peak bytes, and blocks and bytes still allocated once
+the call returned (the result included).
+
+.. code-block:: none
+
+    python benchmarks/micro.py
+    python benchmarks/micro.py --rows 100 10000 --widths 3 --value-sizes 10 --filter build_json_data
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from starbase import Connection, Table
+from starbase.client.helpers import build_json_data
+from starbase.json_decoder import json_decode
+
+from suite import make_columns, make_rows, serialize
+
+# Rows per call, row widths (cells per row) and value sizes (bytes) benchmarked.
+ROWS = (100, 1000)
+WIDTHS = (3, 30)
+VALUE_SIZES = (10, 1000)
+REPEAT = 5
+
+def cases(number_of_rows, width, value_size):
+    """
+    Cases of the shape given: ``(name, function)``. Each function handles ``number_of_rows`` rows.
+    """
+    encoded = json.loads(serialize(make_rows(number_of_rows, width, value_size), 'json').decode('utf8'))
+    decoded = json_decode(encoded)
+    keys = ['row-{0:08d}'.format(i) for i in range(number_of_rows)]
+
+    # Data structure #2 (``{family: {qualifier: value}}``) and #1 (``{'family:qualifier': value}``).
+    columns = make_columns(width, value_size)
+    flat_columns = dict(
+        ('{0}:{1}'.format(family, qualifier), value)
+        for family, data in columns.items()
+        for qualifier, value in data.items()
+    )
+    column_list = list(flat_columns.keys())
+    column_dict = dict((family, list(data.keys())) for family, data in columns.items())
+
+    table = Table(Connection(), 'benchmark')
+
+    def build(data, encode_content):
+        def func():
+            return [build_json_data(key, data, encode_content=encode_content, with_row_declaration=False)
+                    for key in keys]
+        return func
+
+    def extract(perfect_dict):
+        return lambda: Table._extract_usable_data(decoded, with_row_id=True, perfect_dict=perfect_dict)
+
+    def url_parts(spec):
+        return lambda: [table._build_url_parts(spec) for _key in keys]
+
+    return [
+        ('json_decode', lambda: json_decode(encoded)),
+        ('build_json_data[#1]', build(flat_columns, False)),
+        ('build_json_data[#1,encoded]', build(flat_columns, True)),
+        ('build_json_data[#2]', build(columns, False)),
+        ('build_json_data[#2,encoded]', build(columns, True)),
+        ('extract_usable_data[perfect_dict]', extract(True)),
+        ('extract_usable_data[flat]', extract(False)),
+        ('build_url_parts[list]', url_parts(column_list)),
+        ('build_url_parts[dict]', url_parts(column_dict)),
+    ]
+
+def measure_time(func, repeat):
+    """
+    :return float: Best seconds per call.
+    """
+    number = 1
+    # Calibrating, so that a measure takes at least 0.05 seconds.
+    while True:
+        duration = timeit.timeit(func, number=number)
+        if duration >= 0.05 or number >= 1000:
+            break
+        number *= 10
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+def measure_memory(func):
+    """
+    Traces the allocations of one call.
+
+    :return tuple: Peak bytes, and blocks and bytes still allocated after the call.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1] - start
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return peak, blocks, size
+
+def run(rows, widths, value_sizes, repeat, pattern=None):
+    print('{0:<66} {1:>12} {2:>12} {3:>11} {4:>11} {5:>11}'.format(
+        'benchmark', 'ops/s', 'rows/s', 'peak B/row', 'blocks/row', 'bytes/row'))
+
+    results = {}
+    for number_of_rows, width, value_size in itertools.product(rows, widths, value_sizes):
+        shape = 'rows={0},width={1},value={2}'.format(number_of_rows, width, value_size)
+        for name, func in cases(number_of_rows, width, value_size):
+            name = '{0} {1}'.format(name, shape)
+            if pattern and not re.search(pattern, name):
+                continue
+
+            seconds = measure_time(func, repeat)
+            peak, blocks, size = measure_memory(func)
+            results[name] = {
+                'ops': 1.0 / seconds if seconds else None,
+                'rows': number_of_rows / seconds if seconds else None,
+                'peak_bytes_per_row': float(peak) / number_of_rows,
+                'blocks_per_row': float(blocks) / number_of_rows,
+                'bytes_per_row': float(size) / number_of_rows,
+            }
+            result = results[name]
+            print('{0:<66} {1:>12.1f} {2:>12.0f} {3:>11.0f} {4:>11.1f} {5:>11.0f}'.format(
+                name, result['ops'] or 0, result['rows'] or 0, result['peak_bytes_per_row'],
+                result['blocks_per_row'], result['bytes_per_row']))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="starbase micro-benchmarks")
+    parser.add_argument('--filter', metavar='REGEX', help="Only run the benchmarks matching.")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--rows', type=int, nargs='+', default=ROWS)
+    parser.add_argument('--widths', type=int, nargs='+', default=WIDTHS)
+    parser.add_argument('--value-sizes', type=int, nargs='+', default=VALUE_SIZES)
+    parser.add_argument('--save', metavar='PATH', help="Store the results as JSON.")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.widths, args.value_sizes, args.repeat, args.filter)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
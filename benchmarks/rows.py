@@ -0,0 +1,48 @@
+"""
+Compares decoding followed by extraction (`decode_row` + `Table._extract_row_data`) with the fused
+`Table._materialize_row` on 10k rows (30k cells), both in perfect dict and in flat dict modes.
+"""
+import base64
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from starbase import Table
+from starbase.json_decoder import decode_row
+
+NUMBER_OF_ROWS = 10000
+REPEAT = 5
+
+def encode(value):
+    return base64.b64encode(value.encode('utf8')).decode('utf8')
+
+rows = [
+    {
+        'key': encode('row-{0:06d}'.format(i)),
+        'Cell': [
+            {'column': encode('column1:id'), '$': encode(str(i)), 'timestamp': 1369030584274},
+            {'column': encode('column1:name'), '$': encode('Name {0}'.format(i)), 'timestamp': 1369030584274},
+            {'column': encode('column2:age'), '$': encode(str(i % 100)), 'timestamp': 1369030584274},
+        ]
+    }
+    for i in range(NUMBER_OF_ROWS)
+]
+
+def decode_and_extract(perfect_dict):
+    return [Table._extract_row_data(decode_row(row), perfect_dict=perfect_dict) for row in rows]
+
+def materialize(perfect_dict):
+    return [Table._materialize_row(row, perfect_dict=perfect_dict) for row in rows]
+
+for perfect_dict in (True, False):
+    assert decode_and_extract(perfect_dict) == materialize(perfect_dict)
+
+    results = []
+    for func in (decode_and_extract, materialize):
+        duration = min(timeit.repeat(lambda: func(perfect_dict), number=1, repeat=REPEAT))
+        results.append(duration)
+        print('{0:<20} perfect_dict={1!s:<6} {2:.4f} seconds'.format(func.__name__, perfect_dict, duration))
+
+    print('speedup              {0:.1f}x'.format(results[0] / results[1]))
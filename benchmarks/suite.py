@@ -0,0 +1,314 @@
+"""
+Benchmark suite. Runs the client operations (point fetch, fetch_many, insert, batch commit at several
+sizes and full scan) against an in-process Stargate stand-in, and the codec functions (`json_decode`,
+`build_json_data` and `Table._extract_usable_data`) on their own, across row widths and value sizes.
+
+The stand-in is a `requests` transport adapter answering with canned (pre-serialised) responses, so
+that no network nor HBase is involved and the time measured is the time spent in the client.
+
+Results can be stored as a JSON baseline and compared against a previous run:
+
+.. code-block:: none
+
+    python benchmarks/suite.py --save baseline.json
+    python benchmarks/suite.py --compare baseline.json
+"""
+import argparse
+import base64
+import datetime
+import itertools
+import json
+import os
+import platform
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from six.moves.urllib.parse import urlsplit
+
+from starbase import Connection, Table
+from starbase import protobuf
+from starbase.client.helpers import build_json_data
+from starbase.client.table.batch import Batch
+from starbase.json_decoder import json_decode
+
+HOST = 'stargate.benchmark'
+TABLE = 'benchmark'
+TIMESTAMP = 1369030584274
+
+# Row widths (cells per row) and value sizes (bytes) benchmarked.
+WIDTHS = (3, 30)
+VALUE_SIZES = (10, 1000)
+
+BATCH_SIZES = (10, 100, 1000)
+FETCH_MANY_ROWS = 100
+SCAN_ROWS = 1000
+SCAN_BATCH_SIZE = 100
+CODEC_ROWS = 1000
+REPEAT = 5
+
+# Relative change (of the time per operation) reported as a regression or an improvement.
+THRESHOLD = 0.1
+
+def encode(value):
+    return base64.b64encode(value).decode('utf8')
+
+def make_rows(number_of_rows, width, value_size, start=0):
+    """
+    Raw rows (bytes keys, columns and values) of the shape given. Columns are spread over two families.
+    """
+    value = b'x' * value_size
+    return [
+        {
+            'key': 'row-{0:08d}'.format(i).encode('utf8'),
+            'Cell': [
+                {
+                    'column': 'column{0}:field{1}'.format(j % 2 + 1, j).encode('utf8'),
+                    '$': value,
+                    'timestamp': TIMESTAMP,
+                }
+                for j in range(width)
+            ]
+        }
+        for i in range(start, start + number_of_rows)
+    ]
+
+def make_columns(width, value_size):
+    """
+    Columns of a row to write, in data structure #2 (``{family: {qualifier: value}}``).
+    """
+    columns = {}
+    for j in range(width):
+        columns.setdefault('column{0}'.format(j % 2 + 1), {})['field{0}'.format(j)] = 'x' * value_size
+    return columns
+
+def serialize(rows, content_type):
+    """
+    Cell set response body of the raw rows given.
+    """
+    if 'protobuf' == content_type:
+        return protobuf.encode_cell_set({'Row': rows})
+
+    return json.dumps({
+        'Row': [
+            {
+                'key': encode(row['key']),
+                'Cell': [
+                    {'column': encode(cell['column']), '$': encode(cell['$']), 'timestamp': cell['timestamp']}
+                    for cell in row['Cell']
+                ]
+            }
+            for row in rows
+        ]
+    }).encode('utf8')
+
+
+class StargateStandIn(BaseAdapter):
+    """
+    Transport adapter answering the Stargate requests of the suite with canned responses: a row for
+    the point fetches, ``FETCH_MANY_ROWS`` rows for the multigets, 200 for the writes and the scanner
+    batches of a ``SCAN_ROWS`` rows table.
+
+    :param int width: Cells per row.
+    :param int value_size: Value size in bytes.
+    :param str content_type: json or protobuf.
+    """
+    def __init__(self, width, value_size, content_type='json'):
+        super(StargateStandIn, self).__init__()
+        self.content_type = content_type
+        self.media_type = 'application/x-protobuf' if 'protobuf' == content_type else 'application/json'
+        self.requests = 0
+        self.row = serialize(make_rows(1, width, value_size), content_type)
+        self.rows = serialize(make_rows(FETCH_MANY_ROWS, width, value_size), content_type)
+        self.batches = [
+            serialize(make_rows(SCAN_BATCH_SIZE, width, value_size, start=start), content_type)
+            for start in range(0, SCAN_ROWS, SCAN_BATCH_SIZE)
+        ]
+        self.scanners = {}
+        self.scanner_ids = itertools.count(1)
+
+    def respond(self, request, status_code, content=b'', headers=None):
+        response = Response()
+        response.status_code = status_code
+        response.reason = 'OK' if status_code < 400 else 'Error'
+        response._content = content
+        response.headers = CaseInsensitiveDict({'Content-Type': self.media_type})
+        response.headers.update(headers or {})
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        parts = urlsplit(request.url).path.strip('/').split('/')
+
+        if 'scanner' == parts[1]:
+            if 'PUT' == request.method:
+                scanner_id = str(next(self.scanner_ids))
+                self.scanners[scanner_id] = iter(self.batches)
+                location = 'http://{0}/{1}/scanner/{2}'.format(HOST, parts[0], scanner_id)
+                return self.respond(request, 201, headers={'Location': location})
+            if 'DELETE' == request.method:
+                self.scanners.pop(parts[2], None)
+                return self.respond(request, 200)
+            batch = next(self.scanners.get(parts[2], iter(())), None)
+            return self.respond(request, 200, batch) if batch else self.respond(request, 204)
+
+        if 'GET' == request.method:
+            return self.respond(request, 200, self.rows if 'multiget' == parts[1] else self.row)
+
+        return self.respond(request, 200)
+
+    def close(self):
+        pass
+
+
+def client_cases(width, value_size, content_type):
+    """
+    Client operations against the stand-in: ``(name, function, number of calls per measure)``.
+    """
+    connection = Connection(url='http://{0}/'.format(HOST), content_type=content_type, retries=0)
+    connection.pool.session.mount(connection.base_url, StargateStandIn(width, value_size, content_type))
+
+    table = connection.table(TABLE)
+    table.disable_if_exists_checks()
+
+    columns = make_columns(width, value_size)
+    rows = ['row-{0:08d}'.format(i) for i in range(FETCH_MANY_ROWS)]
+
+    def batch_commit(size):
+        def commit():
+            batch = Batch(table=table)
+            for i in range(size):
+                batch.insert('row-{0:08d}'.format(i), columns)
+            batch.commit(finalize=True)
+        return commit
+
+    def scan():
+        for _row in table.fetch_all_rows(with_row_id=True, batch_size=SCAN_BATCH_SIZE):
+            pass
+
+    cases = [
+        ('fetch', lambda: table.fetch('row-00000000'), 100),
+        ('fetch_many[{0}]'.format(FETCH_MANY_ROWS), lambda: table.fetch_many(rows), 10),
+        ('insert', lambda: table.insert('row-00000000', columns), 100),
+    ]
+    for size in BATCH_SIZES:
+        cases.append(('batch_commit[{0}]'.format(size), batch_commit(size), max(1000 // size, 1)))
+    cases.append(('scan[{0}]'.format(SCAN_ROWS), scan, 1))
+    return cases
+
+def codec_cases(width, value_size):
+    """
+    Codec functions on ``CODEC_ROWS`` rows: ``(name, function, number of calls per measure)``.
+    """
+    encoded = json.loads(serialize(make_rows(CODEC_ROWS, width, value_size), 'json').decode('utf8'))
+    decoded = json_decode(encoded)
+    columns = make_columns(width, value_size)
+    keys = ['row-{0:08d}'.format(i) for i in range(CODEC_ROWS)]
+
+    def build():
+        for key in keys:
+            build_json_data(key, columns, encode_content=True, with_row_declaration=False)
+
+    return [
+        ('json_decode[{0}]'.format(CODEC_ROWS), lambda: json_decode(encoded), 1),
+        ('build_json_data[{0}]'.format(CODEC_ROWS), build, 1),
+        ('extract_usable_data[{0}]'.format(CODEC_ROWS),
+         lambda: Table._extract_usable_data(decoded, with_row_id=True, perfect_dict=True), 1),
+    ]
+
+def measure(func, number, repeat):
+    """
+    :return tuple: Best and median seconds per call.
+    """
+    timings = sorted(duration / number for duration in timeit.repeat(func, number=number, repeat=repeat))
+    return timings[0], timings[len(timings) // 2]
+
+def run(widths, value_sizes, content_type, repeat, pattern=None):
+    results = {}
+    for width, value_size in itertools.product(widths, value_sizes):
+        shape = 'width={0},value={1}'.format(width, value_size)
+        for name, func, number in client_cases(width, value_size, content_type) + codec_cases(width, value_size):
+            name = '{0} {1}'.format(name, shape)
+            if pattern and not re.search(pattern, name):
+                continue
+
+            best, median = measure(func, number, repeat)
+            results[name] = {'seconds': best, 'median': median, 'ops': 1.0 / best if best else None}
+            print('{0:<48} {1:>12.6f} s {2:>12.1f} ops/s'.format(name, best, results[name]['ops'] or 0))
+    return results
+
+def compare(baseline, results, threshold=THRESHOLD):
+    """
+    Prints the time per operation of the baseline and the current run. Changes beyond the threshold
+    are flagged.
+
+    :return int: Number of regressions.
+    """
+    regressions = 0
+    print('')
+    print('{0:<48} {1:>12} {2:>12} {3:>9}'.format('benchmark', 'baseline s', 'current s', 'change'))
+    for name in sorted(set(baseline) | set(results)):
+        if name not in baseline or name not in results:
+            print('{0:<48} {1}'.format(name, 'current only' if name in results else 'baseline only'))
+            continue
+
+        before, after = baseline[name]['seconds'], results[name]['seconds']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold:
+            flag = 'slower'
+            regressions += 1
+        elif change < -threshold:
+            flag = 'faster'
+        print('{0:<48} {1:>12.6f} {2:>12.6f} {3:>+8.1%} {4}'.format(name, before, after, change, flag))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="starbase benchmark suite")
+    parser.add_argument('--save', metavar='PATH', help="Store the results as a JSON baseline.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare the results with the baseline given.")
+    parser.add_argument('--filter', metavar='REGEX', help="Only run the benchmarks matching.")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="Relative change reported as a regression (default 0.1).")
+    parser.add_argument('--content-type', choices=('json', 'protobuf'), default='json')
+    parser.add_argument('--widths', type=int, nargs='+', default=WIDTHS)
+    parser.add_argument('--value-sizes', type=int, nargs='+', default=VALUE_SIZES)
+    args = parser.parse_args(argv)
+
+    results = run(args.widths, args.value_sizes, args.content_type, args.repeat, args.filter)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'implementation': platform.python_implementation(),
+                    'platform': platform.platform(),
+                    'date': datetime.datetime.now().isoformat(),
+                    'content_type': args.content_type,
+                    'repeat': args.repeat,
+                },
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('content_type') != args.content_type:
+            print("Warning: the baseline was run with the {0} content type.".format(
+                baseline['meta'].get('content_type')))
+        if compare(baseline['results'], results, args.threshold):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
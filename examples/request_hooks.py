@@ -0,0 +1,48 @@
+"""
+Measuring the HTTP requests with request hooks.
+"""
+from collections import defaultdict
+
+from starbase import Connection
+from starbase.client.transport.hooks import RequestHook
+
+
+class StatsHook(RequestHook):
+    """
+    Collects the number of requests, bytes sent and received and the time spent per operation.
+    """
+    def __init__(self):
+        self.stats = defaultdict(lambda: defaultdict(float))
+
+    def after_request(self, info):
+        stats = self.stats[(info.table, info.operation)]
+        stats['requests'] += 1
+        stats['retries'] += info.retries
+        stats['request_bytes'] += info.request_bytes
+        stats['response_bytes'] += info.response_bytes
+        for phase, seconds in info.timings.items():
+            stats[phase] += seconds
+        if info.error is not None:
+            stats['errors'] += 1
+
+
+hook = StatsHook()
+
+c = Connection(hooks=[hook])
+
+t = c.table('table4')
+
+t.create('column1', 'column2')
+
+for i in range(100):
+    t.insert('my-key-{0}'.format(i), {'column1': {'key11': 'value 11'}, 'column2': {'key21': 'value 21'}})
+
+for i in range(100):
+    t.fetch('my-key-{0}'.format(i))
+
+list(t.fetch_all_rows())
+
+t.drop()
+
+for (table, operation), stats in sorted(hook.stats.items(), key=lambda item: str(item[0])):
+    print(table, operation, dict(stats))
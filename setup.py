@@ -41,6 +41,9 @@ setup(
         'ordereddict>=1.1',
         'requests>=1.2.3',
     ],
+    extras_require = {
+        'asyncio': ['aiohttp>=3.0'],
+    },
     tests_require = [
         'simple-timer>=0.2',
     ]
@@ -0,0 +1,20 @@
+"""
+Asyncio client. Requires ``aiohttp``.
+
+>>> from starbase.client.aio import AsyncConnection
+>>> connection = AsyncConnection(max_in_flight=500)
+>>> table = connection.table('table1')
+>>> await table.insert('row1', {'column1': {'id': '1'}})
+>>> await table.fetch('row1')
+"""
+
+__title__ = 'starbase.client.aio'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('AsyncConnection', 'AsyncTable', 'AsyncBatch', 'AsyncScanner')
+
+from starbase.client.aio.connection import AsyncConnection
+from starbase.client.aio.table import AsyncTable
+from starbase.client.aio.batch import AsyncBatch
+from starbase.client.aio.scanner import AsyncScanner
@@ -0,0 +1,93 @@
+__title__ = 'starbase.client.aio.batch'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('AsyncBatch',)
+
+import asyncio
+
+from starbase.client.table.batch import Batch
+from starbase.client.aio.transport import AsyncHttpRequest
+from starbase.client.transport.methods import PUT, POST
+
+
+class AsyncBatch(Batch):
+    """Asyncio table batch operations.
+
+    Rows are stacked exactly as in ``starbase.client.table.batch.Batch``;
+    only the operations sending requests are coroutines.
+
+    :param starbase.client.aio.table.AsyncTable table:
+    :param int size: Batch size. When set, auto commits stacked records when
+        the stack reaches the ``size`` value.
+    :param int max_bytes: When set, auto commits stacked records when their
+        estimated encoded size reaches the ``max_bytes`` value.
+    :param int max_cells: When set, auto commits stacked records when the
+        number of their cells reaches the ``max_cells`` value.
+    :param bool coalesce: If set to True, mutations of the same row are merged
+        into a single stacked row, last write of a column winning.
+    :param int chunks: If given, commits split the stack into the number of
+        requests given, sent concurrently.
+    """
+    def __repr__(self):
+        """Repr."""
+        return "<starbase.client.aio.batch.AsyncBatch> of {0}".format(
+            self.table
+        )
+
+    async def insert(self, row, columns, timestamp=None, fail_silently=True):
+        """Stack the row for insert (PUT)."""
+        if self._append(PUT, row, columns, timestamp=timestamp):
+            await self.commit(fail_silently=fail_silently)
+
+    async def update(self, row, columns, timestamp=None, fail_silently=True):
+        """Stack the row for update (POST)."""
+        if self._append(POST, row, columns, timestamp=timestamp):
+            await self.commit(fail_silently=fail_silently)
+
+    async def commit(self, finalize=False, fail_silently=True, chunks=None):
+        """Sends all queued items to Stargate.
+
+        Chunks succeed or fail on their own. The stack is cleared either
+        way; chunks that failed are reported by ``finalize``. See
+        ``starbase.client.table.batch.Batch.commit``.
+
+        :param bool finalize: If set to True, the batch is finalized,
+            settings are cleared up and response is returned.
+        :param bool fail_silently:
+        :param int chunks: Number of requests the stack is split into, sent
+            concurrently (within the ``max_in_flight`` limit of the
+            connection). Defaults to the ``chunks`` value of the batch.
+        :return dict: If `finalize` set to True, returns the returned value
+            of method meth::`starbase.client.batch.Batch.finalize`.
+        """
+        if chunks is None:
+            chunks = self.chunks
+
+        async def send(rows):
+            response = await AsyncHttpRequest(
+                connection=self.table.connection,
+                url=self._url,
+                data={"Row": rows},
+                decode_content=False,
+                method=self._method,
+                fail_silently=fail_silently,
+                operation='batch'
+            ).get_response()
+            return response.status_code
+
+        stack_chunks = self._split_stack(chunks)
+
+        try:
+            results = await asyncio.gather(
+                *[send(rows) for rows in stack_chunks],
+                return_exceptions=True
+            )
+        finally:
+            if self._row_keys:
+                self.table.invalidate_row_cache(self._row_keys)
+
+        self._commit_results(stack_chunks, results)
+
+        if finalize:
+            return self.finalize()
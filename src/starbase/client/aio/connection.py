@@ -0,0 +1,378 @@
+__title__ = 'starbase.client.aio.connection'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('AsyncConnection',)
+
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from starbase.translations import _
+from starbase.exceptions import ImproperlyConfigured, DoesNotExist
+from starbase.content_types import (
+    CONTENT_TYPES_DICT, CONTENT_TYPES, DEFAULT_CONTENT_TYPE, CONTENT_TYPE_JSON
+)
+from starbase.defaults import (
+    HOST, PORT, USER, PASSWORD, PERFECT_DICT, RETRIES, RETRY_DELAY,
+    POOL_MAXSIZE, MAX_IN_FLIGHT, COMPRESSION_THRESHOLD, COMPRESSION_LEVEL,
+    TABLES_CACHE_TTL, SCHEMA_CACHE_TTL, ROW_CACHE_SIZE, ROW_CACHE_MAX_BYTES,
+    ROW_CACHE_TTL, MISSING_ROWS_CACHE_SIZE, MISSING_ROWS_CACHE_TTL
+)
+from starbase.client.aio.table import AsyncTable
+from starbase.client.aio.transport import AsyncHttpRequest
+from starbase.client.cache import TTLCache, RowCache
+from starbase.client.metrics import MetricsRegistry
+from starbase.client.transport.retry import RetryPolicy
+from starbase.client.connection import TABLES_CACHE_KEY
+
+
+class AsyncConnection(object):
+    """Asyncio connection instance.
+
+    Mirrors ``starbase.client.connection.Connection``, but all the methods
+    doing requests are coroutines. Requires ``aiohttp``.
+
+    :param str host: Stargate host.
+    :param int port: Stargate port.
+    :param str url: Stargate endpoint URL. If set, overrides host and port
+        settings.
+    :param str user: Stargate user (HTTP basic auth).
+    :param str password: Stargate password (see comment to `user`).
+    :param bool secure: If set to True, HTTPS is used; otherwise - HTTP.
+    :param bool verify_ssl: If set to False, HTTPS certs that are self signed
+        will be accepted.
+    :param str content_type: Content type for data wrapping when
+        communicating with the Stargate. Possible options are: json,
+        protobuf.
+    :param bool perfect_dict: Global setting. If set to True, generally data
+        will be returned as perfect dict.
+    :param int retries: Number of times to retry a failed request
+        (transient failures only, see ``starbase.client.transport.retry``).
+    :param int retry_delay: Delay cap (in seconds) of the first retry of a
+        failed request. Doubles with each retry.
+    :param int pool_maxsize: Maximum number of keep-alive connections per
+        host.
+    :param int max_in_flight: Maximum number of requests sent concurrently.
+        Further requests wait until one of the in-flight ones completes.
+    :param bool compression: If set to True, request bodies larger than
+        ``compression_threshold`` bytes are gzip compressed and gzip
+        compressed responses are asked for.
+    :param int compression_threshold: Minimum size (in bytes) of the request
+        bodies to compress.
+    :param int compression_level: Gzip compression level.
+    :param float tables_cache_ttl: Number of seconds the table list used by
+        the table existence checks is cached for. See
+        ``starbase.client.connection.Connection``.
+    :param float schema_cache_ttl: Number of seconds the table schemas are
+        cached for (per table). See
+        ``starbase.client.connection.Connection``.
+    :param int row_cache_size: If given, maximum number of rows cached by
+        ``AsyncTable.fetch``. Disabled by default.
+    :param int row_cache_max_bytes: If given, maximum (estimated) size in
+        bytes of the rows cached.
+    :param float row_cache_ttl: Number of seconds the rows are cached for.
+    :param int missing_rows_cache_size: If given, maximum number of absent
+        rows remembered by ``AsyncTable.fetch``. Disabled by default.
+    :param float missing_rows_cache_ttl: Number of seconds the absent rows
+        are remembered for.
+    :param list hooks: Request hooks (see
+        ``starbase.client.transport.hooks``).
+    :param bool|starbase.client.metrics.MetricsRegistry metrics: If set to
+        True, request metrics are collected into a new registry (see the
+        ``metrics`` attribute). A registry instance can be given as well.
+    :param starbase.client.transport.retry.RetryPolicy retry_policy: Retry
+        policy of the failed requests. If given, ``retries`` and
+        ``retry_delay`` are ignored.
+    """
+    def __init__(self, host=HOST, port=PORT, url=None, user=USER,
+                 password=PASSWORD, secure=False, verify_ssl=True,
+                 content_type=DEFAULT_CONTENT_TYPE, perfect_dict=PERFECT_DICT,
+                 retries=RETRIES, retry_delay=RETRY_DELAY,
+                 pool_maxsize=POOL_MAXSIZE, max_in_flight=MAX_IN_FLIGHT,
+                 compression=False,
+                 compression_threshold=COMPRESSION_THRESHOLD,
+                 compression_level=COMPRESSION_LEVEL,
+                 tables_cache_ttl=TABLES_CACHE_TTL,
+                 schema_cache_ttl=SCHEMA_CACHE_TTL,
+                 row_cache_size=ROW_CACHE_SIZE,
+                 row_cache_max_bytes=ROW_CACHE_MAX_BYTES,
+                 row_cache_ttl=ROW_CACHE_TTL,
+                 missing_rows_cache_size=MISSING_ROWS_CACHE_SIZE,
+                 missing_rows_cache_ttl=MISSING_ROWS_CACHE_TTL,
+                 hooks=None, metrics=False, retry_policy=None):
+        """Creates a new connection instance.
+
+        See docs above.
+        """
+        if aiohttp is None:
+            raise ImproperlyConfigured(
+                _("The ``aiohttp`` package is required for the asyncio "
+                  "client.")
+            )
+
+        if not content_type in CONTENT_TYPES:
+            raise ImproperlyConfigured(
+                _("Invalid ``content_type`` {0} value.".format(content_type))
+            )
+
+        if not host:
+            raise ImproperlyConfigured(
+                _("Invalid ``host`` {0} value.".format(host))
+            )
+
+        if not port:
+            raise ImproperlyConfigured(
+                _("Invalid ``port`` {0} value.".format(port))
+            )
+
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.secure = secure
+        self.verify_ssl = verify_ssl
+        self.content_type = CONTENT_TYPES_DICT[content_type]
+        self.perfect_dict = perfect_dict
+        self.retry_policy = retry_policy or RetryPolicy(
+            retries=retries, base_delay=retry_delay
+        )
+        self.pool_maxsize = pool_maxsize
+        self.max_in_flight = max_in_flight
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.tables_cache = TTLCache(tables_cache_ttl)
+        self.schema_cache = TTLCache(schema_cache_ttl)
+        self.row_cache = RowCache(max_entries=row_cache_size,
+                                  max_bytes=row_cache_max_bytes,
+                                  ttl=row_cache_ttl)
+        self.missing_rows_cache = RowCache(max_entries=missing_rows_cache_size,
+                                           ttl=missing_rows_cache_ttl)
+        self.bloom_filters = {}
+        # Rows written while Bloom filters are being built, keyed by table name.
+        self.bloom_filter_writes = {}
+        self.hooks = list(hooks or [])
+        self.metrics = MetricsRegistry() if metrics is True \
+            else (metrics or None)
+        if self.metrics is not None:
+            self.hooks.append(self.metrics)
+        self._in_flight = None
+        self.auth = aiohttp.BasicAuth(user, password) \
+            if user and password else None
+        self._session = None
+
+        if url:
+            self.base_url = url + ('/' if url[-1] != '/' else '')
+        else:
+            self.base_url = 'http{secure}://{host}:{port}/'.format(
+                secure='s' if self.secure else '', host=self.host,
+                port=self.port
+            )
+
+    def __repr__(self):
+        """Repr."""
+        return "<starbase.client.aio.connection.AsyncConnection " \
+               "({0}:{1})>".format(self.host, self.port)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def retries(self):
+        """Number of times to retry a failed request (see
+        ``retry_policy``).
+
+        :return int:
+        """
+        return self.retry_policy.retries
+
+    @retries.setter
+    def retries(self, value):
+        self.retry_policy.retries = value
+
+    @property
+    def retry_delay(self):
+        """Delay cap (in seconds) of the first retry of a failed request
+        (see ``retry_policy``).
+
+        :return float:
+        """
+        return self.retry_policy.base_delay
+
+    @retry_delay.setter
+    def retry_delay(self, value):
+        self.retry_policy.base_delay = value
+
+    @property
+    def in_flight(self):
+        """Semaphore bounding the number of concurrent requests.
+
+        :return asyncio.Semaphore:
+        """
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._in_flight
+
+    def get_session(self):
+        """Get the ``aiohttp.ClientSession``, creating it on first use (it
+        has to be created inside of a running event loop).
+
+        :return aiohttp.ClientSession:
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight,
+                                             limit_per_host=self.pool_maxsize)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close all pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def version(self, fail_silently=True):
+        """Software version.
+
+        :param bool fail_silently:
+        :return dict: Dictionary with info on software versions.
+        """
+        response = await AsyncHttpRequest(
+            connection=self, url='version', fail_silently=fail_silently
+        ).get_response()
+        return response.content
+
+    async def cluster_version(self, fail_silently=True):
+        """Storage cluster version.
+
+        :param bool fail_silently:
+        :return str: HBase version.
+        """
+        response = await AsyncHttpRequest(
+            connection=self, url='version/cluster',
+            fail_silently=fail_silently, content_type=CONTENT_TYPE_JSON
+        ).get_response()
+        return response.content
+
+    async def cluster_status(self, fail_silently=True):
+        """Storage cluster status.
+
+        :param bool fail_silently:
+        :return dict: Dictionary with information on dead nodes, live nodes,
+            average load, regions, etc.
+        """
+        response = await AsyncHttpRequest(
+            connection=self, url='status/cluster',
+            fail_silently=fail_silently, content_type=CONTENT_TYPE_JSON
+        ).get_response()
+        return response.content
+
+    def table(self, name, codecs=None):
+        """Initializes a table instance to work with.
+
+        :param str name: Table name. Example value 'test'.
+        :param dict codecs: Cell value codecs keyed by column family or
+            column. See ``starbase.client.codecs``.
+        :return starbase.client.aio.table.AsyncTable:
+        """
+        return AsyncTable(connection=self, name=name, codecs=codecs)
+
+    async def tables(self, raw=False, fail_silently=True):
+        """Table list.
+
+        :param bool raw: If set to True raw result (JSON) is returned.
+        :param bool fail_silently:
+        :return list: Just a list of plain strings of table names.
+        """
+        response = await AsyncHttpRequest(
+            connection=self, fail_silently=fail_silently
+        ).get_response()
+        if not raw:
+            try:
+                tables = [table['name'] for table in response.content['table']]
+            except:
+                return []
+            self.tables_cache.set(TABLES_CACHE_KEY, frozenset(tables))
+            return tables
+        return response.content
+
+    def invalidate_tables_cache(self):
+        """Invalidates the cached table list (see ``tables_cache_ttl``)."""
+        self.tables_cache.invalidate(TABLES_CACHE_KEY)
+
+    def add_hook(self, hook):
+        """Registers a request hook.
+
+        :param starbase.client.transport.hooks.RequestHook hook:
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """Unregisters the request hook given.
+
+        :param starbase.client.transport.hooks.RequestHook hook:
+        """
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    def cache_stats(self):
+        """Statistics of the caches of the connection.
+
+        :return dict: Statistics keyed by cache name.
+        """
+        return {
+            'tables': self.tables_cache.stats(),
+            'schema': self.schema_cache.stats(),
+            'rows': self.row_cache.stats(),
+            'missing_rows': self.missing_rows_cache.stats(),
+        }
+
+    async def table_exists(self, name, fail_silently=True):
+        """Checks if table exists. Uses the cached table list, unless
+        expired. Tables missing from the cached list are looked up once more
+        in a freshly requested one.
+
+        :param str name: Table name.
+        :param bool fail_silently:
+        :return bool:
+        """
+        tables = self.tables_cache.get(TABLES_CACHE_KEY)
+        table_exists = tables is not None and name in tables
+
+        if not table_exists:
+            table_exists = name in await self.tables()
+
+        if not table_exists and not fail_silently:
+            raise DoesNotExist("Table `{0}` does not exist!".format(name))
+
+        return table_exists
+
+    async def create_table(self, name, *columns):
+        """Creates the table and returns the instance created. If table
+        already exists, returns None.
+
+        :param str name: Table name.
+        :param list|tuple *columns:
+        :return starbase.client.aio.table.AsyncTable:
+        """
+        assert columns
+        table = self.table(name)
+        if not await table.exists():
+            await table.create(*columns)
+            return table
+
+    async def drop_table(self, name, fail_silently=True):
+        """Drops the table.
+
+        :param str name: Table name.
+        :return int: Status code.
+        """
+        table = self.table(name)
+        return await table.drop(fail_silently=fail_silently)
@@ -0,0 +1,129 @@
+__title__ = 'starbase.client.aio.scanner'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('AsyncScanner',)
+
+import logging
+
+from starbase.exceptions import DatabaseError
+from starbase.json_decoder import decode_row
+from starbase.client.aio.transport import AsyncHttpRequest
+from starbase.client.transport.methods import GET, DELETE
+from starbase.client.transport import status_codes
+from starbase.translations import _
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScanner(object):
+    """Asyncio table scanner operations.
+
+    :param starbase.client.aio.table.AsyncTable table:
+    :param str url: Scanner URL (as returned in the ``Location`` header).
+    :param bool fail_silently: If set to False, failed batch requests raise
+        an exception. Otherwise, they are logged and the scan stops.
+    """
+    def __init__(self, table, url, fail_silently=True):
+        """See the docs above."""
+        self.table = table
+        self.url = url
+        self.id = url.split('/')[-1]
+        self.fail_silently = fail_silently
+
+    def __repr__(self):
+        """Repr."""
+        return "<starbase.client.aio.scanner.AsyncScanner ({0})> " \
+               "of {1}".format(self.id, self.table)
+
+    def _build_url(self):
+        """Scanner URL relative to the Stargate base URL.
+
+        :return str:
+        """
+        return '{table_name}/scanner/{scanner_id}'.format(
+            table_name=self.table.name, scanner_id=self.id
+        )
+
+    async def delete(self):
+        """Delete scanner.
+
+        :return int: HTTP status code.
+        """
+        response = await AsyncHttpRequest(
+            connection=self.table.connection,
+            url=self._build_url(),
+            method=DELETE
+        ).get_response()
+        return response.status_code
+
+    async def results(self, with_row_id=False, raw=False, perfect_dict=None):
+        """Asynchronously iterate through the scanner rows.
+
+        Batches are fetched one by one, until Stargate tells there are no
+        more rows left (204). Any other response than 200 or 204 is a
+        failure (see ``fail_silently``). The scanner is deleted once
+        iteration stops.
+
+        :param bool with_row_id:
+        :param bool raw:
+        :param bool perfect_dict:
+        """
+        if perfect_dict is None:
+            perfect_dict = self.table.connection.perfect_dict
+
+        # Protobuf rows come already decoded.
+        decode = self.table._base64_encoded
+        codecs = self.table.codecs or None
+        materialize_row = self.table.__class__._materialize_row
+
+        # Rows are materialized as the ``decode`` phase of the batch
+        # requests.
+        def materialize(results):
+            if not results or not results.get('Row'):
+                return results
+            if raw:
+                if decode:
+                    results['Row'] = [decode_row(item)
+                                      for item in results['Row']]
+            else:
+                results['Row'] = [
+                    materialize_row(item, with_row_id=with_row_id,
+                                    perfect_dict=perfect_dict,
+                                    decode=decode, codecs=codecs)
+                    for item in results['Row']
+                ]
+            return results
+
+        try:
+            while True:
+                response = await AsyncHttpRequest(
+                    connection=self.table.connection,
+                    url=self._build_url(),
+                    method=GET,
+                    fail_silently=self.fail_silently,
+                    materialize=materialize
+                ).get_response()
+
+                if status_codes.STATUS_CODE_NO_CONTENT == \
+                        response.status_code:
+                    break
+
+                if status_codes.STATUS_CODE_OK != response.status_code:
+                    message = _("Scanner {0} of table {1} failed with "
+                                "status {2}; scan incomplete.").format(
+                        self.id, self.table.name, response.status_code
+                    )
+                    if not self.fail_silently:
+                        raise DatabaseError(message)
+                    logger.warning(message)
+                    break
+
+                results = response.content
+                if not results or not results.get('Row'):
+                    break
+
+                for row in results['Row']:
+                    yield row
+        finally:
+            await self.delete()
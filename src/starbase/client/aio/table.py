@@ -0,0 +1,563 @@
+__title__ = 'starbase.client.aio.table'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('AsyncTable',)
+
+import asyncio
+import copy
+import logging
+
+from starbase.translations import _
+from starbase.exceptions import DoesNotExist, IntegrityError
+from starbase.client.table import BaseTable
+from starbase.client.aio.transport import AsyncHttpRequest
+from starbase.client.aio.scanner import AsyncScanner
+from starbase.client.aio.batch import AsyncBatch
+from starbase.client.transport.methods import PUT, POST, DELETE
+from starbase.client.transport import status_codes
+from starbase.defaults import MAX_URL_LENGTH, BLOOM_FILTER_ERROR_RATE
+from starbase.client.table import KEY_ONLY_FILTER
+
+logger = logging.getLogger(__name__)
+
+class AsyncTable(BaseTable):
+    """Asyncio HBase table operations.
+
+    Mirrors ``starbase.client.table.Table`` (sharing its
+    ``starbase.client.table.BaseTable`` base): URLs and request data are
+    built the same way, but all the methods doing requests are coroutines.
+    The threaded ``fetch_all_rows_parallel`` has no asyncio counterpart.
+
+    :param starbase.client.aio.connection.AsyncConnection connection:
+    :param str name: Table name.
+    """
+    def __repr__(self):
+        """Repr."""
+        return "<starbase.client.aio.table.AsyncTable " \
+               "({0})> on {1}".format(self.name, self.connection)
+
+    async def _request(self, url='', data={}, method=None,
+                       decode_content=False, fail_silently=True,
+                       operation=None, materialize=None):
+        """Send a request to the Stargate and return the response.
+
+        :return starbase.client.transport.HttpResponse:
+        """
+        kwargs = {}
+        if method is not None:
+            kwargs['method'] = method
+        return await AsyncHttpRequest(
+            connection=self.connection,
+            url=url,
+            data=data,
+            decode_content=decode_content,
+            fail_silently=fail_silently,
+            operation=operation,
+            materialize=materialize,
+            **kwargs
+        ).get_response()
+
+    async def exists(self, fail_silently=True):
+        """Checks if table exists.
+
+        :param bool fail_silently:
+        :return bool:
+        """
+        return await self.connection.table_exists(
+            self.name, fail_silently=fail_silently
+        )
+
+    async def fetch(self, row, columns=None, timestamp=None,
+                    number_of_versions=None, raw=False, perfect_dict=None,
+                    fail_silently=True):
+        """Fetch a single row from table.
+
+        See ``starbase.client.table.Table.fetch``.
+
+        :return dict:
+        """
+        if self.check_if_exists_on_row_fetch:
+            if not await self.exists(fail_silently=fail_silently):
+                return None
+
+        if self._is_missing(row):
+            return None
+
+        if perfect_dict is None:
+            perfect_dict = self.connection.perfect_dict
+
+        url = self._build_get_url(row, columns=columns, timestamp=timestamp,
+                                  number_of_versions=number_of_versions)
+
+        row_cache = self.connection.row_cache
+        if row_cache.enabled and not raw:
+            key = self._row_cache_key(row, url, perfect_dict=perfect_dict)
+            cached = row_cache.get(key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+            generation = row_cache.generation
+
+        # Rows are materialized as the ``decode`` phase of the request.
+        materialize = None
+        if not raw:
+            def materialize(response_content):
+                return self._parse_row_response(response_content,
+                                                perfect_dict=perfect_dict,
+                                                fail_silently=fail_silently,
+                                                decode=self._base64_encoded,
+                                                codecs=self.codecs or None)
+
+        missing_rows_generation = self.connection.missing_rows_cache.generation
+        response = await self._request(url, decode_content=raw,
+                                       fail_silently=fail_silently,
+                                       materialize=materialize)
+
+        if not columns and not timestamp:
+            self._cache_missing_row(row, response.status_code,
+                                    missing_rows_generation)
+
+        if raw:
+            return response.content
+
+        # Other responses (such as 404 of a missing row) hold no row.
+        result = response.content if response.raw.ok else None
+        if row_cache.enabled and result is not None:
+            row_cache.set(key, copy.deepcopy(result), generation=generation)
+        return result
+
+    async def fetch_many(self, rows, columns=None, number_of_versions=None,
+                         raw=False, perfect_dict=None,
+                         max_url_length=MAX_URL_LENGTH, columnar=False,
+                         fail_silently=True):
+        """Fetch multiple rows from table at once.
+
+        See ``starbase.client.table.Table.fetch_many``. All chunks are
+        fetched concurrently (within the ``max_in_flight`` limit of the
+        connection).
+
+        :return dict:
+        """
+        if self.check_if_exists_on_row_fetch:
+            if not await self.exists(fail_silently=fail_silently):
+                return None
+
+        if perfect_dict is None:
+            perfect_dict = self.connection.perfect_dict
+
+        if columnar:
+            raw = True
+
+        rows = list(rows)
+        # Rows known not to exist are not requested.
+        urls = self._build_multiget_urls(
+            [row for row in rows if not self._is_missing(row)],
+            columns=columns, number_of_versions=number_of_versions,
+            max_url_length=max_url_length
+        )
+
+        # Rows are materialized as the ``decode`` phase of the requests.
+        def materialize(response_content):
+            return self._materialize_rows(response_content, raw=raw,
+                                          perfect_dict=perfect_dict,
+                                          fail_silently=fail_silently,
+                                          decode=self._base64_encoded,
+                                          codecs=self.codecs or None)
+
+        responses = await asyncio.gather(*[
+            self._request(url, decode_content=raw, materialize=materialize)
+            for url in urls
+        ])
+
+        result = dict((row, None) for row in rows)
+        for response in responses:
+            # Stargate responds with 404 if none of the rows exist.
+            if not fail_silently and response.status_code not in (
+                    status_codes.STATUS_CODE_OK,
+                    status_codes.STATUS_CODE_NOT_FOUND):
+                response.raw.raise_for_status()
+
+            if response.raw.ok:
+                self._key_rows(response.content, result)
+
+        if columnar:
+            return self._build_columnar_result(rows, result)
+
+        return result
+
+    async def _scanner(self, batch_size=None, start_row=None, end_row=None,
+                       start_time=None, end_time=None, filter_string=None,
+                       data={}, fail_silently=True):
+        """Creates a scanner instance.
+
+        See ``starbase.client.table.Table._scanner``.
+
+        :return starbase.client.aio.scanner.AsyncScanner:
+        """
+        data = self._build_scanner_data(
+            batch_size=batch_size, start_row=start_row, end_row=end_row,
+            start_time=start_time, end_time=end_time,
+            filter_string=filter_string, data=data,
+            encode_rows=self._base64_encoded
+        )
+
+        response = await self._request('{0}/scanner'.format(self.name),
+                                       data=data, method=PUT,
+                                       fail_silently=fail_silently)
+
+        scanner_url = response.raw.headers.get('location')
+
+        if scanner_url:
+            return AsyncScanner(table=self, url=scanner_url,
+                                fail_silently=fail_silently)
+
+    async def fetch_all_rows(self, with_row_id=False, raw=False,
+                             perfect_dict=None, filter_string=None,
+                             scanner_config={}, batch_size=None,
+                             start_row=None, end_row=None,
+                             fail_silently=True):
+        """Asynchronously iterate through all table rows.
+
+        See ``starbase.client.table.Table.fetch_all_rows``.
+
+        :example:
+        >>> async for row in table.fetch_all_rows(with_row_id=True):
+        >>>     print(row)
+        """
+        if self.check_if_exists_on_scanner_operations:
+            if not await self.exists(fail_silently=fail_silently):
+                return
+
+        scanner = await self._scanner(batch_size=batch_size,
+                                      start_row=start_row,
+                                      end_row=end_row,
+                                      filter_string=filter_string,
+                                      data=scanner_config,
+                                      fail_silently=fail_silently)
+
+        if not scanner:
+            if fail_silently:
+                return
+            raise DoesNotExist(
+                _("""Table "{0}" does not exist.""".format(self.name))
+            )
+
+        async for row in scanner.results(perfect_dict=perfect_dict,
+                                         with_row_id=with_row_id, raw=raw):
+            yield row
+
+    async def build_bloom_filter(self, start_row=None, end_row=None,
+                                 capacity=None,
+                                 error_rate=BLOOM_FILTER_ERROR_RATE,
+                                 batch_size=None, fail_silently=True):
+        """Builds a Bloom filter of the row keys out of a key-only scan.
+
+        See ``starbase.client.table.Table.build_bloom_filter``.
+
+        :return starbase.client.cache.BloomFilter:
+        """
+        written = self._begin_bloom_filter()
+        try:
+            rows = []
+            async for row in self.fetch_all_rows(
+                    with_row_id=True, perfect_dict=False,
+                    filter_string=KEY_ONLY_FILTER, batch_size=batch_size,
+                    start_row=start_row, end_row=end_row,
+                    fail_silently=False):
+                rows.extend(row)
+            return self._register_bloom_filter(rows, start_row=start_row,
+                                               end_row=end_row,
+                                               capacity=capacity,
+                                               error_rate=error_rate,
+                                               written=written)
+        except Exception as e:
+            if not fail_silently:
+                raise
+            logger.warning(
+                _("Failed to build the Bloom filter of table {0}: "
+                  "{1}").format(self.name, e)
+            )
+            return None
+        finally:
+            self._end_bloom_filter(written)
+
+    async def _put(self, row, columns, timestamp=None, encode_content=True,
+                   fail_silently=True):
+        """Cell store (single or multiple).
+
+        :return int: HTTP status code.
+        """
+        if self.check_if_exists_on_row_insert:
+            if not await self.exists(fail_silently=fail_silently):
+                return None
+
+        data = self._build_table_data(row, columns, timestamp=timestamp,
+                                      encode_content=encode_content,
+                                      with_row_declaration=True)
+        self._rows_written([row])
+        try:
+            response = await self._request(self._build_put_url(row, columns),
+                                           data=data, method=PUT,
+                                           fail_silently=fail_silently)
+        finally:
+            self.invalidate_row_cache([row])
+        return response.status_code
+
+    async def insert(self, row, columns, timestamp=None, fail_silently=True):
+        """Inserts a single row into a table.
+
+        :return int: HTTP status code (200 on success).
+        """
+        return await self._put(row, columns, timestamp=timestamp,
+                               fail_silently=fail_silently)
+
+    async def _post(self, row, columns, timestamp=None, encode_content=True,
+                    fail_silently=True):
+        """Update (POST) operation.
+
+        :return int: HTTP status code.
+        """
+        if self.check_if_exists_on_row_update:
+            if not await self.exists(fail_silently=fail_silently):
+                return None
+
+        data = self._build_table_data(row, columns, timestamp=timestamp,
+                                      encode_content=encode_content,
+                                      with_row_declaration=True)
+        self._rows_written([row])
+        try:
+            response = await self._request(self._build_post_url(row, columns),
+                                           data=data, method=POST,
+                                           fail_silently=fail_silently)
+        finally:
+            self.invalidate_row_cache([row])
+        return response.status_code
+
+    async def update(self, row, columns, timestamp=None, fail_silently=True):
+        """Updates a single row in a table.
+
+        :return int: HTTP status code (200 on success).
+        """
+        return await self._post(row, columns, timestamp=timestamp,
+                                fail_silently=fail_silently)
+
+    async def remove(self, row, column=None, qualifier=None, timestamp=None,
+                     fail_silently=True):
+        """Removes a single row/column/qualifier from a table.
+
+        :return int: HTTP status code.
+        """
+        url = self._build_delete_url(row=row, column=column,
+                                     qualifier=qualifier)
+        try:
+            response = await self._request(url, method=DELETE,
+                                           fail_silently=fail_silently)
+        finally:
+            self.invalidate_row_cache([row])
+        return response.status_code
+
+    async def drop(self, fail_silently=True):
+        """Drops current table.
+
+        :return int: HTTP response status code (200 on success).
+        """
+        try:
+            response = await self._request('{0}/schema'.format(self.name),
+                                           method=DELETE,
+                                           fail_silently=fail_silently)
+        finally:
+            self.connection.invalidate_tables_cache()
+            self.invalidate_schema_cache()
+            self.invalidate_row_cache()
+            self.remove_bloom_filter()
+        return response.status_code
+
+    async def schema(self, fail_silently=True, refresh=False):
+        """Table schema (cached, see ``Table.schema``).
+
+        :param bool fail_silently:
+        :param bool refresh: If set to True, the schema is requested even if
+            cached.
+        :return dict:
+        """
+        schema, column_families = await self._get_schema(
+            fail_silently=fail_silently, refresh=refresh
+        )
+        return copy.deepcopy(schema)
+
+    async def _get_schema(self, fail_silently=True, refresh=False):
+        """Gets the table schema along with the set of column families,
+        either cached or requested.
+
+        :return tuple: Schema (not to be modified) and frozenset of column
+            family names.
+        """
+        if not refresh:
+            cached = self.connection.schema_cache.get(self.name)
+            if cached is not None:
+                return cached
+
+        response = await self._request('{0}/schema'.format(self.name),
+                                       fail_silently=fail_silently)
+        return self._cache_schema(response.content)
+
+    async def column_families(self, fail_silently=True):
+        """Gets the set of column families of the table (cached).
+
+        :return frozenset:
+        """
+        schema, column_families = await self._get_schema(
+            fail_silently=fail_silently
+        )
+        return column_families
+
+    async def columns(self):
+        """Gets a plain list of column families of the table given.
+
+        :return list:
+        """
+        schema, column_families = await self._get_schema()
+        columns_schema = schema['ColumnSchema'] \
+            if schema and 'ColumnSchema' in schema else []
+        return [cf['name'] for cf in columns_schema]
+
+    async def regions(self, fail_silently=True):
+        """Table region metadata.
+
+        :return dict:
+        """
+        response = await self._request('{0}/regions'.format(self.name),
+                                       fail_silently=fail_silently)
+        return response.content
+    metadata = regions
+
+    async def create(self, *columns, **kwargs):
+        """Creates a table schema.
+
+        :return int: HTTP response status code (201 on success). Returns
+            boolean False on failure.
+        """
+        fail_silently = kwargs.get('fail_silently', True)
+
+        if self.check_if_exists_on_schema_operations:
+            if await self.exists():
+                if fail_silently:
+                    return False
+                else:
+                    raise IntegrityError(
+                        "Table ``{0}`` already exists".format(self.name)
+                    )
+
+        url, data = self._get_data_for_table_create_or_update(columns)
+        try:
+            response = await self._request(url, data=data, method=PUT,
+                                           fail_silently=fail_silently)
+        finally:
+            self.connection.invalidate_tables_cache()
+            self.invalidate_schema_cache()
+        return response.status_code
+
+    async def _update_schema(self, columns, method=None, fail_silently=True):
+        """Updates current table schema.
+
+        :return int: HTTP response status code.
+        """
+        if self.check_if_exists_on_schema_operations:
+            if not await self.exists(fail_silently=fail_silently):
+                return False
+
+        if method is None:
+            method = POST
+
+        url, data = self._get_data_for_table_create_or_update(columns)
+        try:
+            response = await self._request(url, data=data, method=method,
+                                           fail_silently=fail_silently,
+                                           operation='alter')
+        finally:
+            self.invalidate_schema_cache()
+        return response.status_code
+
+    async def _replace_schema(self, columns, fail_silently=True):
+        """Replaces the table schema.
+
+        :return int: HTTP response status code.
+        """
+        return await self._update_schema(columns, method=PUT,
+                                         fail_silently=fail_silently)
+
+    async def add_columns(self, *columns, **kwargs):
+        """Add columns to existing table (POST).
+
+        :return int: HTTP response status code (200 on success).
+        """
+        fail_silently = kwargs.get('fail_silently', True)
+        return await self._update_schema(columns, fail_silently=fail_silently)
+
+    async def drop_columns(self, *columns, **kwargs):
+        """Removes/drops columns from table (PUT).
+
+        :return int: HTTP response status code (201 on success).
+        """
+        fail_silently = kwargs.get('fail_silently', True)
+
+        # The schema is replaced as a whole, so it's not taken from the
+        # cache.
+        schema, column_families = await self._get_schema(
+            fail_silently=fail_silently, refresh=True
+        )
+        remaining_columns = column_families - set(columns)
+
+        return await self._replace_schema(remaining_columns,
+                                          fail_silently=fail_silently)
+
+    async def batch(self, size=None, fail_silently=True, max_bytes=None,
+                    max_cells=None, coalesce=False, chunks=None,
+                    background=False, flush_interval=None, max_pending=None,
+                    flushers=None, futures=None, parallelism=None,
+                    max_pending_bytes=None):
+        """Returns an AsyncBatch instance. Returns None if table does not
+        exist.
+
+        :param int size: Size of auto-commit. If not given, auto-commit is
+            disabled.
+        :param int max_bytes: If given, auto-commit is fired as soon as the
+            estimated encoded size of the stacked rows reaches the value given.
+        :param int max_cells: If given, auto-commit is fired as soon as the
+            number of stacked cells reaches the value given.
+        :param bool coalesce: If set to True, mutations of the same row are
+            merged before being sent, last write of a column winning.
+        :param int chunks: If given, commits split the stack into the number
+            of requests given, sent concurrently (within the
+            ``max_in_flight`` limit of the connection).
+        :param bool fail_silently:
+        :param bool background: Background batches (flusher threads) are
+            not supported by the asyncio client. Neither are their
+            ``flush_interval``, ``max_pending``, ``max_pending_bytes``,
+            ``flushers`` and ``futures`` arguments, nor ``parallelism`` (see
+            ``starbase.client.table.Table.batch``). Giving any of them raises
+            ``NotImplementedError``.
+        :return starbase.client.aio.batch.AsyncBatch:
+        """
+        unsupported = dict(flush_interval=flush_interval,
+                           max_pending=max_pending,
+                           max_pending_bytes=max_pending_bytes,
+                           flushers=flushers, futures=futures,
+                           parallelism=parallelism)
+        if background or any(value is not None
+                             for value in unsupported.values()):
+            raise NotImplementedError(
+                _("Background batches (and the ``flush_interval``, "
+                  "``max_pending``, ``max_pending_bytes``, ``flushers``, "
+                  "``futures`` and ``parallelism`` arguments) are not "
+                  "supported by the asyncio client. Use ``chunks`` to send "
+                  "the commits concurrently.")
+            )
+
+        if self.check_if_exists_on_batch_operations:
+            if not await self.exists(fail_silently=fail_silently):
+                return None
+
+        return AsyncBatch(table=self, size=size, max_bytes=max_bytes,
+                          max_cells=max_cells, coalesce=coalesce,
+                          chunks=chunks)
@@ -0,0 +1,232 @@
+"""Asyncio client tests, against the Stargate emulator served over HTTP."""
+
+import unittest
+
+from requests.models import HTTPError
+
+from starbase.client.table import Table
+from starbase.client.transport.hooks import RequestHook
+from starbase.emulator import Emulator, EmulatorServer
+
+try:
+    from starbase.client.aio import AsyncConnection
+except ImportError:
+    AsyncConnection = None
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    IsolatedAsyncioTestCase = unittest.TestCase
+
+
+class RecordingHook(RequestHook):
+    """Records the operations of the requests sent."""
+
+    def __init__(self):
+        self.operations = []
+
+    def after_request(self, info):
+        self.operations.append((info.operation, info.status_code))
+
+
+@unittest.skipIf(AsyncConnection is None, "aiohttp is not installed")
+@unittest.skipIf(IsolatedAsyncioTestCase is unittest.TestCase,
+                 "Python 3.8 or later is required")
+class AsyncClientTest(IsolatedAsyncioTestCase):
+    """Asyncio client tests."""
+    content_type = 'json'
+
+    def setUp(self):
+        self.emulator = Emulator()
+        self.server = EmulatorServer(self.emulator)
+        self.server.__enter__()
+
+    async def asyncSetUp(self):
+        self.connection = AsyncConnection(url=self.server.url,
+                                          content_type=self.content_type)
+        self.table = self.connection.table('table1')
+        await self.table.create('column1', 'column2')
+
+    async def asyncTearDown(self):
+        await self.connection.close()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    async def insert_rows(self, number_of_rows):
+        batch = await self.table.batch()
+        for i in range(number_of_rows):
+            await batch.insert('row{0:02d}'.format(i),
+                               {'column1': {'id': str(i)}})
+        await batch.commit(finalize=True)
+        self.emulator.reset_stats()
+
+    async def test_01_connection(self):
+        """Test version, table list and table existence."""
+        self.assertEqual((await self.connection.version())['REST'], '0.0.2')
+        self.assertEqual(await self.connection.tables(), ['table1'])
+        self.assertTrue(await self.connection.table_exists('table1'))
+        self.assertTrue(await self.table.exists())
+        self.assertFalse(await self.connection.table('table2').exists())
+
+        # Tables missing from the cached table list are looked up once more.
+        self.emulator.create_table('table2', 'column1')
+        self.assertTrue(await self.connection.table_exists('table2'))
+
+    async def test_02_rows(self):
+        """Test row fetch, store and delete."""
+        self.assertEqual(
+            await self.table.insert('row1', {'column1': {'id': '1'},
+                                             'column2': {'age': '3'}}),
+            200
+        )
+        self.assertEqual(await self.table.fetch('row1'),
+                         {'column1': {'id': '1'}, 'column2': {'age': '3'}})
+        self.assertEqual(await self.table.fetch('row1', ['column2']),
+                         {'column2': {'age': '3'}})
+
+        await self.table.update('row1', {'column1': {'name': 'a'}})
+        self.assertEqual(await self.table.fetch('row1', ['column1']),
+                         {'column1': {'id': '1', 'name': 'a'}})
+
+        # Rows are keyed the way they were requested.
+        await self.table.insert('row2', {'column1': {'id': '2'}})
+        self.assertEqual(
+            await self.table.fetch_many([b'row1', 'row2', b'row3']),
+            {b'row1': await self.table.fetch('row1'),
+             'row2': {'column1': {'id': '2'}}, b'row3': None}
+        )
+
+        await self.table.remove('row1', 'column2')
+        self.assertEqual(await self.table.fetch('row1'),
+                         {'column1': {'id': '1', 'name': 'a'}})
+        await self.table.remove('row1')
+        self.assertEqual(await self.table.fetch('row1'), None)
+
+    async def test_03_scanner(self):
+        """Test scanners and Bloom filters."""
+        await self.insert_rows(50)
+
+        rows = [row async for row in self.table.fetch_all_rows(
+            with_row_id=True, batch_size=10)]
+        self.assertEqual([list(row.keys())[0] for row in rows],
+                         ['row{0:02d}'.format(i) for i in range(50)])
+        self.assertEqual(self.emulator.operations['scanner_next'], 6)
+        self.assertEqual(self.emulator.operations['scanner_close'], 1)
+
+        rows = [row async for row in self.table.fetch_all_rows(
+            start_row='row10', end_row='row20')]
+        self.assertEqual(len(rows), 10)
+
+        bloom_filter = await self.table.build_bloom_filter()
+        self.assertEqual(len(bloom_filter), 50)
+        self.assertTrue(b'row10' in bloom_filter)
+
+    async def test_04_scanner_errors(self):
+        """Test that failed scanner batches are not taken for the end of
+        the scan, nor registered as Bloom filters."""
+        await self.insert_rows(50)
+
+        for fail_silently in (False, True):
+            self.emulator.reset_stats()
+            rows = self.table.fetch_all_rows(with_row_id=True, batch_size=10,
+                                             fail_silently=fail_silently)
+            self.assertEqual(list((await rows.__anext__()).keys()),
+                             ['row00'])
+            # The second batch fails.
+            self.emulator.fail_next(1, status_code=500,
+                                    operation='scanner_next')
+            if fail_silently:
+                self.assertEqual(len([row async for row in rows]), 9)
+            else:
+                with self.assertRaises(HTTPError):
+                    [row async for row in rows]
+            self.assertEqual(self.emulator.operations['scanner_close'], 1)
+
+        self.emulator.fail_next(1, status_code=500, operation='scanner_next')
+        with self.assertRaises(HTTPError):
+            await self.table.build_bloom_filter(batch_size=10,
+                                                fail_silently=False)
+        self.emulator.fail_next(1, status_code=500, operation='scanner_next')
+        self.assertEqual(await self.table.build_bloom_filter(batch_size=10),
+                         None)
+        self.assertEqual(self.connection.bloom_filters, {})
+
+    async def test_05_batch(self):
+        """Test batches sent in concurrent chunks."""
+        batch = await self.table.batch(chunks=4)
+        for i in range(20):
+            await batch.insert('row{0:02d}'.format(i),
+                               {'column1': {'id': str(i)}})
+        response = await batch.commit(finalize=True)
+        self.assertEqual(response['response'], [200] * 4)
+        self.assertEqual(self.emulator.operations['insert'], 4)
+        self.assertEqual(
+            len(await self.table.fetch_many(
+                ['row{0:02d}'.format(i) for i in range(20)])),
+            20
+        )
+        self.assertEqual(await self.table.fetch('row19'),
+                         {'column1': {'id': '19'}})
+
+        # The stack is cleared, failed chunks are reported by ``finalize``.
+        for i in range(20, 40):
+            await batch.insert('row{0:02d}'.format(i),
+                               {'column1': {'id': str(i)}})
+        self.emulator.fail_next(1, status_code=503, operation='insert')
+        with self.assertRaises(HTTPError):
+            await batch.commit(fail_silently=False)
+        self.assertEqual(batch.outgoing(), 0)
+        response = batch.finalize()
+        self.assertEqual(response['response'], [200] * 3)
+        self.assertEqual(len(response['failed']), 1)
+        self.assertTrue(isinstance(response['failed'][0]['response'],
+                                   HTTPError))
+        self.assertEqual(len(response['failed'][0]['rows']), 5)
+        fetched = await self.table.fetch_many(
+            ['row{0:02d}'.format(i) for i in range(40)])
+        self.assertEqual(list(fetched.values()).count(None), 5)
+
+    async def test_06_retries_and_hooks(self):
+        """Test retries of failed requests, and request hooks."""
+        await self.table.insert('row1', {'column1': {'id': '1'}})
+        hook = RecordingHook()
+        self.connection.add_hook(hook)
+        self.connection.retries = 2
+        self.connection.retry_delay = 0
+
+        self.emulator.fail_next(2, status_code=503, operation='fetch')
+        self.assertEqual(await self.table.fetch('row1'),
+                         {'column1': {'id': '1'}})
+        self.assertEqual(hook.operations, [('fetch', 200)])
+        self.assertEqual(self.emulator.operations['fetch'], 3)
+
+        self.emulator.fail_next(3, status_code=503, operation='fetch')
+        with self.assertRaises(HTTPError):
+            await self.table.fetch('row1', fail_silently=False)
+        self.assertEqual(hook.operations[-1], ('fetch', 503))
+
+        self.connection.remove_hook(hook)
+        await self.table.fetch('row1')
+        self.assertEqual(len(hook.operations), 2)
+
+    async def test_07_sync_only(self):
+        """Test that the threaded operations of the synchronous client are
+        not available."""
+        self.assertFalse(isinstance(self.table, Table))
+        self.assertFalse(hasattr(self.table, 'fetch_all_rows_parallel'))
+        with self.assertRaises(AttributeError):
+            self.table._get('row1')
+        with self.assertRaises(NotImplementedError):
+            await self.table.batch(background=True)
+        with self.assertRaises(NotImplementedError):
+            await self.table.batch(flush_interval=1)
+
+
+class AsyncClientProtobufTest(AsyncClientTest):
+    """Asyncio client tests, protobuf content type."""
+    content_type = 'protobuf'
+
+
+if __name__ == '__main__':
+    unittest.main()
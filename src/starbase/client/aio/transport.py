@@ -0,0 +1,104 @@
+__title__ = 'starbase.client.aio.transport'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('AsyncHttpRequest',)
+
+import asyncio
+
+from timeit import default_timer as timer
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from starbase.client.transport import BaseHttpRequest
+
+
+class AsyncHttpRequest(BaseHttpRequest):
+    """Asyncio HTTP request.
+
+    The asyncio counterpart of ``starbase.client.transport.HttpRequest``
+    (request data, hooks, retries and timings are shared, see
+    ``starbase.client.transport.BaseHttpRequest``). Nothing is sent until
+    ``get_response`` is awaited.
+
+    :param starbase.client.aio.connection.AsyncConnection connection:
+    :param str url:
+    :param dict data:
+    :param bool decode_content: If set to True, response content is decoded.
+    :param str method:
+    :param bool fail_silently:
+    :param str content_type: If given, overrides the content type of the
+        connection.
+    :param str operation: Operation name passed to the request hooks.
+    :param callable materialize: If given, turns the content of a successful
+        response into the final result (timed as part of ``decode``).
+    """
+    async def send(self):
+        """Send the request, retrying the transient failures the same way as
+        ``HttpRequest`` does (see ``starbase.client.transport.retry``).
+
+        :return requests.Response:
+        """
+        request_data = self.prepare()
+
+        try:
+            while True:
+                started = timer()
+                try:
+                    self.response = await self.call(self.method, request_data)
+                except Exception as e:
+                    delay = self.attempted(started, error=e)
+                else:
+                    delay = self.attempted(started)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        except Exception as e:
+            self.complete(error=e)
+            raise
+
+        return self.response
+
+    async def call(self, method, request_data):
+        """Send a single request, holding one of the in-flight slots of the
+        connection until the response body is read.
+
+        The response is returned as a ``requests.Response``, so that it's
+        handled exactly like the responses of the synchronous client.
+
+        :param str method:
+        :param dict request_data:
+        :return requests.Response:
+        """
+        session = self.connection.get_session()
+
+        async with self.connection.in_flight:
+            async with session.request(
+                    method,
+                    request_data['url'],
+                    headers=request_data['headers'],
+                    data=request_data.get('data'),
+                    auth=self.connection.auth,
+                    ssl=None if self.connection.verify_ssl else False) \
+                    as response:
+                content = await response.read()
+
+        raw = Response()
+        raw.status_code = response.status
+        raw.reason = response.reason
+        raw.url = str(response.url)
+        raw.headers = CaseInsensitiveDict(response.headers)
+        raw.encoding = response.charset
+        raw._content = content
+        return raw
+
+    async def get_response(self):
+        """Send the request and parse the response.
+
+        :return starbase.client.transport.HttpResponse:
+        """
+        if self.response is None:
+            await self.send()
+
+        return self.finish()
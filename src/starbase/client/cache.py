@@ -0,0 +1,430 @@
+__title__ = 'starbase.client.cache'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('TTLCache', 'LRUCache', 'RowCache', 'BloomFilter', 'estimate_size')
+
+import hashlib
+import math
+import struct
+import threading
+import time
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+from six import binary_type, text_type
+
+class TTLCache(object):
+    """
+    Thread safe in-memory cache. Entries expire ``ttl`` seconds after being set.
+
+    :param float ttl: Number of seconds the entries are valid for. If None, entries never expire. If 0,
+        nothing is cached.
+
+    :example:
+    >>> cache = TTLCache(ttl=10)
+    >>> cache.set('tables', frozenset(['table1']))
+    >>> cache.get('tables')
+    frozenset({'table1'})
+    >>> cache.invalidate('tables')
+    >>> cache.get('tables') is None
+    True
+    """
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<starbase.client.cache.TTLCache (ttl={0}, {1} entries)>".format(self.ttl, len(self))
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def enabled(self):
+        """
+        Tells whether anything is cached.
+
+        :return bool:
+        """
+        return self.ttl is None or self.ttl > 0
+
+    def get(self, key, default=None):
+        """
+        Gets the value cached for the key given.
+
+        :param key:
+        :param default: Returned if nothing (valid) is cached for the key given.
+        :return:
+        """
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Caches the value for the key given.
+
+        :param key:
+        :param value:
+        """
+        if not self.enabled:
+            return
+
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+
+    def invalidate(self, key):
+        """
+        Removes the value cached for the key given (if any).
+
+        :param key:
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all the cached values.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Cache statistics.
+
+        :return dict: Number of hits, misses and entries.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._data)}
+
+
+def estimate_size(value):
+    """
+    Estimates the in-memory size (in bytes) of the value given (strings, numbers and the containers of
+    them). Only meant to be used to bound the caches.
+
+    :param value:
+    :return int:
+    """
+    if isinstance(value, (binary_type, text_type)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(estimate_size(item) for item in value)
+    return 8
+
+
+class LRUCache(object):
+    """
+    Thread safe in-memory LRU cache, bounded by the number of entries and by their (approximate) size in
+    bytes. Entries expire ``ttl`` seconds after being set.
+
+    :param int max_entries: Maximum number of entries. If 0, nothing is cached.
+    :param int max_bytes: If given, maximum (estimated) size of all the entries.
+    :param float ttl: Number of seconds the entries are valid for. If None, entries never expire.
+    """
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<starbase.client.cache.{0} ({1} entries)>".format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def enabled(self):
+        """
+        Tells whether anything is cached.
+
+        :return bool:
+        """
+        return bool(self.max_entries)
+
+    def get(self, key, default=None):
+        """
+        Gets the value cached for the key given, marking it as the most recently used.
+
+        :param key:
+        :param default: Returned if nothing (valid) is cached for the key given.
+        :return:
+        """
+        with self._lock:
+            try:
+                value, size, expires = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires is not None and expires <= time.time():
+                self._removed(key, size)
+                self.misses += 1
+                return default
+
+            self._data[key] = (value, size, expires)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=None):
+        """
+        Caches the value for the key given, evicting the least recently used entries if needed. Values
+        larger than ``max_bytes`` are not cached.
+
+        :param key:
+        :param value:
+        :param int size: Size of the value. Estimated if not given.
+        """
+        if not self.enabled:
+            return
+
+        if size is None:
+            size = estimate_size(value)
+
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            self._set(key, value, size, expires)
+
+    def _set(self, key, value, size, expires):
+        """
+        Caches the value (lock acquired).
+        """
+        if key in self._data:
+            self._removed(key, self._data.pop(key)[1])
+
+        self._data[key] = (value, size, expires)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+            evicted_key = next(iter(self._data))
+            self._removed(evicted_key, self._data.pop(evicted_key)[1])
+            self.evictions += 1
+
+    def _removed(self, key, size):
+        """
+        Bookkeeping of the entries removed (lock acquired).
+        """
+        self._bytes -= size
+
+    def invalidate(self, key):
+        """
+        Removes the value cached for the key given (if any).
+
+        :param key:
+        """
+        with self._lock:
+            if key in self._data:
+                self._removed(key, self._data.pop(key)[1])
+
+    def clear(self):
+        """
+        Removes all the cached values.
+        """
+        with self._lock:
+            for key in list(self._data.keys()):
+                self._removed(key, self._data.pop(key)[1])
+
+    def stats(self):
+        """
+        Cache statistics.
+
+        :return dict: Number of hits, misses, evictions, entries and their estimated size in bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._data),
+                'bytes': self._bytes,
+            }
+
+
+class RowCache(LRUCache):
+    """
+    LRU cache of fetched rows. Keys are tuples of table name, row key and a variant (column projection,
+    versions, etc.), so that all the variants of a row can be invalidated at once.
+
+    Every invalidation bumps the generation of the cache. Values fetched before an invalidation (see
+    ``generation``) are not cached, so that a fetch racing with a write never caches stale data.
+
+    :param int max_entries: Maximum number of rows cached. If 0, nothing is cached.
+    :param int max_bytes: If given, maximum (estimated) size of the rows cached.
+    :param float ttl: Number of seconds the rows are valid for. If None, rows never expire.
+    """
+    def __init__(self, max_entries=1000, max_bytes=None, ttl=None):
+        super(RowCache, self).__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self.generation = 0
+        self._rows = {}
+
+    def set(self, key, value, size=None, generation=None):
+        """
+        Caches the row, unless invalidations happened since the ``generation`` given.
+
+        :param tuple key: Table name, row key and variant.
+        :param value:
+        :param int size:
+        :param int generation: Generation of the cache when the row was requested.
+        """
+        if not self.enabled:
+            return
+
+        if size is None:
+            size = estimate_size(value)
+
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._set(key, value, size, expires)
+            self._rows.setdefault(key[:2], set()).add(key)
+
+    def _removed(self, key, size):
+        super(RowCache, self)._removed(key, size)
+        keys = self._rows.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._rows[key[:2]]
+
+    def invalidate_rows(self, table, rows):
+        """
+        Removes all the cached variants of the rows given.
+
+        :param str table: Table name.
+        :param iterable rows: Row keys.
+        """
+        with self._lock:
+            self.generation += 1
+            for row in rows:
+                for key in list(self._rows.get((table, row), ())):
+                    self._removed(key, self._data.pop(key)[1])
+
+    def clear(self):
+        """
+        Removes all the cached rows.
+        """
+        with self._lock:
+            self.generation += 1
+        super(RowCache, self).clear()
+
+    def invalidate_table(self, table):
+        """
+        Removes all the cached rows of the table given.
+
+        :param str table: Table name.
+        """
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._data if key[0] == table]:
+                self._removed(key, self._data.pop(key)[1])
+
+
+class BloomFilter(object):
+    """
+    Thread safe Bloom filter of (row) keys. Keys not added are reported as absent, unless (with the
+    ``error_rate`` probability, once ``capacity`` keys are added) they collide with the keys added. Keys
+    added are always reported as present.
+
+    :param int capacity: Expected number of keys.
+    :param float error_rate: False positive probability at ``capacity`` keys.
+
+    :example:
+    >>> bloom_filter = BloomFilter(capacity=1000)
+    >>> bloom_filter.add('row1')
+    >>> 'row1' in bloom_filter
+    True
+    >>> 'row2' in bloom_filter
+    False
+    """
+    def __init__(self, capacity=100000, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.number_of_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.number_of_hashes = max(int(round(self.number_of_bits / float(capacity) * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.number_of_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<starbase.client.cache.BloomFilter ({0} keys, {1} bits, {2} hashes)>".format(
+            self.count, self.number_of_bits, self.number_of_hashes
+            )
+
+    def __len__(self):
+        return self.count
+
+    def _positions(self, key):
+        """
+        Bit positions of the key given (double hashing of the MD5 digest of the key).
+
+        :param str|bytes key:
+        :return list:
+        """
+        if not isinstance(key, binary_type):
+            key = text_type(key).encode('utf8')
+        first_hash, second_hash = struct.unpack('>QQ', hashlib.md5(key).digest())
+        return [(first_hash + i * second_hash) % self.number_of_bits for i in range(self.number_of_hashes)]
+
+    def add(self, key):
+        """
+        Adds the key given.
+
+        :param str|bytes key:
+        """
+        positions = self._positions(key)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def update(self, keys):
+        """
+        Adds the keys given.
+
+        :param iterable keys:
+        """
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
@@ -0,0 +1,205 @@
+"""
+Cell value codecs. Codecs turn values into bytes (when writing) and back (when reading), so that values
+are stored compactly and never round-trip through string formatting.
+
+Codecs are registered per table, either for a whole column family ('family') or for a single column
+('family:qualifier'). The latter takes precedence.
+
+>>> from starbase import Connection
+>>> connection = Connection()
+>>> table = connection.table('table1', codecs={'stats': 'int64', 'meta:payload': 'json'})
+>>> table.register_codec('stats:ratio', 'float64')
+>>> table.insert('row1', {'stats': {'views': 12, 'ratio': 0.5}, 'meta': {'payload': {'a': [1, 2]}}})
+>>> table.fetch('row1')
+{'stats': {'views': 12, 'ratio': 0.5}, 'meta': {'payload': {'a': [1, 2]}}}
+"""
+
+__title__ = 'starbase.client.codecs'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('Codec', 'BytesCodec', 'Int64Codec', 'Float64Codec', 'UTF8Codec', 'JSONCodec', 'CODECS',
+           'get_codec', 'CodecRegistry')
+
+import json
+import struct
+
+from six import binary_type, text_type, string_types
+
+from starbase.translations import _
+from starbase.exceptions import ImproperlyConfigured
+
+class Codec(object):
+    """
+    Base codec.
+    """
+    name = None
+
+    def encode(self, value):
+        """
+        Encodes the value given into bytes.
+
+        :param value:
+        :return bytes:
+        """
+        raise NotImplementedError
+
+    def decode(self, data):
+        """
+        Decodes the bytes given into value.
+
+        :param bytes data:
+        :return:
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        return "<starbase.client.codecs.{0}>".format(self.__class__.__name__)
+
+
+class BytesCodec(Codec):
+    """
+    Raw bytes. Text is UTF-8 encoded.
+    """
+    name = 'bytes'
+
+    def encode(self, value):
+        if isinstance(value, text_type):
+            return value.encode('utf8')
+        return binary_type(value)
+
+    def decode(self, data):
+        return data
+
+
+class Int64Codec(Codec):
+    """
+    Signed 64-bit integers, big-endian (same as HBase ``Bytes.toBytes(long)``, so values can be used with
+    HBase counters and filters).
+    """
+    name = 'int64'
+    struct = struct.Struct('>q')
+
+    def encode(self, value):
+        return self.struct.pack(int(value))
+
+    def decode(self, data):
+        return self.struct.unpack(data)[0]
+
+
+class Float64Codec(Codec):
+    """
+    IEEE 754 double precision floats, big-endian (same as HBase ``Bytes.toBytes(double)``).
+    """
+    name = 'float64'
+    struct = struct.Struct('>d')
+
+    def encode(self, value):
+        return self.struct.pack(float(value))
+
+    def decode(self, data):
+        return self.struct.unpack(data)[0]
+
+
+class UTF8Codec(Codec):
+    """
+    UTF-8 encoded text.
+    """
+    name = 'utf8'
+
+    def encode(self, value):
+        if isinstance(value, binary_type):
+            return value
+        return text_type(value).encode('utf8')
+
+    def decode(self, data):
+        return data.decode('utf8')
+
+
+class JSONCodec(Codec):
+    """
+    Any JSON serializable value, as UTF-8 encoded JSON.
+    """
+    name = 'json'
+
+    def encode(self, value):
+        return json.dumps(value, separators=(',', ':')).encode('utf8')
+
+    def decode(self, data):
+        return json.loads(data.decode('utf8'))
+
+
+CODECS = dict((codec.name, codec()) for codec in (BytesCodec, Int64Codec, Float64Codec, UTF8Codec, JSONCodec))
+
+def get_codec(codec):
+    """
+    Gets the codec instance.
+
+    :param str|starbase.client.codecs.Codec codec: Codec name (one of the ``CODECS`` keys) or instance.
+    :return starbase.client.codecs.Codec:
+    """
+    if isinstance(codec, Codec):
+        return codec
+
+    if isinstance(codec, string_types) and codec in CODECS:
+        return CODECS[codec]
+
+    raise ImproperlyConfigured(_("Invalid codec {0}.".format(codec)))
+
+
+class CodecRegistry(object):
+    """
+    Codecs registered for the columns of a table.
+
+    :param dict codecs: Codecs (names or instances) keyed by column family ('family') or column
+        ('family:qualifier').
+    """
+    def __init__(self, codecs=None):
+        self._columns = {}
+        self._families = {}
+        for column, codec in (codecs or {}).items():
+            self.register(column, codec)
+
+    def register(self, column, codec):
+        """
+        Registers a codec.
+
+        :param str column: Column family ('family') or column ('family:qualifier').
+        :param str|starbase.client.codecs.Codec codec:
+        """
+        codec = get_codec(codec)
+        if ':' in column:
+            self._columns[column] = codec
+        else:
+            self._families[column] = codec
+
+    def unregister(self, column):
+        """
+        Removes the codec registered for the column family or column given.
+
+        :param str column: Column family ('family') or column ('family:qualifier').
+        """
+        self._columns.pop(column, None)
+        self._families.pop(column, None)
+
+    def get(self, column_family, qualifier):
+        """
+        Gets the codec of the column given (if any).
+
+        :param str column_family:
+        :param str qualifier:
+        :return starbase.client.codecs.Codec:
+        """
+        if self._columns:
+            codec = self._columns.get('{0}:{1}'.format(column_family, qualifier))
+            if codec is not None:
+                return codec
+        return self._families.get(column_family)
+
+    def __len__(self):
+        return len(self._columns) + len(self._families)
+
+    def __repr__(self):
+        codecs = dict(self._families)
+        codecs.update(self._columns)
+        return "<starbase.client.codecs.CodecRegistry {0}>".format(codecs)
@@ -4,16 +4,28 @@ __copyright__ = 'Copyright (c) 2013 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
 __all__ = ('Connection',)
 
+from requests.auth import HTTPBasicAuth
+
 from starbase.translations import _
 from starbase.exceptions import ImproperlyConfigured, DoesNotExist
 from starbase.content_types import (
-    CONTENT_TYPES_DICT, CONTENT_TYPES, DEFAULT_CONTENT_TYPE
+    CONTENT_TYPES_DICT, CONTENT_TYPES, DEFAULT_CONTENT_TYPE, CONTENT_TYPE_JSON
 )
 from starbase.defaults import (
-    HOST, PORT, USER, PASSWORD, PERFECT_DICT, RETRIES, RETRY_DELAY
+    HOST, PORT, USER, PASSWORD, PERFECT_DICT, RETRIES, RETRY_DELAY,
+    POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, POOL_IDLE_TIMEOUT, POOL_PREWARM,
+    COMPRESSION_THRESHOLD, COMPRESSION_LEVEL, TABLES_CACHE_TTL, SCHEMA_CACHE_TTL,
+    ROW_CACHE_SIZE, ROW_CACHE_MAX_BYTES, ROW_CACHE_TTL, MISSING_ROWS_CACHE_SIZE, MISSING_ROWS_CACHE_TTL
 )
 from starbase.client.table import Table
 from starbase.client.transport import HttpRequest
+from starbase.client.transport.pool import ConnectionPool
+from starbase.client.transport.retry import RetryPolicy
+from starbase.client.cache import TTLCache, RowCache
+from starbase.client.metrics import MetricsRegistry
+
+# Key of the table names in the tables cache
+TABLES_CACHE_KEY = 'tables'
 
 class Connection(object):
     """
@@ -28,15 +40,58 @@ class Connection(object):
     :param bool secure: If set to True, HTTPS is used; otherwise - HTTP. Default value is False.
     :param bool verify_ssl: If set to False, HTTPS certs that are self signed will be accepted
     :param str content_type: Content type for data wrapping when communicating with the
-        Stargate. Possible options are: json.
+        Stargate. Possible options are: json, protobuf.
     :param bool perfect_dict: Global setting. If set to True, generally data will be returned as
         perfect dict.
-    :param int retries: Number of times to retry a failed request.
-    :param int retry_delay: Delay between retrying a failed request.
+    :param int retries: Number of times to retry a failed request (transient failures only, see
+        `starbase.client.transport.retry`).
+    :param int retry_delay: Delay cap (in seconds) of the first retry of a failed request. Doubles with each
+        retry.
+    :param int pool_connections: Number of per-host connection pools to cache.
+    :param int pool_maxsize: Maximum number of keep-alive connections per host.
+    :param bool pool_block: If set to True, requests wait for a free pooled connection instead of
+        opening extra ones.
+    :param float pool_idle_timeout: If given, each pooled connection idle for longer than that number of
+        seconds is closed (before the next request is made). Other connections are left open.
+    :param int pool_prewarm: Number of connections to open right away.
+    :param bool compression: If set to True, request bodies larger than ``compression_threshold`` bytes
+        are gzip compressed and gzip compressed responses are asked for.
+    :param int compression_threshold: Minimum size (in bytes) of the request bodies to compress.
+    :param int compression_level: Gzip compression level (1 - fastest, 9 - smallest).
+    :param float tables_cache_ttl: Number of seconds the table list used by the table existence checks is
+        cached for. Invalidated when tables are created or dropped through the connection. If set to 0,
+        nothing is cached; if set to None, the table list is cached until invalidated.
+    :param float schema_cache_ttl: Number of seconds the table schemas are cached for (per table).
+        Invalidated when the schema is changed through the connection. If set to 0, nothing is cached; if
+        set to None, schemas are cached until invalidated.
+    :param int row_cache_size: If given, maximum number of rows cached by `Table.fetch` (LRU). Rows
+        written or removed through the connection are invalidated. Disabled by default.
+    :param int row_cache_max_bytes: If given, maximum (estimated) size in bytes of the rows cached.
+    :param float row_cache_ttl: Number of seconds the rows are cached for. If set to None, rows are
+        cached until evicted or invalidated.
+    :param int missing_rows_cache_size: If given, maximum number of absent rows remembered by `Table.fetch`
+        (fetches of them return None without a request). Rows written through the connection are
+        forgotten. Disabled by default.
+    :param float missing_rows_cache_ttl: Number of seconds the absent rows are remembered for.
+    :param list hooks: Request hooks, called before and after each request (see
+        `starbase.client.transport.hooks`).
+    :param bool|starbase.client.metrics.MetricsRegistry metrics: If set to True, request metrics are
+        collected into a new `starbase.client.metrics.MetricsRegistry` (see the `metrics` attribute). A
+        registry instance can be given as well (to share it between connections).
+    :param starbase.client.transport.retry.RetryPolicy retry_policy: Retry policy of the failed requests.
+        If given, ``retries`` and ``retry_delay`` are ignored.
     """
     def __init__(self, host=HOST, port=PORT, url=None, user=USER, password=PASSWORD, secure=False, \
                  verify_ssl=True, content_type=DEFAULT_CONTENT_TYPE, perfect_dict=PERFECT_DICT,
-                 retries=RETRIES, retry_delay=RETRY_DELAY):
+                 retries=RETRIES, retry_delay=RETRY_DELAY, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK,
+                 pool_idle_timeout=POOL_IDLE_TIMEOUT, pool_prewarm=POOL_PREWARM, compression=False,
+                 compression_threshold=COMPRESSION_THRESHOLD, compression_level=COMPRESSION_LEVEL,
+                 tables_cache_ttl=TABLES_CACHE_TTL, schema_cache_ttl=SCHEMA_CACHE_TTL,
+                 row_cache_size=ROW_CACHE_SIZE, row_cache_max_bytes=ROW_CACHE_MAX_BYTES,
+                 row_cache_ttl=ROW_CACHE_TTL, missing_rows_cache_size=MISSING_ROWS_CACHE_SIZE,
+                 missing_rows_cache_ttl=MISSING_ROWS_CACHE_TTL, hooks=None, metrics=False,
+                 retry_policy=None):
         """
         Creates a new connection instance.
 
@@ -59,10 +114,34 @@ class Connection(object):
         self.verify_ssl = verify_ssl
         self.content_type = CONTENT_TYPES_DICT[content_type]
         self.perfect_dict = perfect_dict
-        self.retries = retries
-        self.retry_delay = retry_delay
+        self.retry_policy = retry_policy or RetryPolicy(retries=retries, base_delay=retry_delay)
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.tables_cache = TTLCache(tables_cache_ttl)
+        self.schema_cache = TTLCache(schema_cache_ttl)
+        self.row_cache = RowCache(max_entries=row_cache_size, max_bytes=row_cache_max_bytes,
+                                  ttl=row_cache_ttl)
+        self.missing_rows_cache = RowCache(max_entries=missing_rows_cache_size, ttl=missing_rows_cache_ttl)
+        # Row key Bloom filters (see `Table.build_bloom_filter`), keyed by table name.
+        self.bloom_filters = {}
+        # Rows written while Bloom filters are being built, keyed by table name.
+        self.bloom_filter_writes = {}
+        self.hooks = list(hooks or [])
+        self.metrics = MetricsRegistry() if metrics is True else (metrics or None)
+        if self.metrics is not None:
+            self.hooks.append(self.metrics)
+        self.pool = ConnectionPool(
+            pool_connections = pool_connections,
+            pool_maxsize = pool_maxsize,
+            pool_block = pool_block,
+            idle_timeout = pool_idle_timeout
+            )
         self.__connect(url)
 
+        if pool_prewarm:
+            self.prewarm(pool_prewarm)
+
     def __repr__(self):
         return "<starbase.client.connection.Connection ({0}:{1})>".format(self.host, self.port)
 
@@ -77,6 +156,94 @@ class Connection(object):
             }
             self.base_url = 'http{secure}://{host}:{port}/'.format(**data)
 
+    def __enter__(self):
+        return self
+
+    @property
+    def retries(self):
+        """
+        Number of times to retry a failed request (see ``retry_policy``).
+
+        :return int:
+        """
+        return self.retry_policy.retries
+
+    @retries.setter
+    def retries(self, value):
+        self.retry_policy.retries = value
+
+    @property
+    def retry_delay(self):
+        """
+        Delay cap (in seconds) of the first retry of a failed request (see ``retry_policy``).
+
+        :return float:
+        """
+        return self.retry_policy.base_delay
+
+    @retry_delay.setter
+    def retry_delay(self, value):
+        self.retry_policy.base_delay = value
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def prewarm(self, number_of_connections):
+        """
+        Opens given number of keep-alive connections to the Stargate, so that the first requests do not
+        pay for the TCP (and TLS) handshake.
+
+        :param int number_of_connections:
+        """
+        request_data = {'verify': self.verify_ssl}
+        if self.user and self.password:
+            request_data['auth'] = HTTPBasicAuth(self.user, self.password)
+        self.pool.prewarm(self.base_url + 'version', number_of_connections, **request_data)
+
+    def add_hook(self, hook):
+        """
+        Registers a request hook.
+
+        :param starbase.client.transport.hooks.RequestHook hook:
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Unregisters the request hook given.
+
+        :param starbase.client.transport.hooks.RequestHook hook:
+        """
+        if hook in self.hooks:
+            self.hooks.remove(hook)
+
+    def cache_stats(self):
+        """
+        Statistics of the caches of the connection.
+
+        :return dict: Statistics (see ``stats`` method of the caches) keyed by cache name.
+        """
+        return {
+            'tables': self.tables_cache.stats(),
+            'schema': self.schema_cache.stats(),
+            'rows': self.row_cache.stats(),
+            'missing_rows': self.missing_rows_cache.stats(),
+        }
+
+    def pool_stats(self):
+        """
+        Connection pool statistics.
+
+        :return dict: See `starbase.client.transport.pool.ConnectionPool.stats`.
+        """
+        return self.pool.stats()
+
+    def close(self):
+        """
+        Closes all pooled connections.
+        """
+        self.pool.close()
+
     @property
     def version(self, fail_silently=True):
         """
@@ -97,7 +264,8 @@ class Connection(object):
         :param bool fail_silently:
         :return str: HBase version.
         """
-        response = HttpRequest(connection=self, url='version/cluster', fail_silently=fail_silently).get_response()
+        response = HttpRequest(connection=self, url='version/cluster', fail_silently=fail_silently,
+                               content_type=CONTENT_TYPE_JSON).get_response()
         return response.content
 
     @property
@@ -108,14 +276,17 @@ class Connection(object):
         :param bool fail_silently:
         :return dict: Dictionary with information on dead nodes, live nodes, average load, regions, etc.
         """
-        response = HttpRequest(connection=self, url='status/cluster', fail_silently=fail_silently).get_response()
+        response = HttpRequest(connection=self, url='status/cluster', fail_silently=fail_silently,
+                               content_type=CONTENT_TYPE_JSON).get_response()
         return response.content
 
-    def table(self, name):
+    def table(self, name, codecs=None):
         """
         Initializes a table instance to work with.
 
         :param str name: Table name. Example value 'test'.
+        :param dict codecs: Cell value codecs keyed by column family or column. See
+            `starbase.client.codecs`.
         :return stargate.base.Table:
 
         This method does not check if table exists. Use the following methods to perform the
@@ -124,11 +295,11 @@ class Connection(object):
             - `starbase.client.Connection.table_exists` or
             - `starbase.client.table.Table.exists`.
         """
-        return Table(connection=self, name=name)
+        return Table(connection=self, name=name, codecs=codecs)
 
     def tables(self, raw=False, fail_silently=True):
         """
-        Table list. Retrieves the list of available tables.
+        Table list. Retrieves the list of available tables (always requested, refreshes the tables cache).
 
         :param bool raw: If set to True raw result (JSON) is returned.
         :param bool fail_silently:
@@ -137,20 +308,33 @@ class Connection(object):
         response = HttpRequest(connection=self, fail_silently=fail_silently).get_response()
         if not raw:
             try:
-                return [table['name'] for table in response.content['table']]
+                tables = [table['name'] for table in response.content['table']]
             except:
                 return []
+            self.tables_cache.set(TABLES_CACHE_KEY, frozenset(tables))
+            return tables
         return response.content
 
+    def invalidate_tables_cache(self):
+        """
+        Invalidates the cached table list (see ``tables_cache_ttl``).
+        """
+        self.tables_cache.invalidate(TABLES_CACHE_KEY)
+
     def table_exists(self, name, fail_silently=True):
         """
-        Checks if table exists.
+        Checks if table exists. Uses the cached table list, unless expired. Tables missing from the cached list
+        are looked up once more in a freshly requested one.
 
         :param str name: Table name.
         :param bool fail_silently:
         :return bool:
         """
-        table_exists = name in self.tables()
+        tables = self.tables_cache.get(TABLES_CACHE_KEY)
+        table_exists = tables is not None and name in tables
+
+        if not table_exists:
+            table_exists = name in self.tables()
 
         if not table_exists and not fail_silently:
             raise DoesNotExist("Table `{0}` does not exist!".format(name))
@@ -6,7 +6,7 @@ __all__ = ('build_json_data',)
 
 import base64
 
-from six import PY3
+from six import PY3, binary_type
 
 # Importing OrderedDict with fallback to separate package for Python 2.6 support.
 try:
@@ -14,7 +14,43 @@ try:
 except ImportError as e:
     from ordereddict import OrderedDict
 
-def build_json_data(row, columns, timestamp=None, encode_content=False, with_row_declaration=True):
+def _encode_cell(column, value, encode_content=False, codecs=None):
+    """
+    Encodes the column name and the value of a single cell.
+
+    If a codec is registered for the column, value is encoded with it. Otherwise, bytes are kept as is
+    and anything else is converted to string.
+
+    :param str column: Column ('family:qualifier').
+    :param value:
+    :param bool encode_content: If set to True, column and value are base64 encoded.
+    :param starbase.client.codecs.CodecRegistry codecs:
+    :return tuple: Column and value.
+    """
+    codec = None
+    if codecs:
+        column_family, _sep, qualifier = column.partition(':')
+        codec = codecs.get(column_family, qualifier)
+
+    if codec is not None:
+        value = codec.encode(value)
+
+    if encode_content:
+        if not isinstance(value, binary_type):
+            value = str(value)
+            if PY3:
+                value = value.encode('utf8')
+        if PY3:
+            column = base64.b64encode(column.encode('utf8')).decode('utf8')
+            value = base64.b64encode(value).decode('utf8')
+        else:
+            column = base64.b64encode(column)
+            value = base64.b64encode(value)
+
+    return column, value
+
+def build_json_data(row, columns, timestamp=None, encode_content=False, with_row_declaration=True,
+                    codecs=None):
     """
     Builds JSON data for read-write purposes. Used in `starbase.client.Table._build_table_data`.
 
@@ -23,90 +59,48 @@ def build_json_data(row, columns, timestamp=None, encode_content=False, with_row
     :param timestamp: Not yet used.
     :param bool encode_content:
     :param bool with_row_declaration:
+    :param starbase.client.codecs.CodecRegistry codecs: Codecs to encode the values with.
     :return dict:
     """
     # Encoding the key if necessary
     if encode_content:
         if PY3:
-            row = base64.b64encode(row.encode('utf8')).decode('utf8')
+            if not isinstance(row, bytes):
+                row = row.encode('utf8')
+            row = base64.b64encode(row).decode('utf8')
         else:
             row = base64.b64encode(row)
 
     cell = []
 
-    columns_keys = [k for k, v in columns.items()]
-
     # Building table data dictionary.
     if columns:
-        # Data structure #1
+        columns_keys = list(columns.keys())
+
+        # Data structure #1 (single or multiple columns)
         if ':' in columns_keys[0]:
-            # Single column case
-            if 1 == len(columns):
-                key, value = list(columns.items())[0]
-
-                if encode_content:
-                    if PY3:
-                        key = base64.b64encode(key.encode('utf8')).decode('utf8')
-                        value = base64.b64encode(str(value).encode('utf8')).decode('utf8')
-                    else:
-                        key = base64.b64encode(key)
-                        value = base64.b64encode(str(value))
-
-                cell_data = {
-                    "column": key,
-                    "$": value
-                }
-                if timestamp:
-                    cell_data.update({'timestamp': timestamp})
-
-                cell.append(cell_data)
-
-            # Multi-column case
-            else:
-                for column in columns.items():
-                    key, value = column
-
-                    if encode_content:
-                        if PY3:
-                            key = base64.b64encode(key.encode('utf8')).decode('utf8')
-                            value = base64.b64encode(str(value).encode('utf8')).decode('utf8')
-                        else:
-                            key = base64.b64encode(key)
-                            value = base64.b64encode(str(value))
-
-                    cell_data = {
-                        "column": key,
-                        "$": value
-                    }
-
-                    if timestamp:
-                        cell_data.update({'timestamp': timestamp})
-
-                    cell.append(cell_data)
+            items = columns.items()
 
         # Data structure #2. Here we have multi-column cases only and you're advised to make profit of it.
         else:
-            for column, data in columns.items():
-                for key, value in data.items():
-                    column_family = '{0}:{1}'.format(column, key)
-
-                    if encode_content:
-                        if PY3:
-                            column_family = base64.b64encode(column_family.encode('utf8')).decode('utf8')
-                            value = base64.b64encode(str(value).encode('utf8')).decode('utf8')
-                        else:
-                            column_family = base64.b64encode(column_family)
-                            value = base64.b64encode(str(value))
-
-                    cell_data = {
-                        "column": column_family,
-                        "$": value
-                    }
-
-                    if timestamp:
-                        cell_data.update({'timestamp': timestamp})
-
-                    cell.append(cell_data)
+            items = (
+                ('{0}:{1}'.format(column, key), value)
+                for column, data in columns.items()
+                for key, value in data.items()
+            )
+
+        for key, value in items:
+            key, value = _encode_cell(key, value, encode_content=encode_content, codecs=codecs)
+
+            cell_data = {
+                "column": key,
+                "$": value
+            }
+
+            if timestamp:
+                cell_data.update({'timestamp': timestamp})
+
+            cell.append(cell_data)
 
     table_data = OrderedDict([
         ("key", row),
@@ -0,0 +1,292 @@
+"""
+In-process request metrics. ``MetricsRegistry`` is a request hook (see ``starbase.client.transport.hooks``)
+keeping, per table and operation, the number of requests, errors, retries, bytes sent and received and a
+latency histogram. Metrics can be rendered in the Prometheus text exposition format.
+
+>>> from starbase import Connection
+>>> connection = Connection(metrics=True)
+>>> connection.table('table1').fetch('row1')
+>>> connection.metrics.snapshot()['table1']['fetch']['latency']['p99']
+0.0021
+>>> print(connection.metrics.render_prometheus())
+"""
+
+__title__ = 'starbase.client.metrics'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('Histogram', 'OperationMetrics', 'MetricsRegistry')
+
+import math
+import threading
+
+from starbase.client.transport import status_codes
+from starbase.client.transport.hooks import RequestHook
+
+# Quantiles reported in snapshots and in the Prometheus output.
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram(object):
+    """
+    HDR style histogram of durations. Values are recorded in microseconds into log-linear buckets: exact
+    below ``2 ** precision`` microseconds and within a ``1 / 2 ** (precision - 1)`` relative error above,
+    so that the memory used does not depend on the number of values recorded. Not thread safe.
+
+    :param int precision: Number of significant bits of the bucketed values.
+
+    :example:
+    >>> histogram = Histogram()
+    >>> histogram.record(0.0015)
+    >>> histogram.percentile(99)
+    0.0015
+    """
+    def __init__(self, precision=7):
+        self.precision = precision
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._half = 1 << (precision - 1)
+        self._buckets = {}
+
+    def __repr__(self):
+        return "<starbase.client.metrics.Histogram ({0} values)>".format(self.count)
+
+    def _index(self, value):
+        """
+        Bucket index of the value (in microseconds) given.
+
+        :param int value:
+        :return int:
+        """
+        shift = max(value.bit_length() - self.precision, 0)
+        return (shift * self._half) + (value >> shift)
+
+    def _value(self, index):
+        """
+        Highest value (in microseconds) of the bucket given.
+
+        :param int index:
+        :return int:
+        """
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return ((index - shift * self._half + 1) << shift) - 1
+
+    def record(self, seconds):
+        """
+        Records a duration.
+
+        :param float seconds:
+        """
+        index = self._index(max(int(seconds * 1000000), 0))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percentile):
+        """
+        Gets the duration below which the percentage of the values given falls.
+
+        :param float percentile: 0 - 100.
+        :return float: Seconds (None if nothing has been recorded).
+        """
+        if not self.count:
+            return None
+
+        rank = max(int(math.ceil(percentile / 100.0 * self.count)), 1)
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                # Never report more than the maximum recorded.
+                return min(self._value(index) / 1000000.0, self.max)
+        return self.max
+
+    def snapshot(self):
+        """
+        Histogram summary.
+
+        :return dict: Count, sum, min, max, mean and the p50, p95 and p99 values (in seconds).
+        """
+        snapshot = {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+        }
+        for quantile in QUANTILES:
+            snapshot['p{0:g}'.format(quantile * 100)] = self.percentile(quantile * 100)
+        return snapshot
+
+
+class OperationMetrics(object):
+    """
+    Metrics of a single operation on a single table. Not thread safe.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.latency = Histogram()
+
+    def __repr__(self):
+        return "<starbase.client.metrics.OperationMetrics ({0} requests)>".format(self.requests)
+
+    def record(self, info):
+        """
+        Records the request given.
+
+        :param starbase.client.transport.hooks.RequestInfo info:
+        """
+        self.requests += 1
+        self.retries += info.retries
+        self.request_bytes += info.request_bytes
+        self.response_bytes += info.response_bytes
+        self.latency.record(info.duration)
+        if MetricsRegistry.is_error(info):
+            self.errors += 1
+
+    def snapshot(self):
+        """
+        :return dict:
+        """
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'latency': self.latency.snapshot(),
+        }
+
+
+class MetricsRegistry(RequestHook):
+    """
+    Thread safe registry of the request metrics, per table and operation (see
+    ``starbase.client.transport.hooks.operation_name``). Register it as a request hook of one or more
+    connections (or pass ``metrics=True`` to the connection).
+
+    :param str prefix: Prefix of the Prometheus metric names.
+    """
+    def __init__(self, prefix='starbase'):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<starbase.client.metrics.MetricsRegistry ({0} operations)>".format(len(self._metrics))
+
+    @staticmethod
+    def is_error(info):
+        """
+        Tells whether the request given failed: it raised an exception or Stargate responded with an error
+        status code (404, meaning a missing row or table, is not counted as an error).
+
+        :param starbase.client.transport.hooks.RequestInfo info:
+        :return bool:
+        """
+        if info.error is not None:
+            return True
+        return info.status_code is not None and info.status_code in status_codes.BAD_STATUS_CODES \
+            and status_codes.STATUS_CODE_NOT_FOUND != info.status_code
+
+    def after_request(self, info):
+        """
+        Records the request given.
+
+        :param starbase.client.transport.hooks.RequestInfo info:
+        """
+        key = (info.table or '', info.operation)
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = self._metrics[key] = OperationMetrics()
+            metrics.record(info)
+
+    def reset(self):
+        """
+        Removes all the metrics collected.
+        """
+        with self._lock:
+            self._metrics = {}
+
+    def snapshot(self):
+        """
+        Metrics collected so far.
+
+        :return dict: ``{table: {operation: metrics}}`` (see ``OperationMetrics.snapshot``). Requests not
+            bound to a table are found under the empty table name.
+        """
+        snapshot = {}
+        with self._lock:
+            for (table, operation), metrics in self._metrics.items():
+                snapshot.setdefault(table, {})[operation] = metrics.snapshot()
+        return snapshot
+
+    def render_prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format: counters of requests, errors,
+        retries and bytes, and latency summaries (p50, p95 and p99).
+
+        :return str:
+        """
+        with self._lock:
+            items = sorted((key, metrics.snapshot()) for key, metrics in self._metrics.items())
+
+        counters = (
+            ('requests_total', 'requests', "Number of requests sent."),
+            ('request_errors_total', 'errors', "Number of failed requests."),
+            ('request_retries_total', 'retries', "Number of request retries."),
+            ('request_bytes_total', 'request_bytes', "Number of request body bytes sent."),
+            ('response_bytes_total', 'response_bytes', "Number of response body bytes received."),
+        )
+
+        lines = []
+        for name, field, help_text in counters:
+            name = '{0}_{1}'.format(self.prefix, name)
+            lines.append('# HELP {0} {1}'.format(name, help_text))
+            lines.append('# TYPE {0} counter'.format(name))
+            for (table, operation), snapshot in items:
+                lines.append('{0}{{{1}}} {2}'.format(name, _labels(table, operation), snapshot[field]))
+
+        name = '{0}_request_duration_seconds'.format(self.prefix)
+        lines.append('# HELP {0} Request duration.'.format(name))
+        lines.append('# TYPE {0} summary'.format(name))
+        for (table, operation), snapshot in items:
+            latency = snapshot['latency']
+            labels = _labels(table, operation)
+            for quantile in QUANTILES:
+                lines.append('{0}{{{1},quantile="{2:g}"}} {3!r}'.format(
+                    name, labels, quantile, latency['p{0:g}'.format(quantile * 100)]
+                    ))
+            lines.append('{0}_sum{{{1}}} {2!r}'.format(name, labels, latency['sum']))
+            lines.append('{0}_count{{{1}}} {2}'.format(name, labels, latency['count']))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    """
+    Escapes the Prometheus label value given.
+
+    :param str value:
+    :return str:
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(table, operation):
+    """
+    Renders the Prometheus labels of the table and operation given.
+
+    :return str:
+    """
+    return 'table="{0}",operation="{1}"'.format(_escape(table), _escape(operation))
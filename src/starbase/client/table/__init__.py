@@ -1,20 +1,36 @@
 import base64
+import binascii
+import copy
 
 import logging
+import threading
+import xml.etree.ElementTree as ElementTree
 
-from six import string_types, PY3
+from concurrent.futures import ThreadPoolExecutor
+
+from six import string_types, text_type, PY3
+from six.moves import queue
+from six.moves.urllib.parse import quote
 
 from requests.models import HTTPError
 
 from starbase.translations import _
 from starbase.exceptions import InvalidArguments, ParseError, DoesNotExist, IntegrityError
-from starbase.content_types import DEFAULT_CONTENT_TYPE
-from starbase.defaults import PERFECT_DICT
+from starbase.content_types import DEFAULT_CONTENT_TYPE, MEDIA_TYPE_PROTOBUF
+from starbase.defaults import (
+    PERFECT_DICT, PARALLELISM, SCAN_BUFFER_SIZE, MAX_URL_LENGTH,
+    BATCH_FLUSH_INTERVAL, BATCH_MAX_PENDING, BATCH_MAX_PENDING_BYTES, BATCH_FLUSHERS, BLOOM_FILTER_ERROR_RATE
+)
 from starbase.client.transport import HttpRequest
 from starbase.client.transport.methods import GET, PUT, POST, DELETE
+from starbase.client.transport import status_codes
 from starbase.client.table.scanner import Scanner
-from starbase.client.table.batch import Batch
+from starbase.client.table.batch import Batch, BackgroundBatch
+from starbase.client.table.columnar import ColumnarResult
 from starbase.client.helpers import build_json_data
+from starbase.json_decoder import decode_value
+from starbase.client.codecs import CodecRegistry
+from starbase.client.cache import BloomFilter
 
 logger = logging.getLogger(__name__)
 
@@ -22,30 +38,62 @@ __title__ = 'starbase.client.table.__init__'
 __author__ = 'Artur Barseghyan'
 __copyright__ = '2013-2016 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
-__all__ = ('Table',)
+__all__ = ('BaseTable', 'Table')
+
+# Scanner filter returning the row keys only (the first cell of each row, with no value).
+KEY_ONLY_FILTER = '{"type": "FilterList", "op": "MUST_PASS_ALL", "filters": [' \
+                  '{"type": "FirstKeyOnlyFilter"}, {"type": "KeyOnlyFilter"}]}'
 
 
-class Table(object):
-    """For HBase table operations.
+class BaseTable(object):
+    """
+    Base HBase table, shared by the synchronous (``Table``) and the asyncio
+    (``starbase.client.aio.table.AsyncTable``) tables: URL and request data builders, response parsing
+    and the row, schema and Bloom filter caches bookkeeping. Subclasses do the requests.
 
     :param stargate.base.Connection connection: Connection instance.
     :param str name: Table name.
+    :param dict codecs: Cell value codecs (see ``starbase.client.codecs``)
+        keyed by column family ('family') or column ('family:qualifier').
     """
     FALSE_ROW_KEY = 'false-row-key'
 
-    def __init__(self, connection, name):
+    def __init__(self, connection, name, codecs=None):
         """Creates a new table instance.
 
         See docs above.
         """
         self.connection = connection
         self.name = name
+        self.codecs = CodecRegistry(codecs)
         self.enable_if_exists_checks()
 
-    def __repr__(self):
-        """Repr."""
-        return "<starbase.client.table.Table " \
-               "({0})> on {1}".format(self.name, self.connection)
+    def register_codec(self, column, codec):
+        """Registers a cell value codec.
+
+        Values of the column (family) given are encoded with the codec on
+        writes and decoded with it on reads.
+
+        :param str column: Column family ('family') or column
+            ('family:qualifier'). The latter takes precedence.
+        :param str|starbase.client.codecs.Codec codec: Codec name ('bytes',
+            'int64', 'float64', 'utf8' or 'json') or instance.
+
+        :example:
+        >>> table.register_codec('stats', 'int64')
+        >>> table.register_codec('meta:payload', 'json')
+        """
+        self.codecs.register(column, codec)
+
+    @property
+    def _base64_encoded(self):
+        """Whether row keys, columns and values are base64 encoded on the wire.
+
+        They are with JSON, but not with protobuf.
+
+        :return bool:
+        """
+        return self.connection.content_type != MEDIA_TYPE_PROTOBUF
 
     @staticmethod
     def _extract_usable_data(data, with_row_id=False,
@@ -197,6 +245,86 @@ class Table(object):
 
         return result
 
+    @staticmethod
+    def _materialize_row(row_data, with_row_id=False,
+                         perfect_dict=PERFECT_DICT, decode=True, codecs=None):
+        """Turn a raw Stargate row straight into the final row data.
+
+        Does what ``starbase.json_decoder.decode_row`` followed by
+        ``_extract_row_data`` does, but in a single traversal of the cells,
+        without building the intermediate decoded row.
+
+        As with ``_extract_cell_data``, in perfect dict mode the first value
+        of a column wins (any other is logged as an error), while otherwise
+        the last one does.
+
+        :param dict row_data: Row, as found in the ``Row`` list of the
+            Stargate response.
+        :param bool with_row_id: If set to True, row data is returned keyed
+            by the row id.
+        :param bool perfect_dict: If set to True, returns a perfect dict.
+        :param bool decode: If set to True, row key, columns and values are
+            base64 decoded (JSON). Protobuf rows come already decoded.
+        :param starbase.client.codecs.CodecRegistry codecs: Codecs to decode
+            the values with.
+        :return dict:
+        """
+        cells = row_data['Cell']
+        if isinstance(cells, dict):
+            cells = [cells]
+
+        key = row_data['key']
+        if decode:
+            key = decode_value(key)
+
+        result = {}
+
+        for cell in cells:
+            column = cell['column']
+            value = cell['$']
+
+            if decode:
+                column = decode_value(column)
+            elif PY3 and isinstance(column, bytes):
+                column = column.decode('utf8')
+
+            codec = None
+            if codecs or perfect_dict:
+                column_family, _sep, qualifier = column.partition(':')
+                if codecs:
+                    codec = codecs.get(column_family, qualifier)
+
+            if codec is not None:
+                if decode:
+                    value = binascii.a2b_base64(value)
+                elif not isinstance(value, bytes):
+                    # Protobuf values are given as text, if valid UTF-8.
+                    value = value.encode('utf8')
+                value = codec.decode(value)
+            elif decode:
+                value = decode_value(value)
+
+            if not perfect_dict:
+                result[column] = value
+                continue
+
+            family_data = result.get(column_family)
+
+            if family_data is None:
+                result[column_family] = {qualifier: value}
+            elif qualifier in family_data:
+                logger.error(
+                    _("Was just about to lose overlapping data for key{0} "
+                      "{1}:{2}").format('', column_family, qualifier)
+                )
+            else:
+                family_data[qualifier] = value
+
+        if with_row_id:
+            return {key: result}
+
+        return result
+
     def _build_url_parts(self, columns):
         """Build part of the URL based on the column family data.
 
@@ -252,10 +380,595 @@ class Table(object):
 
         :return dict:
         """
+        # Protobuf messages carry raw bytes, no base64 encoding needed.
+        if not self._base64_encoded:
+            encode_content = False
+
         return build_json_data(row, columns, timestamp=timestamp,
                                encode_content=encode_content,
+                               codecs=self.codecs or None,
                                with_row_declaration=with_row_declaration)
 
+    def _build_get_url(self, row, columns=None, timestamp=None,
+                       number_of_versions=None):
+        """Build the URL to use for fetching a single row.
+
+        :param str row:
+        :param list|set|tuple|dict columns:
+        :param timestamp:
+        :param int number_of_versions:
+        :return str:
+        """
+        # If just one column given as string, make a list of it.
+        if isinstance(columns, string_types):
+            columns = [columns]
+
+        # Base URL
+        url = "{table_name}/{row}/".format(table_name=self.name, row=row)
+
+        url += self._build_url_parts(columns)
+
+        # Handling the timestamps
+        if timestamp:
+            if isinstance(timestamp, str):
+                timestamp = int(timestamp)
+            url += "/{timestamp},{timestamp_plus}/".format(
+                timestamp = str(timestamp),
+                timestamp_plus = str(timestamp + 1)
+                )
+
+        # If should be versioned, adding additional URL parts.
+        if number_of_versions is not None:
+            assert isinstance(number_of_versions, int)
+            url += '?v={0}'.format(str(number_of_versions))
+
+        return url
+
+    @staticmethod
+    def _parse_row_response(response_content, perfect_dict=PERFECT_DICT,
+                            fail_silently=True, decode=False, codecs=None):
+        """Extract the single row data from the response content.
+
+        :param dict response_content:
+        :param bool perfect_dict:
+        :param bool fail_silently:
+        :param bool decode: If set to True, response content is base64
+            decoded (see ``_materialize_row``).
+        :param starbase.client.codecs.CodecRegistry codecs:
+        :return dict:
+        """
+        if response_content:
+            try:
+                row_data = response_content['Row']
+                if isinstance(row_data, (list, tuple)) and 1 == len(row_data):
+                    return Table._materialize_row(row_data[0],
+                                                  perfect_dict=perfect_dict,
+                                                  decode=decode,
+                                                  codecs=codecs)
+                if not fail_silently:
+                    raise ParseError(_("No usable data found in HTTP response."))
+            except Exception as e:
+                if not fail_silently:
+                    raise ParseError(_("Failed to parse the HTTP response. "
+                                       "Error details: {0}").format(str(e)))
+
+    def _row_cache_key(self, row, url, perfect_dict=None):
+        """
+        Builds the row cache key: table name, row key and the variant of the row (the URL, which holds the
+        column projection, timestamp and number of versions, the result format and the codecs).
+
+        :param str row:
+        :param str url: Fetch URL (see ``_build_get_url``).
+        :param bool perfect_dict:
+        :return tuple:
+        """
+        if perfect_dict is None:
+            perfect_dict = self.connection.perfect_dict
+        return (self.name, row, (url, bool(perfect_dict), repr(self.codecs) if self.codecs else None))
+
+    def invalidate_row_cache(self, rows=None):
+        """
+        Invalidates the cached (and the remembered absent) rows given (all the rows of the table, if not
+        given). Done automatically on writes made through the table (and its batches).
+
+        :param iterable rows: Row keys.
+        """
+        for cache in (self.connection.row_cache, self.connection.missing_rows_cache):
+            if not cache.enabled:
+                continue
+
+            if rows is None:
+                cache.invalidate_table(self.name)
+            else:
+                cache.invalidate_rows(self.name, rows)
+
+    @property
+    def _caches_rows(self):
+        """
+        Tells whether rows are cached (thus have to be invalidated on writes).
+
+        :return bool:
+        """
+        return self.connection.row_cache.enabled or self.connection.missing_rows_cache.enabled
+
+    def _cache_missing_row(self, row, status_code, generation):
+        """
+        Remembers the row given as absent if Stargate responded with 404 (see ``missing_rows_cache_size``).
+
+        :param str row:
+        :param int status_code: Status code of the full row fetch.
+        :param int generation: Generation of the cache when the row was requested.
+        """
+        missing_rows_cache = self.connection.missing_rows_cache
+        if missing_rows_cache.enabled and status_codes.STATUS_CODE_NOT_FOUND == status_code:
+            missing_rows_cache.set((self.name, row, None), True, size=0, generation=generation)
+
+    def _is_missing(self, row):
+        """
+        Tells whether the row given is known not to exist: it is remembered as absent, or the Bloom filter
+        of the table (covering the row) does not have it.
+
+        :param str row:
+        :return bool:
+        """
+        bloom_filter = self.connection.bloom_filters.get(self.name)
+        if bloom_filter is not None:
+            bloom_filter, start_row, end_row = bloom_filter
+            key = row if isinstance(row, bytes) else str(row).encode('utf8')
+            if (start_row is None or key >= start_row) and (end_row is None or key < end_row) \
+                    and key not in bloom_filter:
+                return True
+
+        missing_rows_cache = self.connection.missing_rows_cache
+        return missing_rows_cache.enabled and missing_rows_cache.get((self.name, row, None)) is not None
+
+    def _rows_written(self, rows):
+        """
+        Adds the rows given (about to be written) to the Bloom filter of the table (if any), and to the
+        ones being built.
+
+        :param iterable rows: Row keys.
+        """
+        bloom_filter = self.connection.bloom_filters.get(self.name)
+        pending = self.connection.bloom_filter_writes.get(self.name)
+        if pending:
+            rows = list(rows)
+            for written in pending:
+                written.extend(rows)
+        if bloom_filter is not None:
+            bloom_filter[0].update(rows)
+
+    def _begin_bloom_filter(self):
+        """
+        Starts recording the rows written through the connection while a Bloom filter of the table is
+        being built, so that none of them is missing from the filter once registered.
+
+        :return list: Rows written in the meantime (filled by ``_rows_written``).
+        """
+        written = []
+        self.connection.bloom_filter_writes.setdefault(self.name, []).append(written)
+        return written
+
+    def _end_bloom_filter(self, written):
+        """
+        Stops recording the rows written (see ``_begin_bloom_filter``).
+
+        :param list written:
+        """
+        pending = self.connection.bloom_filter_writes.get(self.name)
+        if pending is not None:
+            pending[:] = [item for item in pending if item is not written]
+            if not pending:
+                self.connection.bloom_filter_writes.pop(self.name, None)
+
+    def _register_bloom_filter(self, rows, start_row=None, end_row=None, capacity=None,
+                               error_rate=BLOOM_FILTER_ERROR_RATE, written=None):
+        """
+        Builds the Bloom filter out of the rows given and registers it on the connection.
+
+        :param list rows: Row keys.
+        :param list written: Rows written while the rows were being scanned (see ``_begin_bloom_filter``).
+        :return starbase.client.cache.BloomFilter:
+        """
+        if start_row is not None and not isinstance(start_row, bytes):
+            start_row = start_row.encode('utf8')
+        if end_row is not None and not isinstance(end_row, bytes):
+            end_row = end_row.encode('utf8')
+
+        bloom_filter = BloomFilter(capacity=capacity or max(2 * len(rows), 1000), error_rate=error_rate)
+        bloom_filter.update(rows)
+        self.connection.bloom_filters[self.name] = (bloom_filter, start_row, end_row)
+        # Registered first: rows written from now on are added by ``_rows_written``.
+        if written:
+            bloom_filter.update(list(written))
+        return bloom_filter
+
+    def remove_bloom_filter(self):
+        """
+        Removes the Bloom filter of the table (see ``build_bloom_filter``).
+        """
+        self.connection.bloom_filters.pop(self.name, None)
+
+    def _build_multiget_urls(self, rows, columns=None, number_of_versions=None,
+                             max_url_length=MAX_URL_LENGTH):
+        """Build the multiget URLs for the rows given.
+
+        Rows are split into chunks, so that none of the URLs (including the
+        Stargate base URL) is longer than ``max_url_length``. A single row
+        spec longer than that still gets its own URL.
+
+        :param list|tuple rows:
+        :param list|set|tuple|dict columns:
+        :param int number_of_versions:
+        :param int max_url_length:
+        :return list:
+        """
+        # If just one column given as string, make a list of it.
+        if isinstance(columns, string_types):
+            columns = [columns]
+
+        column_spec = self._build_url_parts(columns)
+
+        base_url = "{table_name}/multiget?".format(table_name=self.name)
+        suffix = ''
+        if number_of_versions is not None:
+            assert isinstance(number_of_versions, int)
+            suffix = '&v={0}'.format(number_of_versions)
+
+        available_length = max_url_length - len(self.connection.base_url) \
+                           - len(base_url) - len(suffix)
+
+        urls = []
+        params = []
+        params_length = 0
+        for row in rows:
+            # Stargate URL-decodes the row key of the row spec once more.
+            row_spec = quote(row, safe='')
+            if column_spec:
+                row_spec = '{0}/{1}'.format(row_spec, column_spec)
+            param = 'row={0}'.format(quote(row_spec, safe=''))
+            if params and params_length + len(param) + 1 > available_length:
+                urls.append(base_url + '&'.join(params) + suffix)
+                params = []
+                params_length = 0
+            params.append(param)
+            params_length += len(param) + 1
+
+        if params:
+            urls.append(base_url + '&'.join(params) + suffix)
+
+        return urls
+
+    def _build_columnar_result(self, rows, result):
+        """Build the columnar result out of the ``fetch_many`` raw result.
+
+        :param list rows: Rows requested.
+        :param dict result: Decoded rows keyed by row.
+        :return starbase.client.table.columnar.ColumnarResult:
+        """
+        columnar_result = ColumnarResult(codecs=self.codecs or None,
+                                         decode=False)
+        columnar_result.extend(
+            result[row] for row in rows if result[row] is not None
+        )
+        return columnar_result
+
+    @staticmethod
+    def _parse_multi_row_response(response_content, result, raw=False,
+                                  perfect_dict=PERFECT_DICT,
+                                  fail_silently=True, decode=False,
+                                  codecs=None):
+        """Extract the rows data from the response content into the
+        ``result`` dict given, keyed by row (see ``_materialize_rows`` and
+        ``_key_rows``).
+
+        :param dict response_content: Raw response content is expected to
+            be already decoded.
+        :param dict result: Pre-filled with the rows requested.
+        :param bool raw:
+        :param bool perfect_dict:
+        :param bool fail_silently:
+        :param bool decode: If set to True (and not raw), response content
+            is base64 decoded (see ``_materialize_row``).
+        :param starbase.client.codecs.CodecRegistry codecs:
+        """
+        Table._key_rows(
+            Table._materialize_rows(response_content, raw=raw,
+                                    perfect_dict=perfect_dict,
+                                    fail_silently=fail_silently,
+                                    decode=decode, codecs=codecs),
+            result
+        )
+
+    @staticmethod
+    def _materialize_rows(response_content, raw=False,
+                          perfect_dict=PERFECT_DICT, fail_silently=True,
+                          decode=False, codecs=None):
+        """Extract the rows data from the response content.
+
+        :param dict response_content: Raw response content is expected to
+            be already decoded.
+        :param bool raw:
+        :param bool perfect_dict:
+        :param bool fail_silently:
+        :param bool decode: If set to True (and not raw), response content
+            is base64 decoded (see ``_materialize_row``).
+        :param starbase.client.codecs.CodecRegistry codecs:
+        :return list: List of ``(row key, row data)`` tuples, as responded.
+        """
+        rows = []
+        if not response_content or 'Row' not in response_content:
+            return rows
+
+        row_data = response_content['Row']
+        if isinstance(row_data, dict):
+            row_data = [row_data]
+
+        for item in row_data:
+            try:
+                if raw:
+                    rows.append((item['key'], item))
+                else:
+                    rows.extend(Table._materialize_row(
+                        item, with_row_id=True, perfect_dict=perfect_dict,
+                        decode=decode, codecs=codecs
+                    ).items())
+            except Exception as e:
+                if not fail_silently:
+                    raise ParseError(_("Failed to parse the HTTP response. "
+                                       "Error details: {0}").format(str(e)))
+        return rows
+
+    @staticmethod
+    def _key_rows(rows, result):
+        """Put the rows given into the ``result`` dict, keyed the way they
+        were requested: rows are matched with the keys of ``result`` (``str``
+        and ``bytes`` alike), so that ``b'row1'`` requested is not given as
+        ``'row1'``.
+
+        :param list rows: List of ``(row key, row data)`` tuples (see
+            ``_materialize_rows``).
+        :param dict result: Pre-filled with the rows requested.
+        """
+        requested = {}
+        for row in result:
+            requested.setdefault(Table._row_key_bytes(row), []).append(row)
+
+        for key, data in rows:
+            for row in requested.get(Table._row_key_bytes(key)) or [key]:
+                result[row] = data
+
+    @staticmethod
+    def _row_key_bytes(row):
+        """Row key as bytes (``str`` keys are UTF-8 encoded).
+
+        :param str|bytes row:
+        :return bytes:
+        """
+        return row if isinstance(row, bytes) else text_type(row).encode('utf8')
+
+    def _build_put_url(self, row, columns):
+        """
+        Builds a URL to use for sending the PUT/POST commands.
+
+        :param str row:
+        :param dict columns:
+        :return str:
+        """
+        # Base URL
+        #url = ''
+
+        if PY3:
+            row_hash = base64.b64encode(row.encode('utf8')).decode('utf8')
+        else:
+            row_hash = base64.b64encode(row)
+
+        #if 1 == len(columns):
+        #    cf = list(columns.keys())[0]
+        #    url = "{table_name}/{row}/{cf}".format(table_name=self.name, row=row_hash, cf=cf)
+        #else:
+        #    url = "{table_name}/{row}".format(table_name=self.name, row=row_hash)
+
+        url = "{table_name}/{row}".format(table_name=self.name, row=row_hash)
+
+        return url
+
+    _build_post_url = _build_put_url
+    _build_post_url.__doc__ = _build_put_url.__doc__
+
+    def _build_delete_url(self, row, column=None, qualifier=None):
+        """
+        Builds a URL to use for sending the DELETE commands.
+
+        :param str row: Row id to delete.
+        :param str column: Column
+        :param str qualifier: Column qualifier.
+        :return str:
+        """
+        if qualifier and not column:
+            raise InvalidArguments(_("Qualifier can't be given without column."))
+
+        # Base URL
+        parts = []
+        parts.append("{table_name}/{row}".format(table_name=self.name, row=row))
+
+        if qualifier:
+            parts.append("{0}:{1}".format(column, qualifier))
+        elif column:
+            parts.append("{0}".format(column))
+
+        return '/'.join(parts)
+
+    @staticmethod
+    def _build_scanner_data(batch_size=None, start_row=None, end_row=None, start_time=None,
+                            end_time=None, filter_string=None, data={}, encode_rows=True):
+        """
+        Builds the scanner configuration to send when creating a scanner.
+
+        :param int batch_size:
+        :param str|bytes start_row:
+        :param str|bytes end_row:
+        :param start_time:
+        :param end_time:
+        :param str filter_string:
+        :param dict|str data: Additional scanner configuration (dict, or XML scanner definition as a
+            string). Explicitly given arguments take precedence (merged into the attributes and the
+            ``filter`` element of the XML definition).
+        :param bool encode_rows: If set to True, start/end rows are base64 encoded (JSON). Always so for
+            the XML definitions.
+        :return dict|str:
+        """
+        is_xml = isinstance(data, string_types)
+        if is_xml:
+            scanner_data = {}
+            encode_rows = True
+        else:
+            scanner_data = dict(data) if data else {}
+
+        if batch_size:
+            scanner_data['batch'] = batch_size
+
+        for key, row in (('startRow', start_row), ('endRow', end_row)):
+            if row:
+                if not isinstance(row, bytes):
+                    row = row.encode('utf8')
+                scanner_data[key] = base64.b64encode(row).decode('utf8') if encode_rows else row
+
+        if start_time is not None:
+            scanner_data['startTime'] = start_time
+
+        if end_time is not None:
+            scanner_data['endTime'] = end_time
+
+        if filter_string is not None:
+            scanner_data['filter'] = filter_string
+
+        if is_xml:
+            return Table._merge_xml_scanner_data(data, scanner_data)
+
+        return scanner_data
+
+    @staticmethod
+    def _merge_xml_scanner_data(xml, scanner_data):
+        """
+        Merges the scanner configuration given into the XML scanner definition: the ``filter`` into the
+        element of the same name, everything else into the attributes of the ``Scanner`` element.
+
+        :param str xml: XML scanner definition.
+        :param dict scanner_data: Scanner configuration (see ``_build_scanner_data``).
+        :return str:
+        """
+        if not scanner_data:
+            return xml
+
+        element = ElementTree.fromstring(xml)
+        for key, value in scanner_data.items():
+            if 'filter' == key:
+                filter_element = element.find('filter')
+                if filter_element is None:
+                    filter_element = ElementTree.SubElement(element, 'filter')
+                filter_element.text = value
+            else:
+                element.set(key, text_type(value))
+        return ElementTree.tostring(element).decode('utf8')
+
+    def _cache_schema(self, schema):
+        """
+        Caches the schema given (unless it's not a valid one).
+
+        :param dict schema: Schema as returned by Stargate.
+        :return tuple: Schema and frozenset of column family names.
+        """
+        if not schema or 'ColumnSchema' not in schema:
+            return schema, frozenset()
+
+        column_families = frozenset(cf['name'] for cf in schema['ColumnSchema'])
+        self.connection.schema_cache.set(self.name, (schema, column_families))
+        return schema, column_families
+
+    def invalidate_schema_cache(self):
+        """
+        Invalidates the cached schema of the table. Done automatically on schema changes made through the
+        table.
+        """
+        self.connection.schema_cache.invalidate(self.name)
+
+    def _get_data_for_table_create_or_update(self, columns):
+        """
+        Gets data for table create or update.
+
+        :param list|tuple|set|str columns: Columns to (re)create/update.
+        :return dict:
+        """
+        # If just one column given as string, make a list of it.
+        if isinstance(columns, string_types):
+            columns = [columns]
+
+        columns = set(columns)
+
+        url = "{table_name}/schema".format(table_name=self.name)
+
+        data = {'name': self.name, 'ColumnSchema': []}
+
+        for column in columns:
+            data['ColumnSchema'].append({'name': column})
+
+        return url, data
+
+    @property
+    def check_if_exists_on_schema_operations(self):
+        return True
+
+    @property
+    def check_if_exists_on_batch_operations(self):
+        return True
+
+    def disable_row_operation_if_exists_checks(self):
+        """
+        Disables `exists` method on row operations.
+        """
+        self.check_if_exists_on_row_fetch = False
+        self.check_if_exists_on_row_insert = False
+        self.check_if_exists_on_row_remove = False
+        self.check_if_exists_on_row_update = False
+
+    def enable_row_operation_if_exists_checks(self):
+        """
+        Enables `exists` method on row operations. The opposite of `disable_row_operation_if_exists_checks`.
+        """
+        self.check_if_exists_on_row_fetch = True
+        self.check_if_exists_on_row_insert = True
+        self.check_if_exists_on_row_remove = True
+        self.check_if_exists_on_row_update = True
+
+    def disable_if_exists_checks(self):
+        """
+        Skips calling the `exists` method on any operation.
+        """
+        self.disable_row_operation_if_exists_checks()
+        self.check_if_exists_on_scanner_operations = False
+
+    def enable_if_exists_checks(self):
+        """
+        Enables `exists` method on any operation. The opposite of `disable_if_exists_checks`.
+        """
+        self.enable_row_operation_if_exists_checks()
+        self.check_if_exists_on_scanner_operations = True
+
+
+class Table(BaseTable):
+    """For HBase table operations (see ``BaseTable``).
+
+    :param stargate.base.Connection connection: Connection instance.
+    :param str name: Table name.
+    :param dict codecs: Cell value codecs (see ``starbase.client.codecs``)
+        keyed by column family ('family') or column ('family:qualifier').
+    """
+    def __repr__(self):
+        """Repr."""
+        return "<starbase.client.table.Table " \
+               "({0})> on {1}".format(self.name, self.connection)
+
     def _get(self, row, columns=None, timestamp=None, decode_content=True,
              number_of_versions=None, raw=False,  perfect_dict=None,
              fail_silently=True):
@@ -275,8 +988,8 @@ class Table(object):
         :param str row:
         :param list|set|tuple|dict columns:
         :param timestamp: Not yet used.
-        :param bool decode_content: If set to True, content is decoded using
-            ``stargate.json_decoder.json_decode``.
+        :param bool decode_content: If set to True, content is (base64)
+            decoded.
         :param int number_of_versions: If provided, multiple versions of the
             given record are returned.
         :param bool perfect_dict:
@@ -290,54 +1003,41 @@ class Table(object):
         if perfect_dict is None:
             perfect_dict = self.connection.perfect_dict
 
-        # If just one column given as string, make a list of it.
-        if isinstance(columns, string_types):
-            columns = [columns]
-
-        # Base URL
-        url = "{table_name}/{row}/".format(table_name=self.name, row=row)
-
-        url += self._build_url_parts(columns)
-
-        # Handling the timestamps
-        if timestamp:
-            if isinstance(timestamp, str):
-                timestamp = int(timestamp)
-            url += "/{timestamp},{timestamp_plus}/".format(
-                timestamp = str(timestamp),
-                timestamp_plus = str(timestamp + 1)
-                )
-
-        # If should be versioned, adding additional URL parts.
-        if number_of_versions is not None:
-            assert isinstance(number_of_versions, int)
-            url += '?v={0}'.format(str(number_of_versions))
+        url = self._build_get_url(row, columns=columns, timestamp=timestamp,
+                                  number_of_versions=number_of_versions)
+
+        generation = self.connection.missing_rows_cache.generation
+
+        # Unless raw response is wanted, rows are decoded along with the
+        # extraction of the data (see ``_materialize_row``), timed as the
+        # ``decode`` phase of the request.
+        materialize = None
+        if not raw:
+            def materialize(response_content):
+                return self._parse_row_response(
+                    response_content,
+                    perfect_dict = perfect_dict,
+                    fail_silently = fail_silently,
+                    decode = decode_content and self._base64_encoded,
+                    codecs = self.codecs or None
+                    )
 
         response = HttpRequest(
             connection = self.connection,
             url = url,
-            decode_content = decode_content,
-            fail_silently = fail_silently
+            decode_content = decode_content and raw,
+            fail_silently = fail_silently,
+            materialize = materialize
             ).get_response()
 
-        response_content = response.content
+        if not columns and not timestamp:
+            self._cache_missing_row(row, response.status_code, generation)
 
-        if raw:
-            return response_content
+        if raw or response.raw.ok:
+            return response.content
 
-        if response_content:
-            try:
-                res = Table._extract_usable_data(response_content,
-                                                 perfect_dict=perfect_dict,
-                                                 with_row_id=False)
-                if isinstance(res, (list, tuple)) and 1 == len(res):
-                    return res[0]
-                if not fail_silently:
-                    raise ParseError(_("No usable data found in HTTP response."))
-            except Exception as e:
-                if not fail_silently:
-                    raise ParseError(_("Failed to parse the HTTP response. "
-                                       "Error details: {0}").format(str(e)))
+        # Other responses (such as 404 of a missing row) hold no row.
+        return None
 
     def fetch(self, row, columns=None, timestamp=None, number_of_versions=None,
               raw=False, perfect_dict=None, fail_silently=True):
@@ -377,24 +1077,194 @@ class Table(object):
         `column3` and fild `age` of column `column2`.
 
         >>> table.fetch('row1', {'column3': ['gender', 'favourite_book'], 'column2': ['age']})
+
+        If the row cache of the connection is enabled (see ``row_cache_size``), rows are read through it.
+        Rows written or removed through the connection are invalidated.
+
+        Rows known not to exist (see ``missing_rows_cache_size`` and ``build_bloom_filter``) are not
+        requested; None is returned.
+        """
+        if self._is_missing(row):
+            return None
+
+        row_cache = self.connection.row_cache
+        if not row_cache.enabled:
+            return self._get(row, columns=columns, timestamp=timestamp, decode_content=True, \
+                             number_of_versions=number_of_versions, raw=False, \
+                             perfect_dict=perfect_dict, fail_silently=fail_silently)
+
+        key = self._row_cache_key(row, self._build_get_url(row, columns=columns, timestamp=timestamp,
+                                                           number_of_versions=number_of_versions),
+                                  perfect_dict=perfect_dict)
+        cached = row_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        generation = row_cache.generation
+        result = self._get(row, columns=columns, timestamp=timestamp, decode_content=True, \
+                           number_of_versions=number_of_versions, raw=False, \
+                           perfect_dict=perfect_dict, fail_silently=fail_silently)
+        if result is not None:
+            row_cache.set(key, copy.deepcopy(result), generation=generation)
+        return result
+
+    def build_bloom_filter(self, start_row=None, end_row=None, capacity=None,
+                           error_rate=BLOOM_FILTER_ERROR_RATE, batch_size=None, fail_silently=True):
+        """
+        Builds a Bloom filter of the row keys of the table (or of the key range given) out of a key-only
+        scan and registers it on the connection. From then on, fetches of the rows (in the range) not in the
+        filter return None without a request. Rows inserted or updated through the connection are added to
+        the filter (those written while it is being built included); rows written by other clients are not
+        (rebuild the filter to catch up).
+
+        The filter is only registered if the whole key range was scanned: a failed scan raises an exception
+        (or, if ``fail_silently`` is set, is logged and None returned), the filter previously registered (if
+        any) staying in place.
+
+        :param str start_row: If given, the filter covers the rows starting at the row given.
+        :param str end_row: If given, the filter covers the rows before the row given.
+        :param int capacity: Expected number of rows. Defaults to twice the number of rows scanned.
+        :param float error_rate: False positive probability.
+        :param int batch_size:
+        :param bool fail_silently:
+        :return starbase.client.cache.BloomFilter:
+
+        :example:
+        >>> table.build_bloom_filter()
+        >>> table.fetch('non-existent-row')  # No request made
         """
-        return self._get(row, columns=columns, timestamp=timestamp, decode_content=True, \
-                         number_of_versions=number_of_versions, raw=False, \
-                         perfect_dict=perfect_dict, fail_silently=fail_silently)
+        written = self._begin_bloom_filter()
+        try:
+            rows = self.fetch_all_rows(with_row_id=True, perfect_dict=False, filter_string=KEY_ONLY_FILTER,
+                                       batch_size=batch_size, start_row=start_row, end_row=end_row,
+                                       fail_silently=False)
+            if rows is None:
+                raise DoesNotExist(_("""Table "{0}" does not exist.""").format(self.name))
+            rows = [row_id for row in rows for row_id in row]
+            return self._register_bloom_filter(rows, start_row=start_row, end_row=end_row, capacity=capacity,
+                                               error_rate=error_rate, written=written)
+        except Exception as e:
+            if not fail_silently:
+                raise
+            logger.warning(_("Failed to build the Bloom filter of table {0}: {1}").format(self.name, e))
+            return None
+        finally:
+            self._end_bloom_filter(written)
+
+    def fetch_many(self, rows, columns=None, number_of_versions=None,
+                   raw=False, perfect_dict=None, max_url_length=MAX_URL_LENGTH,
+                   parallelism=PARALLELISM, columnar=False, fail_silently=True):
+        """Fetch multiple rows from table at once.
+
+        Uses the Stargate multiget endpoint. Rows are split into chunks (to
+        keep the URLs shorter than ``max_url_length``), which are fetched
+        concurrently.
+
+        :param list|tuple rows: Row keys.
+        :param list|set|tuple|dict columns: See ``fetch``.
+        :param int number_of_versions: If provided, multiple versions of the
+            given records are returned.
+        :param bool raw: If set to True, decoded, but otherwise unprocessed
+            row data is returned.
+        :param bool perfect_dict:
+        :param int max_url_length:
+        :param int parallelism: Maximum number of chunks fetched concurrently.
+        :param bool columnar: If set to True, a
+            ``starbase.client.table.columnar.ColumnarResult`` of the existing
+            rows (in the order requested) is returned instead (``raw`` and
+            ``perfect_dict`` are ignored).
+        :param bool fail_silently:
+        :return dict: Row data (as ``fetch`` would return it) keyed by row.
+            None is given for rows that do not exist.
+
+        :example:
+        >>> table.fetch_many(['row1', 'row2', 'row3'], ['column1'])
+        """
+        if self.check_if_exists_on_row_fetch:
+            if not self.exists(fail_silently=fail_silently):
+                return None
+
+        if perfect_dict is None:
+            perfect_dict = self.connection.perfect_dict
+
+        if columnar:
+            raw = True
+
+        rows = list(rows)
+        # Rows known not to exist are not requested.
+        urls = self._build_multiget_urls([row for row in rows if not self._is_missing(row)],
+                                         columns=columns,
+                                         number_of_versions=number_of_versions,
+                                         max_url_length=max_url_length)
+
+        # Rows are materialized as the ``decode`` phase of the requests.
+        def materialize(response_content):
+            return self._materialize_rows(
+                response_content, raw=raw, perfect_dict=perfect_dict, fail_silently=fail_silently,
+                decode=self._base64_encoded, codecs=self.codecs or None
+                )
+
+        def fetch_chunk(url):
+            response = HttpRequest(
+                connection = self.connection,
+                url = url,
+                decode_content = raw,
+                fail_silently = True,
+                materialize = materialize
+                ).get_response()
+
+            # Stargate responds with 404 if none of the rows exist.
+            if not fail_silently and response.status_code not in (
+                    status_codes.STATUS_CODE_OK,
+                    status_codes.STATUS_CODE_NOT_FOUND):
+                response.raw.raise_for_status()
+
+            return response.content if response.raw.ok else None
+
+        if len(urls) > 1 and parallelism > 1:
+            executor = ThreadPoolExecutor(max_workers=min(parallelism, len(urls)))
+            try:
+                responses = list(executor.map(fetch_chunk, urls))
+            finally:
+                executor.shutdown()
+        else:
+            responses = [fetch_chunk(url) for url in urls]
+
+        result = dict((row, None) for row in rows)
+        self._key_rows([item for items in responses if items for item in items], result)
+
+        if columnar:
+            return self._build_columnar_result(rows, result)
+
+        return result
 
     def fetch_all_rows(self, with_row_id=False, raw=False, perfect_dict=None,
                        flat=False, filter_string=None, scanner_config={},
-                       fail_silently=True):
+                       batch_size=None, start_row=None, end_row=None,
+                       columnar=False, fail_silently=True):
         """Fetch all table rows.
 
+        Rows are fetched from the Stargate in batches, one batch at a time,
+        while the returned generator is being consumed. The scanner is
+        deleted once all the rows are fetched.
+
         :param bool with_row_id: If set to True, returned along with row id.
         :param bool raw: If set to True, raw response is returned.
         :param bool perfect_dict: If set to True, a perfect dict structure is
             used for output data.
-        :param bool flat:
+        :param bool flat: If set to True, a list is returned instead of a
+            generator.
         :param string filter_string: If set, applies the given filter string
             to the scanner.
         :param dict scanner_config:
+        :param int batch_size: Maximum number of cells fetched per request.
+            If not given, Stargate default is used.
+        :param str start_row: If given, scanning starts at the row given.
+        :param str end_row: If given, scanning stops before the row given.
+        :param bool columnar: If set to True, all the rows are fetched into
+            a ``starbase.client.table.columnar.ColumnarResult``, which is
+            returned (``with_row_id``, ``raw``, ``perfect_dict`` and ``flat``
+            are ignored).
         :param mixed flat_silently.
         :return list:
 
@@ -415,7 +1285,10 @@ class Table(object):
             perfect_dict = self.connection.perfect_dict
 
         try:
-            scanner = self._scanner(filter_string=filter_string,
+            scanner = self._scanner(batch_size=batch_size,
+                                    start_row=start_row,
+                                    end_row=end_row,
+                                    filter_string=filter_string,
                                     data=scanner_config,
                                     fail_silently=fail_silently)
         except HTTPError as e:
@@ -424,11 +1297,13 @@ class Table(object):
             raise DoesNotExist(_("""Table "{0}" does not exist."""
                                "".format(self.name)))
 
+        if scanner and columnar:
+            return scanner.columnar_results()
+
         if scanner:
             res = scanner.results(perfect_dict=perfect_dict,
                                   with_row_id=with_row_id,
                                   raw=raw)
-            scanner.delete ()
         else:
             if fail_silently:
                 return None
@@ -439,56 +1314,199 @@ class Table(object):
 
         return res
 
-    def _build_put_url(self, row, columns):
+    def _region_key_ranges(self, start_row=None, end_row=None,
+                           fail_silently=True):
+        """Split the key space into ranges by the region boundaries.
+
+        :param str|bytes start_row: If given, ranges are clipped to start at
+            the row given.
+        :param str|bytes end_row: If given, ranges are clipped to end before
+            the row given.
+        :param bool fail_silently:
+        :return list: List of ``(start_key, end_key)`` tuples of bytes,
+            sorted by start key. None stands for an open boundary.
         """
-        Builds a URL to use for sending the PUT/POST commands.
+        if start_row is not None and not isinstance(start_row, bytes):
+            start_row = start_row.encode('utf8')
+        if end_row is not None and not isinstance(end_row, bytes):
+            end_row = end_row.encode('utf8')
+
+        regions = self.regions(fail_silently=fail_silently)
+        regions = regions.get('Region') if regions else None
+        if isinstance(regions, dict):
+            regions = [regions]
+
+        boundaries = []
+        for region in regions or []:
+            boundaries.append((
+                base64.b64decode(region.get('startKey') or '') or None,
+                base64.b64decode(region.get('endKey') or '') or None
+            ))
+        if not boundaries:
+            boundaries = [(None, None)]
+
+        boundaries.sort(key=lambda boundary: boundary[0] or b'')
+
+        key_ranges = []
+        for start_key, end_key in boundaries:
+            if start_row and (start_key is None or start_key < start_row):
+                start_key = start_row
+            if end_row and (end_key is None or end_key > end_row):
+                end_key = end_row
+            if start_key and end_key and start_key >= end_key:
+                continue
+            key_ranges.append((start_key, end_key))
+
+        return key_ranges
+
+    def fetch_all_rows_parallel(self, with_row_id=False, raw=False,
+                                perfect_dict=None, flat=False,
+                                filter_string=None, scanner_config={},
+                                batch_size=None, start_row=None, end_row=None,
+                                parallelism=PARALLELISM, ordered=False,
+                                buffer_size=SCAN_BUFFER_SIZE, columnar=False,
+                                fail_silently=True):
+        """Fetch all table rows, scanning the regions concurrently.
+
+        The key space is split by the region start/end keys (see
+        ``regions``) and each region is scanned by a separate scanner on a
+        pool of ``parallelism`` worker threads.
 
-        :param str row:
-        :param dict columns:
-        :return str:
+        :param bool with_row_id: If set to True, returned along with row id.
+        :param bool raw: If set to True, raw response is returned.
+        :param bool perfect_dict: If set to True, a perfect dict structure is
+            used for output data.
+        :param bool flat: If set to True, a list is returned instead of a
+            generator.
+        :param string filter_string: If set, applies the given filter string
+            to the scanners.
+        :param dict|str scanner_config: Additional scanner configuration, as
+            for ``fetch_all_rows``. The region bounds are merged into the XML
+            scanner definitions.
+        :param int batch_size: Maximum number of cells fetched per request.
+        :param str start_row: If given, scanning starts at the row given.
+        :param str end_row: If given, scanning stops before the row given.
+        :param int parallelism: Number of regions scanned concurrently.
+        :param bool ordered: If set to True, rows are returned in row key
+            order (regions are yielded one after another, while the next
+            ones are being prefetched). Otherwise, rows are returned as soon
+            as they are fetched, in no particular order.
+        :param int buffer_size: Maximum number of rows buffered per region
+            (or in total, if not ``ordered``).
+        :param bool columnar: If set to True, all the rows are fetched into
+            a ``starbase.client.table.columnar.ColumnarResult``, which is
+            returned (``with_row_id``, ``raw``, ``perfect_dict`` and ``flat``
+            are ignored).
+        :param bool fail_silently:
+        :return generator|list:
+
+        :example:
+        >>> for row in table.fetch_all_rows_parallel(parallelism=8):
+        >>>     print(row)
         """
-        # Base URL
-        #url = ''
+        if self.check_if_exists_on_scanner_operations:
+            if not self.exists(fail_silently=fail_silently):
+                return None
 
-        if PY3:
-            row_hash = base64.b64encode(row.encode('utf8')).decode('utf8')
-        else:
-            row_hash = base64.b64encode(row)
+        if perfect_dict is None:
+            perfect_dict = self.connection.perfect_dict
 
-        #if 1 == len(columns):
-        #    cf = list(columns.keys())[0]
-        #    url = "{table_name}/{row}/{cf}".format(table_name=self.name, row=row_hash, cf=cf)
-        #else:
-        #    url = "{table_name}/{row}".format(table_name=self.name, row=row_hash)
+        key_ranges = self._region_key_ranges(start_row=start_row,
+                                             end_row=end_row,
+                                             fail_silently=fail_silently)
+
+        res = self._scan_key_ranges(
+            key_ranges,
+            dict(with_row_id=with_row_id, raw=raw or columnar,
+                 perfect_dict=perfect_dict),
+            dict(batch_size=batch_size, filter_string=filter_string,
+                 data=scanner_config, fail_silently=fail_silently),
+            parallelism=parallelism,
+            ordered=ordered,
+            buffer_size=buffer_size
+        )
 
-        url = "{table_name}/{row}".format(table_name=self.name, row=row_hash)
+        if columnar:
+            # Raw rows come already decoded.
+            result = ColumnarResult(codecs=self.codecs or None, decode=False)
+            result.extend(res)
+            return result
 
-        return url
-    _build_post_url = _build_put_url
-    _build_post_url.__doc__ = _build_put_url.__doc__
+        if flat:
+            res = list(res)
 
-    def _build_delete_url(self, row, column=None, qualifier=None):
-        """
-        Builds a URL to use for sending the DELETE commands.
+        return res
 
-        :param str row: Row id to delete.
-        :param str column: Column
-        :param str qualifier: Column qualifier.
-        :return str:
+    def _scan_key_ranges(self, key_ranges, results_kwargs, scanner_kwargs,
+                         parallelism=PARALLELISM, ordered=False,
+                         buffer_size=SCAN_BUFFER_SIZE):
+        """Scan the key ranges given concurrently.
+
+        :param list key_ranges: See ``_region_key_ranges``.
+        :param dict results_kwargs: Passed to ``Scanner.results``.
+        :param dict scanner_kwargs: Passed to ``_scanner``.
+        :param int parallelism:
+        :param bool ordered:
+        :param int buffer_size:
+        :return generator:
         """
-        if qualifier and not column:
-            raise InvalidArguments(_("Qualifier can't be given without column."))
+        done = object()
+        stop = threading.Event()
 
-        # Base URL
-        parts = []
-        parts.append("{table_name}/{row}".format(table_name=self.name, row=row))
-
-        if qualifier:
-            parts.append("{0}:{1}".format(column, qualifier))
-        elif column:
-            parts.append("{0}".format(column))
+        if ordered:
+            queues = [queue.Queue(maxsize=buffer_size) for key_range in key_ranges]
+        else:
+            queues = [queue.Queue(maxsize=buffer_size)] * len(key_ranges)
+
+        def put(results_queue, item):
+            # Give up as soon as the consumer is gone.
+            while not stop.is_set():
+                try:
+                    results_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def scan(key_range, results_queue):
+            try:
+                scanner = self._scanner(start_row=key_range[0],
+                                        end_row=key_range[1],
+                                        **scanner_kwargs)
+                if scanner:
+                    results = scanner.results(**results_kwargs)
+                    try:
+                        for row in results:
+                            if not put(results_queue, row):
+                                break
+                    finally:
+                        results.close()
+            except Exception as e:
+                put(results_queue, e)
+            finally:
+                put(results_queue, done)
 
-        return '/'.join(parts)
+        executor = ThreadPoolExecutor(max_workers=parallelism)
+        try:
+            for key_range, results_queue in zip(key_ranges, queues):
+                executor.submit(scan, key_range, results_queue)
+
+            consumed = queues[:1] if not ordered and queues else queues
+            pending = len(key_ranges)
+            for results_queue in consumed:
+                while pending:
+                    item = results_queue.get()
+                    if item is done:
+                        pending -= 1
+                        if ordered:
+                            break
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
 
     def _put(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
         """
@@ -512,14 +1530,18 @@ class Table(object):
         data = self._build_table_data(row, columns, timestamp=timestamp, encode_content=encode_content, \
                                       with_row_declaration=True)
 
-        response = HttpRequest(
-            connection = self.connection,
-            url = url,
-            data = data,
-            decode_content = False,
-            method = PUT,
-            fail_silently = fail_silently
-            ).get_response()
+        self._rows_written([row])
+        try:
+            response = HttpRequest(
+                connection = self.connection,
+                url = url,
+                data = data,
+                decode_content = False,
+                method = PUT,
+                fail_silently = fail_silently
+                ).get_response()
+        finally:
+            self.invalidate_row_cache([row])
 
         return response.status_code
 
@@ -545,7 +1567,7 @@ class Table(object):
         return self._put(row=row, columns=columns, timestamp=timestamp, fail_silently=fail_silently)
 
     def _scanner(self, batch_size=None, start_row=None, end_row=None, start_time=None, end_time=None, \
-                 filter_string=None, data='', fail_silently=True):
+                 filter_string=None, data={}, fail_silently=True):
         """
         Creates a scanner instance.
 
@@ -555,12 +1577,15 @@ class Table(object):
         :param start_time:
         :param end_time:
         :param str filter_string:
+        :param dict data: Additional scanner configuration.
         :return starbase.client.Scanner: Creates and returns a class::`starbase.client.Scanner` instance.
         """
         url = '{0}/scanner'.format(self.name)
 
-        if filter_string is not None:
-            data = {"filter": filter_string}
+        data = self._build_scanner_data(batch_size=batch_size, start_row=start_row, end_row=end_row,
+                                        start_time=start_time, end_time=end_time,
+                                        filter_string=filter_string, data=data,
+                                        encode_rows=self._base64_encoded)
 
         response = HttpRequest(
             connection = self.connection,
@@ -573,7 +1598,9 @@ class Table(object):
         scanner_url = response.raw.headers.get('location')
 
         if scanner_url:
-            return Scanner(table=self, url=scanner_url)
+            return Scanner(table=self, url=scanner_url, batch_size=batch_size, start_row=start_row,
+                           end_row=end_row, start_time=start_time, end_time=end_time,
+                           fail_silently=fail_silently)
 
     def _post(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
         """
@@ -595,14 +1622,18 @@ class Table(object):
         data = self._build_table_data(row, columns, timestamp=timestamp, encode_content=encode_content, \
                                       with_row_declaration=True)
 
-        response = HttpRequest(
-            connection = self.connection,
-            url = url,
-            data = data,
-            decode_content = False,
-            method = POST,
-            fail_silently = fail_silently
-            ).get_response()
+        self._rows_written([row])
+        try:
+            response = HttpRequest(
+                connection = self.connection,
+                url = url,
+                data = data,
+                decode_content = False,
+                method = POST,
+                fail_silently = fail_silently
+                ).get_response()
+        finally:
+            self.invalidate_row_cache([row])
 
         return response.status_code
 
@@ -646,12 +1677,18 @@ class Table(object):
         >>> if table.exists():
         >>>     table.drop()
         """
-        response = HttpRequest(
-            connection = self.connection,
-            url = '{0}/schema'.format(self.name),
-            method = DELETE,
-            fail_silently = fail_silently
-            ).get_response()
+        try:
+            response = HttpRequest(
+                connection = self.connection,
+                url = '{0}/schema'.format(self.name),
+                method = DELETE,
+                fail_silently = fail_silently
+                ).get_response()
+        finally:
+            self.connection.invalidate_tables_cache()
+            self.invalidate_schema_cache()
+            self.invalidate_row_cache()
+            self.remove_bloom_filter()
 
         # If response.status_code == 200 it means table was successfully dropped/deleted.
         return response.status_code
@@ -671,12 +1708,15 @@ class Table(object):
         """
         url = self._build_delete_url(row=row, column=column, qualifier=qualifier)
 
-        response = HttpRequest(
-            connection = self.connection,
-            url = url,
-            method = DELETE,
-            fail_silently = fail_silently
-            ).get_response()
+        try:
+            response = HttpRequest(
+                connection = self.connection,
+                url = url,
+                method = DELETE,
+                fail_silently = fail_silently
+                ).get_response()
+        finally:
+            self.invalidate_row_cache([row])
         return response.status_code
 
     def remove(self, row, column=None, qualifier=None, timestamp=None, fail_silently=True):
@@ -705,10 +1745,13 @@ class Table(object):
         """
         return self._delete(row, column=column, qualifier=qualifier, timestamp=timestamp, fail_silently=fail_silently)
 
-    def schema(self, fail_silently=True):
+    def schema(self, fail_silently=True, refresh=False):
         """
-        Table schema. Retrieves table schema.
+        Table schema. Retrieves table schema. Schemas are cached on the connection (see ``schema_cache_ttl``
+        of the `starbase.client.connection.Connection`).
 
+        :param bool fail_silently:
+        :param bool refresh: If set to True, the schema is requested even if cached.
         :return dict: Dictionary with schema info (detailed information on column families).
 
         :example:
@@ -717,9 +1760,43 @@ class Table(object):
         >>> table = connection.table('table1')
         >>> table.schema()
         """
+        schema, column_families = self._get_schema(fail_silently=fail_silently, refresh=refresh)
+        return copy.deepcopy(schema)
+
+    def _get_schema(self, fail_silently=True, refresh=False):
+        """
+        Gets the table schema along with the set of column families, either cached or requested.
+
+        :param bool fail_silently:
+        :param bool refresh: If set to True, the schema is requested even if cached.
+        :return tuple: Schema (not to be modified) and frozenset of column family names.
+        """
+        if not refresh:
+            cached = self.connection.schema_cache.get(self.name)
+            if cached is not None:
+                return cached
+
         url = "{table_name}/schema".format(table_name=self.name)
         response = HttpRequest(connection=self.connection, url=url, fail_silently=fail_silently).get_response()
-        return response.content
+        return self._cache_schema(response.content)
+
+    def column_families(self, fail_silently=True):
+        """
+        Gets the set of column families of the table (cached, see ``schema``). Useful for client side
+        column validation.
+
+        :param bool fail_silently:
+        :return frozenset: Column family names.
+
+        :example:
+        >>> from starbase import Connection
+        >>> connection = Connection()
+        >>> table = connection.table('table1')
+        >>> 'column1' in table.column_families()
+        True
+        """
+        schema, column_families = self._get_schema(fail_silently=fail_silently)
+        return column_families
 
     def exists(self, fail_silently=True):
         """
@@ -748,7 +1825,7 @@ class Table(object):
         >>> table = connection.table('table1')
         >>> table.columns()
         """
-        schema = self.schema()
+        schema, column_families = self._get_schema()
         columns_schema = schema['ColumnSchema'] if schema and 'ColumnSchema' in schema else []
 
         return [cf['name'] for cf in columns_schema]
@@ -762,6 +1839,7 @@ class Table(object):
         url = "{table_name}/regions".format(table_name=self.name)
         response = HttpRequest(connection=self.connection, url=url, fail_silently=fail_silently).get_response()
         return response.content
+
     metadata = regions
     metadata.__doc__ = regions.__doc__
 
@@ -791,38 +1869,20 @@ class Table(object):
 
         url, data = self._get_data_for_table_create_or_update(columns)
 
-        response = HttpRequest(
-            connection = self.connection,
-            url = url,
-            data = data,
-            method = PUT,
-            fail_silently = fail_silently
-            ).get_response()
+        try:
+            response = HttpRequest(
+                connection = self.connection,
+                url = url,
+                data = data,
+                method = PUT,
+                fail_silently = fail_silently
+                ).get_response()
+        finally:
+            self.connection.invalidate_tables_cache()
+            self.invalidate_schema_cache()
 
         return response.status_code
 
-    def _get_data_for_table_create_or_update(self, columns):
-        """
-        Gets data for table create or update.
-
-        :param list|tuple|set|str columns: Columns to (re)create/update.
-        :return dict:
-        """
-        # If just one column given as string, make a list of it.
-        if isinstance(columns, string_types):
-            columns = [columns]
-
-        columns = set(columns)
-
-        url = "{table_name}/schema".format(table_name=self.name)
-
-        data = {'name': self.name, 'ColumnSchema': []}
-
-        for column in columns:
-            data['ColumnSchema'].append({'name': column})
-
-        return url, data
-
     def _update_schema(self, columns, method=None, fail_silently=True):
         """
         Updates current table schema. If not successful, returns appropriate HTTP error status code. If
@@ -841,13 +1901,17 @@ class Table(object):
 
         url, data = self._get_data_for_table_create_or_update(columns)
 
-        response = HttpRequest(
-            connection = self.connection,
-            url = url,
-            data = data,
-            method = method,
-            fail_silently = fail_silently
-            ).get_response()
+        try:
+            response = HttpRequest(
+                connection = self.connection,
+                url = url,
+                data = data,
+                method = method,
+                fail_silently = fail_silently,
+                operation = 'alter'
+                ).get_response()
+        finally:
+            self.invalidate_schema_cache()
 
         return response.status_code
 
@@ -904,18 +1968,40 @@ class Table(object):
         """
         fail_silently = kwargs.get('fail_silently', True)
 
-        columns = set(columns)
-        existing_columns = set(self.columns())
-        remaining_columns = existing_columns - columns
+        # The schema is replaced as a whole, so it's not taken from the cache.
+        schema, column_families = self._get_schema(fail_silently=fail_silently, refresh=True)
+        remaining_columns = column_families - set(columns)
 
         return self._replace_schema(remaining_columns, fail_silently=fail_silently)
 
-    def batch(self, size=None, fail_silently=True):
+    def batch(self, size=None, fail_silently=True, background=False,
+              flush_interval=BATCH_FLUSH_INTERVAL, max_pending=BATCH_MAX_PENDING,
+              flushers=BATCH_FLUSHERS, futures=False, max_bytes=None, max_cells=None,
+              coalesce=False, chunks=None, parallelism=PARALLELISM,
+              max_pending_bytes=BATCH_MAX_PENDING_BYTES):
         """
         Returns a Batch instance. Returns None if table does not exist.
 
-        :param int size: Size of auto-commit. If not given, auto-commit is disabled.
+        :param int size: Size of auto-commit. If not given, auto-commit is disabled (for background
+            batches, defaults to ``BATCH_FLUSH_SIZE``).
         :param bool fail_silently:
+        :param bool background: If set to True, a ``starbase.client.table.batch.BackgroundBatch`` is
+            returned, which sends the rows from flusher threads.
+        :param float flush_interval: Background batches only. See
+            ``starbase.client.table.batch.BackgroundBatch``.
+        :param int max_pending: Background batches only.
+        :param int max_pending_bytes: Background batches only.
+        :param int flushers: Background batches only.
+        :param bool futures: Background batches only.
+        :param int max_bytes: If given, auto-commit is fired as soon as the estimated encoded size of the
+            stacked rows reaches the value given.
+        :param int max_cells: If given, auto-commit is fired as soon as the number of stacked cells reaches
+            the value given.
+        :param bool coalesce: If set to True, mutations of the same row are merged before being sent, last
+            write of a column winning.
+        :param int chunks: If given, commits split the stack into the number of requests given, sent
+            concurrently (not used by background batches, see ``flushers`` instead).
+        :param int parallelism: Maximum number of chunks sent concurrently.
         :return starbase.client.table.batch.Batch:
 
         :example:
@@ -934,44 +2020,12 @@ class Table(object):
             if not self.exists(fail_silently=fail_silently):
                 return None
 
-        return Batch(table=self, size=size)
-
-    @property
-    def check_if_exists_on_schema_operations(self):
-        return True
-
-    @property
-    def check_if_exists_on_batch_operations(self):
-        return True
-
-    def disable_row_operation_if_exists_checks(self):
-        """
-        Disables `exists` method on row operations.
-        """
-        self.check_if_exists_on_row_fetch = False
-        self.check_if_exists_on_row_insert = False
-        self.check_if_exists_on_row_remove = False
-        self.check_if_exists_on_row_update = False
-
-    def enable_row_operation_if_exists_checks(self):
-        """
-        Enables `exists` method on row operations. The opposite of `disable_row_operation_if_exists_checks`.
-        """
-        self.check_if_exists_on_row_fetch = True
-        self.check_if_exists_on_row_insert = True
-        self.check_if_exists_on_row_remove = True
-        self.check_if_exists_on_row_update = True
-
-    def disable_if_exists_checks(self):
-        """
-        Skips calling the `exists` method on any operation.
-        """
-        self.disable_row_operation_if_exists_checks()
-        self.check_if_exists_on_scanner_operations = False
+        if background:
+            return BackgroundBatch(table=self, size=size, flush_interval=flush_interval,
+                                   max_pending=max_pending, flushers=flushers, futures=futures,
+                                   fail_silently=fail_silently, max_bytes=max_bytes,
+                                   max_cells=max_cells, coalesce=coalesce,
+                                   max_pending_bytes=max_pending_bytes)
 
-    def enable_if_exists_checks(self):
-        """
-        Enables `exists` method on any operation. The opposite of `disable_if_exists_checks`.
-        """
-        self.enable_row_operation_if_exists_checks()
-        self.check_if_exists_on_scanner_operations = True
+        return Batch(table=self, size=size, max_bytes=max_bytes, max_cells=max_cells, coalesce=coalesce,
+                     chunks=chunks, parallelism=parallelism)
@@ -2,11 +2,81 @@ __title__ = 'starbase.client.table.batch'
 __author__ = 'Artur Barseghyan'
 __copyright__ = 'Copyright (c) 2013 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
-__all__ = ('Batch',)
+__all__ = ('Batch', 'BackgroundBatch')
 
+import logging
+import threading
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from six.moves import queue
+
+from starbase.translations import _
+from starbase.defaults import (
+    PARALLELISM, BATCH_FLUSH_SIZE, BATCH_FLUSH_INTERVAL, BATCH_MAX_PENDING, BATCH_MAX_PENDING_BYTES,
+    BATCH_FLUSHERS
+)
 from starbase.client.transport import HttpRequest
 from starbase.client.transport.methods import PUT, POST
 
+logger = logging.getLogger(__name__)
+
+# Flusher thread markers
+_FLUSH = object()
+_STOP = object()
+
+# Encoded size of the JSON structure around a row (`{"key": "", "Cell": []}, `) and a cell
+# (`{"column": "", "$": ""}, ` and `, "timestamp": `).
+ROW_OVERHEAD = 25
+CELL_OVERHEAD = 25
+TIMESTAMP_OVERHEAD = 15
+
+def _merge_row(rows, data):
+    """
+    Merges the row data given into the row of the same key (if already stacked). Cells of the same
+    column are replaced (last write wins), others are added.
+
+    :param dict rows: Stacked rows keyed by row key. Values are tuples of row data and dict of cell
+        positions keyed by column.
+    :param dict data: Row data.
+    :return list: None if the row is new, otherwise list of tuples of the merged cells and the cells
+        they replaced (None, if added).
+    """
+    try:
+        stacked, positions = rows[data['key']]
+    except KeyError:
+        rows[data['key']] = (data, dict((cell['column'], index) for index, cell in enumerate(data['Cell'])))
+        return None
+
+    cells = stacked['Cell']
+    merged = []
+    for cell in data['Cell']:
+        position = positions.get(cell['column'])
+        if position is None:
+            positions[cell['column']] = len(cells)
+            cells.append(cell)
+            merged.append((cell, None))
+        else:
+            merged.append((cell, cells[position]))
+            cells[position] = cell
+    return merged
+
+def _coalesce_rows(rows):
+    """
+    Coalesces the rows given per row key (see ``_merge_row``).
+
+    :param iterable rows: Row data.
+    :return list:
+    """
+    stacked = {}
+    coalesced = []
+    for data in rows:
+        if _merge_row(stacked, data) is None:
+            coalesced.append(data)
+    return coalesced
+
+
 class Batch(object):
     """
     Table batch operations.
@@ -14,8 +84,19 @@ class Batch(object):
     :param starbase.client.table.Table table:
     :param int size: Batch size. When set, auto commits stacked records when the stack reaches the
         ``size`` value.
+    :param int max_bytes: When set, auto commits stacked records when their estimated encoded size reaches
+        the ``max_bytes`` value (thus requests are at most ``max_bytes`` plus a single row large).
+    :param int max_cells: When set, auto commits stacked records when the number of their cells reaches
+        the ``max_cells`` value.
+    :param bool coalesce: If set to True, mutations of the same row are merged into a single stacked row,
+        last write of a column winning (older writes, even if given an explicit timestamp, are not sent).
+    :param int chunks: If given, commits split the stack into the number of requests given, sent
+        concurrently (status code of each of them is reported by ``finalize``, along with the rows of the
+        failed ones).
+    :param int parallelism: Maximum number of chunks sent concurrently.
     """
-    def __init__(self, table, size=None):
+    def __init__(self, table, size=None, max_bytes=None, max_cells=None, coalesce=False, chunks=None,
+                 parallelism=PARALLELISM):
         """
         Creates a new batch instance.
 
@@ -23,26 +104,38 @@ class Batch(object):
         """
         self.table = table
         self.size = size
+        self.max_bytes = max_bytes
+        self.max_cells = max_cells
+        self.coalesce = coalesce
+        self.chunks = chunks
+        self.parallelism = parallelism
         self._stack = []
+        self._rows = {}
+        self._bytes = 0
+        self._cells = 0
+        self._row_keys = set()
         self._url = None
         self._method = None
         self._response = []
+        self._failed = []
 
     def __repr__(self):
         return "<starbase.client.batch.Batch> of {0}".format(self.table)
 
-    def _put(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
-        """
-        PUT operation in batch.
+    def _build_row(self, method, row, columns, timestamp=None, encode_content=True):
         """
+        Builds the row data for the operation given. The URL and the method of the batch are set on the
+        first call.
 
+        :return dict:
+        """
         if not self._url:
             self._url = self.table._build_put_url(row, columns)
 
         if not self._method:
-            self._method = PUT
+            self._method = method
 
-        data = self.table._build_table_data(
+        return self.table._build_table_data(
             row,
             columns,
             timestamp = timestamp,
@@ -50,9 +143,97 @@ class Batch(object):
             with_row_declaration = False
             )
 
-        self._stack.append(data)
+    def _append(self, method, row, columns, timestamp=None, encode_content=True):
+        """
+        Stacks the row data for the operation given.
 
-        if self.size and len(self._stack) > self.size:
+        :return bool: True if the stack is full and has to be committed.
+        """
+        data = self._build_row(method, row, columns, timestamp=timestamp, encode_content=encode_content)
+
+        self.table._rows_written([row])
+
+        # Rows to invalidate in the row caches once committed.
+        if self.table._caches_rows:
+            self._row_keys.add(row)
+
+        merged = _merge_row(self._rows, data) if self.coalesce else None
+
+        if merged is None:
+            self._stack.append(data)
+            if self.max_bytes or self.max_cells:
+                number_of_bytes, number_of_cells = self._estimate_size(data)
+                self._bytes += number_of_bytes
+                self._cells += number_of_cells
+
+        elif self.max_bytes or self.max_cells:
+            for cell, replaced in merged:
+                self._bytes += self._estimate_cell_size(cell)
+                if replaced is None:
+                    self._cells += 1
+                else:
+                    self._bytes -= self._estimate_cell_size(replaced)
+
+        return self._is_full(len(self._stack), self._bytes, self._cells)
+
+    def _is_full(self, number_of_rows, number_of_bytes, number_of_cells):
+        """
+        Tells whether the stack of the size given has to be committed.
+
+        :param int number_of_rows:
+        :param int number_of_bytes: Estimated encoded size.
+        :param int number_of_cells:
+        :return bool:
+        """
+        return bool(
+            (self.size and number_of_rows > self.size) or
+            (self.max_bytes and number_of_bytes >= self.max_bytes) or
+            (self.max_cells and number_of_cells >= self.max_cells)
+            )
+
+    @staticmethod
+    def _estimate_size(data):
+        """
+        Estimates the encoded size of the row data given (values are already base64 encoded, unless
+        protobuf is used).
+
+        :param dict data: Row data, as stacked.
+        :return tuple: Number of bytes and number of cells.
+        """
+        cells = data['Cell']
+        number_of_bytes = ROW_OVERHEAD + len(data['key'])
+        for cell in cells:
+            number_of_bytes += Batch._estimate_cell_size(cell)
+        return number_of_bytes, len(cells)
+
+    @staticmethod
+    def _estimate_cell_size(cell):
+        """
+        Estimates the encoded size of the cell given.
+
+        :param dict cell:
+        :return int:
+        """
+        number_of_bytes = CELL_OVERHEAD + len(cell['column']) + len(cell['$'])
+        if 'timestamp' in cell:
+            number_of_bytes += TIMESTAMP_OVERHEAD + len(str(cell['timestamp']))
+        return number_of_bytes
+
+    def _clear_stack(self):
+        """
+        Clears the stack (once committed).
+        """
+        self._stack = []
+        self._rows = {}
+        self._bytes = 0
+        self._cells = 0
+        self._row_keys = set()
+
+    def _put(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
+        """
+        PUT operation in batch.
+        """
+        if self._append(PUT, row, columns, timestamp=timestamp, encode_content=encode_content):
             self.commit(fail_silently=fail_silently)
 
     def insert(self, row, columns, timestamp=None, fail_silently=True):
@@ -62,48 +243,112 @@ class Batch(object):
         """
         POST operation in batch.
         """
-        if not self._url:
-            self._url = self.table._build_post_url(row, columns)
+        if self._append(POST, row, columns, timestamp=timestamp, encode_content=encode_content):
+            self.commit(fail_silently=fail_silently)
 
-        if not self._method:
-            self._method = POST
+    def update(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
+        return self._post(row, columns, timestamp=timestamp, fail_silently=fail_silently)
 
-        data = self.table._build_table_data(
-            row,
-            columns,
-            timestamp = timestamp,
-            encode_content = encode_content,
-            with_row_declaration = False
-            )
+    def _split_stack(self, chunks):
+        """
+        Splits the stack into (at most) the number of chunks given, of (nearly) equal number of rows.
 
-        self._stack.append(data)
+        :param int chunks:
+        :return list: List of lists of rows.
+        """
+        if not chunks or chunks < 2 or len(self._stack) < 2:
+            return [self._stack]
 
-        if self.size and len(self._stack) > self.size:
-            self.commit(fail_silently=fail_silently)
+        chunk_size = -(-len(self._stack) // chunks)
+        return [self._stack[i:i + chunk_size] for i in range(0, len(self._stack), chunk_size)]
 
-    def update(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
-        return self._post(row, columns, timestamp=timestamp, fail_silently=fail_silently)
+    def _commit_results(self, stack_chunks, results):
+        """
+        Records the results of the chunks committed and clears the stack. Chunks that failed (HTTP error
+        or exception raised) are recorded along with their rows (see ``finalize``). The first exception
+        raised (if any) is raised again.
+
+        :param list stack_chunks: List of lists of rows sent.
+        :param list results: Status code or exception raised, per chunk.
+        """
+        self._clear_stack()
+
+        errors = []
+        number_of_failed_rows = 0
+        for rows, result in zip(stack_chunks, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                self._response.append(result)
+                if result < 400:
+                    continue
+
+            self._failed.append({'response': result, 'rows': rows})
+            number_of_failed_rows += len(rows)
+
+        if number_of_failed_rows:
+            logger.warning(
+                _("Failed to commit {0} of {1} rows of table {2}.").format(
+                    number_of_failed_rows, sum(len(rows) for rows in stack_chunks), self.table.name
+                    )
+                )
+
+        if errors:
+            raise errors[0]
 
-    def commit(self, finalize=False, fail_silently=True):
+    def commit(self, finalize=False, fail_silently=True, chunks=None, parallelism=None):
         """
         Sends all queued items to Stargate.
 
+        Chunks succeed or fail on their own. The stack is cleared either way; chunks that failed are
+        reported by ``finalize`` (along with their rows). If ``fail_silently`` is set to False, the error
+        of the (first) failed chunk is raised once all the chunks are sent.
+
         :param bool finalize: If set to True, the batch is finalized, settings are cleared up and response is
             returned.
         :param bool fail_silently:
+        :param int chunks: Number of requests the stack is split into. Defaults to the ``chunks`` value of
+            the batch.
+        :param int parallelism: Maximum number of chunks sent concurrently. Defaults to the ``parallelism``
+            value of the batch.
         :return dict: If `finalize` set to True, returns the returned value of method
             meth::`starbase.client.batch.Batch.finalize`.
         """
-        response = HttpRequest(
-            connection = self.table.connection,
-            url = self._url,
-            data = {"Row" : self._stack},
-            decode_content = False,
-            method = self._method,
-            fail_silently = fail_silently
-            ).get_response()
-        self._response.append(response.status_code)
-        self._stack = []
+        if chunks is None:
+            chunks = self.chunks
+        if parallelism is None:
+            parallelism = self.parallelism
+
+        def send(rows):
+            try:
+                return HttpRequest(
+                    connection = self.table.connection,
+                    url = self._url,
+                    data = {"Row" : rows},
+                    decode_content = False,
+                    method = self._method,
+                    fail_silently = fail_silently,
+                    operation = 'batch'
+                    ).get_response().status_code
+            except Exception as e:
+                return e
+
+        stack_chunks = self._split_stack(chunks)
+
+        try:
+            if len(stack_chunks) > 1 and parallelism > 1:
+                executor = ThreadPoolExecutor(max_workers=min(parallelism, len(stack_chunks)))
+                try:
+                    results = list(executor.map(send, stack_chunks))
+                finally:
+                    executor.shutdown()
+            else:
+                results = [send(rows) for rows in stack_chunks]
+        finally:
+            if self._row_keys:
+                self.table.invalidate_row_cache(self._row_keys)
+
+        self._commit_results(stack_chunks, results)
 
         if finalize:
             return self.finalize()
@@ -112,16 +357,21 @@ class Batch(object):
         """
         Finalize the batch operation. Clear all settings.
 
+        The ``failed`` entry of the response lists the requests that failed, each as a dict of the
+        ``response`` (status code or exception raised) and the ``rows`` sent (as stacked).
+
         :return dict:
         """
         response = {
             'url': self._url,
             'method': self._method,
-            'response': self._response
+            'response': self._response,
+            'failed': self._failed
         }
         self._url = None
         self._method = None
         self._response = []
+        self._failed = []
         return response
 
     def outgoing(self):
@@ -131,3 +381,332 @@ class Batch(object):
         :return int:
         """
         return len(self._stack)
+
+
+class BackgroundBatch(Batch):
+    """
+    Table batch operations, committed in background.
+
+    Rows are queued and sent by a flusher thread (in chunks of ``size`` rows, or whatever has been queued
+    when ``flush_interval`` seconds passed since the first row of the chunk), so that ``insert`` and
+    ``update`` return immediately. Producers block only when ``max_pending`` rows are waiting to be queued,
+    or when the estimated encoded size of the rows not sent yet reaches ``max_pending_bytes``.
+
+    Chunks are sent on a pool of ``flushers`` threads. With more than one flusher, chunks may be applied
+    out of order (thus writes of the same cell may as well).
+
+    Inserts (PUT) and updates (POST) can be mixed; the chunk is sent as soon as the operation changes.
+
+    :param starbase.client.table.Table table:
+    :param int size: Number of rows sent per request.
+    :param int max_bytes: If given, requests are sent as soon as the estimated encoded size of the chunk
+        reaches the ``max_bytes`` value.
+    :param int max_cells: If given, requests are sent as soon as the number of cells of the chunk reaches
+        the ``max_cells`` value.
+    :param bool coalesce: If set to True, mutations of the same row are merged (per chunk) before being
+        sent, last write of a column winning. Thresholds apply to the chunk before merging.
+    :param float flush_interval: Maximum number of seconds rows wait for the chunk to fill.
+    :param int max_pending: Maximum number of rows queued.
+    :param int max_pending_bytes: Maximum estimated encoded size (in bytes) of the rows queued, collected
+        into chunks or being sent (a single row larger than that is let through when nothing else is
+        pending). Rows waiting for their chunk to fill are sent right away when a producer blocks on it.
+    :param int flushers: Number of threads sending the requests.
+    :param bool futures: If set to True, ``insert`` and ``update`` return a
+        ``concurrent.futures.Future``, resolved with the status code of the request the row was sent with.
+    :param bool fail_silently: If set to False, failed requests raise an exception (in the futures of the
+        rows sent and on the next ``commit``).
+
+    :example:
+    >>> batch = table.batch(background=True, size=500, futures=True)
+    >>> future = batch.insert('row1', {'column1': {'id': '1'}})
+    >>> batch.insert('row2', {'column1': {'id': '2'}})
+    >>> future.result()
+    200
+    >>> batch.commit(finalize=True)
+    """
+    def __init__(self, table, size=BATCH_FLUSH_SIZE, flush_interval=BATCH_FLUSH_INTERVAL,
+                 max_pending=BATCH_MAX_PENDING, flushers=BATCH_FLUSHERS, futures=False, fail_silently=True,
+                 max_bytes=None, max_cells=None, coalesce=False, max_pending_bytes=BATCH_MAX_PENDING_BYTES):
+        """
+        Creates a new background batch instance.
+
+        See docs above.
+        """
+        super(BackgroundBatch, self).__init__(table, size=size or BATCH_FLUSH_SIZE, max_bytes=max_bytes,
+                                              max_cells=max_cells, coalesce=coalesce)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_pending_bytes = max_pending_bytes
+        self.flushers = flushers
+        self.futures = futures
+        self.fail_silently = fail_silently
+
+        self._queue = queue.Queue(maxsize=max_pending or 0)
+        self._lock = threading.Lock()
+        self._capacity = threading.Condition()
+        self._pending_bytes = 0
+        self._slots = threading.Semaphore(flushers)
+        self._errors = []
+        self._outgoing = 0
+        self._thread = None
+        self._executor = None
+
+    def __repr__(self):
+        return "<starbase.client.batch.BackgroundBatch> of {0}".format(self.table)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _start(self):
+        """
+        Starts the flusher threads (if not yet running).
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.flushers)
+            self._thread = threading.Thread(target=self._collect, name='starbase-batch-flusher')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _enqueue(self, method, row, columns, timestamp=None, encode_content=True):
+        """
+        Queues the row data for the operation given. Blocks while the queue is full (or the rows pending are
+        too large).
+
+        :return concurrent.futures.Future: None unless ``futures`` is set to True.
+        """
+        data = self._build_row(method, row, columns, timestamp=timestamp, encode_content=encode_content)
+        future = Future() if self.futures else None
+        self.table._rows_written([row])
+
+        if self.max_bytes or self.max_cells or self.max_pending_bytes:
+            number_of_bytes, number_of_cells = self._estimate_size(data)
+        else:
+            number_of_bytes, number_of_cells = 0, 0
+
+        self._start()
+        if self.max_pending_bytes:
+            self._reserve(number_of_bytes)
+        with self._lock:
+            self._outgoing += 1
+        self._queue.put((method, data, future, number_of_bytes, number_of_cells, row))
+
+        return future
+
+    def _reserve(self, number_of_bytes):
+        """
+        Waits until the rows pending leave room for the number of bytes given (see ``max_pending_bytes``)
+        and counts them in.
+
+        :param int number_of_bytes: Estimated encoded size of the row.
+        """
+        flushed = False
+        while True:
+            with self._capacity:
+                if not self._pending_bytes or \
+                        self._pending_bytes + number_of_bytes <= self.max_pending_bytes:
+                    self._pending_bytes += number_of_bytes
+                    return
+                if flushed:
+                    self._capacity.wait()
+                    continue
+
+            # Rows waiting for their chunk to fill would not be sent before the flush interval passes.
+            self._queue.put(_FLUSH)
+            flushed = True
+
+    def _release(self, number_of_bytes):
+        """
+        Counts out the number of bytes given (of the rows sent) and wakes up the blocked producers.
+
+        :param int number_of_bytes:
+        """
+        with self._capacity:
+            self._pending_bytes -= number_of_bytes
+            self._capacity.notify_all()
+
+    def _put(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
+        """
+        PUT operation in background batch.
+        """
+        return self._enqueue(PUT, row, columns, timestamp=timestamp, encode_content=encode_content)
+
+    def _post(self, row, columns, timestamp=None, encode_content=True, fail_silently=True):
+        """
+        POST operation in background batch.
+        """
+        return self._enqueue(POST, row, columns, timestamp=timestamp, encode_content=encode_content)
+
+    def _collect(self):
+        """
+        Flusher thread. Collects the queued rows into chunks and hands them over to the senders.
+        """
+        chunk = []
+        method = None
+        deadline = None
+        chunk_bytes = chunk_cells = 0
+
+        while True:
+            timeout = None if deadline is None else max(deadline - time.time(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                # Flush interval passed.
+                self._submit(method, chunk)
+                chunk, method, deadline = [], None, None
+                chunk_bytes = chunk_cells = 0
+                continue
+
+            if item is _FLUSH or item is _STOP:
+                self._submit(method, chunk)
+                chunk, method, deadline = [], None, None
+                chunk_bytes = chunk_cells = 0
+                self._queue.task_done()
+                if item is _STOP:
+                    return
+                continue
+
+            if chunk and item[0] != method:
+                self._submit(method, chunk)
+                chunk, deadline = [], None
+                chunk_bytes = chunk_cells = 0
+
+            method = item[0]
+            chunk.append(item)
+            chunk_bytes += item[3]
+            chunk_cells += item[4]
+            if deadline is None and self.flush_interval:
+                deadline = time.time() + self.flush_interval
+
+            if len(chunk) >= self.size or \
+                    (self.max_bytes and chunk_bytes >= self.max_bytes) or \
+                    (self.max_cells and chunk_cells >= self.max_cells):
+                self._submit(method, chunk)
+                chunk, method, deadline = [], None, None
+                chunk_bytes = chunk_cells = 0
+
+    def _submit(self, method, chunk):
+        """
+        Hands the chunk given over to a sender. Blocks while all the senders are busy.
+
+        :param str method:
+        :param list chunk: Queued items.
+        """
+        if not chunk:
+            return
+        self._slots.acquire()
+        self._executor.submit(self._send, method, chunk)
+
+    def _send(self, method, chunk):
+        """
+        Sends the chunk given and resolves the futures of its rows.
+
+        :param str method:
+        :param list chunk: Queued items.
+        """
+        try:
+            rows = [item[1] for item in chunk]
+            try:
+                if self.coalesce:
+                    rows = _coalesce_rows(rows)
+
+                try:
+                    response = HttpRequest(
+                        connection = self.table.connection,
+                        url = self._url,
+                        data = {"Row" : rows},
+                        decode_content = False,
+                        method = method,
+                        fail_silently = self.fail_silently,
+                        operation = 'batch'
+                        ).get_response()
+                finally:
+                    self.table.invalidate_row_cache([item[5] for item in chunk])
+            except Exception as e:
+                logger.debug(_("Background batch commit failed: {0}").format(e))
+                with self._lock:
+                    self._errors.append(e)
+                    self._failed.append({'response': e, 'rows': rows})
+                    self._outgoing -= len(chunk)
+                for item in chunk:
+                    future = item[2]
+                    if future is not None:
+                        future.set_exception(e)
+            else:
+                with self._lock:
+                    self._response.append(response.status_code)
+                    if response.status_code >= 400:
+                        self._failed.append({'response': response.status_code, 'rows': rows})
+                    self._outgoing -= len(chunk)
+                for item in chunk:
+                    future = item[2]
+                    if future is not None:
+                        future.set_result(response.status_code)
+        finally:
+            self._slots.release()
+            if self.max_pending_bytes:
+                self._release(sum(item[3] for item in chunk))
+            for item in chunk:
+                self._queue.task_done()
+
+    def commit(self, finalize=False, fail_silently=None):
+        """
+        Sends all queued items to Stargate and waits until they are acknowledged.
+
+        :param bool finalize: If set to True, the batch is finalized, flusher threads are stopped, settings
+            are cleared up and response is returned.
+        :param bool fail_silently: If set to False, the first exception raised by a failed request (since
+            the last commit) is raised. Defaults to the ``fail_silently`` of the batch.
+        :return dict: If `finalize` set to True, returns the returned value of method
+            meth::`starbase.client.batch.Batch.finalize`.
+        """
+        if fail_silently is None:
+            fail_silently = self.fail_silently
+
+        if self._thread is not None:
+            self._queue.put(_STOP if finalize else _FLUSH)
+            self._queue.join()
+            if finalize:
+                self._stop()
+
+        with self._lock:
+            errors, self._errors = self._errors, []
+
+        if errors and not fail_silently:
+            raise errors[0]
+
+        if finalize:
+            return self.finalize()
+
+    def _stop(self):
+        """
+        Stops the flusher threads (once the queue is drained).
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+
+        if thread is not None:
+            thread.join()
+            executor.shutdown()
+
+    def close(self):
+        """
+        Sends all queued items and stops the flusher threads.
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._queue.join()
+        self._stop()
+
+    def outgoing(self):
+        """
+        Returns number of rows not acknowledged yet.
+
+        :return int:
+        """
+        return self._outgoing
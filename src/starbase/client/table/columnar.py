@@ -0,0 +1,244 @@
+__title__ = 'starbase.client.table.columnar'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('ColumnarResult',)
+
+import binascii
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from six import PY3
+
+from starbase.translations import _
+from starbase.exceptions import ImproperlyConfigured
+from starbase.defaults import COLUMNAR_INT_FILL_VALUE
+from starbase.json_decoder import decode_value
+
+NAN = float('nan')
+
+class ColumnarResult(object):
+    """
+    Rows stored column by column: a list of row keys and a ``{"family:qualifier": values}`` dict, where
+    all the values are aligned with the row keys.
+
+    Columns with the ``int64`` codec registered are stored in ``array.array('q')``, those with the
+    ``float64`` codec in ``array.array('d')``, others in plain lists. Missing values are ``None`` in lists,
+    NaN in float arrays and ``int_fill_value`` in int arrays. Arrays having missing values get a mask in
+    ``masks``: an ``array.array('B')`` aligned with the row keys, where 1 marks a missing value (thus
+    missing values can be told apart from the actual zeros and NaNs).
+
+    Rows are added one by one (as raw Stargate rows), so that the result is built while the scanner
+    streams, without ever holding the rows themselves.
+
+    If the same column is given more than once for a row (multiple versions), the first value is kept.
+
+    Columns are padded (with missing values) when they next get a value, or when ``columns`` or
+    ``masks`` are read, rather than on every row added.
+
+    :param starbase.client.codecs.CodecRegistry codecs: Codecs to decode the values with.
+    :param bool decode: If set to True, rows are base64 decoded (JSON). Protobuf rows and the rows
+        returned in raw mode come already decoded.
+    :param int int_fill_value: Value of the missing cells of the int arrays.
+
+    :example:
+    >>> result = table.fetch_all_rows(columnar=True)
+    >>> result.keys
+    ['row1', 'row2', 'row3']
+    >>> result.columns
+    {'stats:views': array('q', [12, 7, 0]), 'meta:name': ['lorem', None, 'ipsum']}
+    >>> result.masks
+    {'stats:views': array('B', [0, 0, 1])}
+    """
+    def __init__(self, codecs=None, decode=True, int_fill_value=COLUMNAR_INT_FILL_VALUE):
+        self.keys = []
+        self._columns = {}
+        self._masks = {}
+        self._padded_size = 0
+        self.codecs = codecs
+        self.decode = decode
+        self.int_fill_value = int_fill_value
+        self._column_codecs = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        return "<starbase.client.table.columnar.ColumnarResult ({0} rows, {1} columns)>".format(
+            len(self.keys), len(self._columns)
+            )
+
+    @property
+    def columns(self):
+        """
+        Column values, keyed by column ("family:qualifier"), aligned with the row keys.
+
+        :return dict:
+        """
+        self._pad_columns()
+        return self._columns
+
+    @property
+    def masks(self):
+        """
+        Masks of the int and float arrays having missing values (1 marks a missing value), keyed by
+        column.
+
+        :return dict:
+        """
+        self._pad_columns()
+        return self._masks
+
+    def _pad_columns(self):
+        """
+        Pads all the columns up to the number of rows (columns are otherwise padded only when they next
+        get a value).
+        """
+        size = len(self.keys)
+        if self._padded_size == size:
+            return
+
+        for column, values in self._columns.items():
+            self._pad(column, values, size)
+        self._padded_size = size
+
+    def _get_codec(self, column):
+        """
+        Gets the codec of the column given (cached).
+
+        :param str column:
+        :return starbase.client.codecs.Codec:
+        """
+        try:
+            return self._column_codecs[column]
+        except KeyError:
+            column_family, _sep, qualifier = column.partition(':')
+            codec = self.codecs.get(column_family, qualifier)
+            self._column_codecs[column] = codec
+            return codec
+
+    def _pad(self, column, values, size):
+        """
+        Pads the column values with missing values up to the size given (and marks them as missing in
+        the mask of the column, if an array).
+
+        :param str column:
+        :param array.array|list values:
+        :param int size:
+        :return array.array|list: Column values.
+        """
+        number_missing = size - len(values)
+        if number_missing <= 0:
+            return values
+
+        if isinstance(values, array):
+            mask = self._masks.get(column)
+            if mask is None:
+                mask = self._masks[column] = array('B', [0]) * len(values)
+            mask.extend([1] * number_missing)
+            values.extend([NAN if 'd' == values.typecode else self.int_fill_value] * number_missing)
+            return values
+
+        values.extend([None] * number_missing)
+        return values
+
+    def append(self, row_data):
+        """
+        Adds a single row.
+
+        :param dict row_data: Row, as found in the ``Row`` list of the Stargate response.
+        """
+        index = len(self.keys)
+        decode = self.decode
+        columns = self._columns
+        masks = self._masks
+
+        key = row_data['key']
+        if decode:
+            key = decode_value(key)
+        self.keys.append(key)
+
+        cells = row_data['Cell']
+        if isinstance(cells, dict):
+            cells = [cells]
+
+        for cell in cells:
+            column = cell['column']
+            value = cell['$']
+
+            if decode:
+                column = decode_value(column)
+            elif PY3 and isinstance(column, bytes):
+                column = column.decode('utf8')
+
+            codec = self._get_codec(column) if self.codecs else None
+
+            values = columns.get(column)
+            if values is None:
+                if codec is not None and 'int64' == codec.name:
+                    values = array('q')
+                elif codec is not None and 'float64' == codec.name:
+                    values = array('d')
+                else:
+                    values = []
+                columns[column] = values
+
+            # Column already set for this row (multiple versions).
+            if len(values) > index:
+                continue
+
+            values = self._pad(column, values, index)
+
+            if codec is not None:
+                if decode:
+                    value = binascii.a2b_base64(value)
+                elif not isinstance(value, bytes):
+                    value = value.encode('utf8')
+                value = codec.decode(value)
+            elif decode:
+                value = decode_value(value)
+
+            values.append(value)
+            if column in masks:
+                masks[column].append(0)
+
+    def extend(self, rows):
+        """
+        Adds the rows given.
+
+        :param iterable rows: Rows, as found in the ``Row`` list of the Stargate response.
+        """
+        for row_data in rows:
+            self.append(row_data)
+
+    def to_numpy(self, masked=False):
+        """
+        Converts the result into NumPy arrays. Int and float arrays are converted without copying (thus
+        can't be extended afterwards). Requires ``numpy``.
+
+        :param bool masked: If set to True, int and float arrays having missing values are converted
+            into ``numpy.ma.MaskedArray``, missing values masked (see ``masks``).
+        :return tuple: Row keys array and dict of column arrays.
+        """
+        if numpy is None:
+            raise ImproperlyConfigured(_("The ``numpy`` package is required for NumPy conversion."))
+
+        columns = {}
+        for column, values in self.columns.items():
+            if isinstance(values, array):
+                columns[column] = numpy.frombuffer(
+                    values, dtype=numpy.int64 if 'q' == values.typecode else numpy.float64
+                    )
+                if masked and column in self.masks:
+                    columns[column] = numpy.ma.MaskedArray(
+                        columns[column], mask=numpy.frombuffer(self.masks[column], dtype=numpy.bool_)
+                        )
+            else:
+                columns[column] = numpy.array(values, dtype=object)
+
+        return numpy.array(self.keys, dtype=object), columns
@@ -4,18 +4,33 @@ __copyright__ = 'Copyright (c) 2013 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
 __all__ = ('Scanner',)
 
-import base64
+import logging
 
-from starbase.json_decoder import json_decode
-from starbase.client.transport import HttpRequest
+from starbase.exceptions import DatabaseError
+from starbase.json_decoder import decode_row
+from starbase.client.transport import HttpRequest, status_codes
 from starbase.client.transport.methods import PUT, POST, GET, DELETE
+from starbase.client.table.columnar import ColumnarResult
+from starbase.translations import _
+
+logger = logging.getLogger(__name__)
 
 class Scanner(object):
     """
     Table scanner operations.
+
+    Nothing is fetched on initialisation. Rows are fetched batch by batch while iterating through the
+    ``results``.
+
+    :param starbase.client.table.Table table:
+    :param str url: Scanner URL (as returned in the ``Location`` header).
+    :param int batch_size: Maximum number of cells fetched per request, as configured on scanner
+        creation.
+    :param bool fail_silently: If set to False, failed batch requests raise an exception. Otherwise, they
+        are logged and the scan stops.
     """
     def __init__(self, table, url, batch_size=None, start_row=None, end_row=None, start_time=None, end_time=None, \
-                 data={}, extra_headers={}, method=None):
+                 data={}, extra_headers={}, method=None, fail_silently=True):
         self.table = table
         self.url = url
         self.batch_size = batch_size
@@ -24,45 +39,118 @@ class Scanner(object):
         self.start_time = start_time
         self.end_time = end_time
         self.id = url.split('/')[-1]
-        url = '{table_name}/scanner/{scanner_id}'.format(table_name=self.table.name, scanner_id=self.id)
-
-        def encode_data(data):
-            encoded = {}
-            for key, value in data.items():
-                encoded.update({base64.b64encode(key): base64.b64encode(value)})
-            return encoded
-
-        self.response = HttpRequest(
-            connection = self.table.connection,
-            url = url,
-            data = encode_data(data),
-            #extra_headers = extra_headers,
-            #method = method
-            ).get_response()
+        self.fail_silently = fail_silently
+        self.deleted = False
+
+    def _build_url(self):
+        """
+        Scanner URL relative to the Stargate base URL.
+
+        :return str:
+        """
+        return '{table_name}/scanner/{scanner_id}'.format(table_name=self.table.name, scanner_id=self.id)
 
     def delete(self):
         """
         Delete scanner.
         """
-        url = '{table_name}/scanner/{scanner_id}'.format(table_name=self.table.name, scanner_id=self.id)
-        response = HttpRequest(connection=self.table.connection, url=url, method=DELETE).get_response()
+        response = HttpRequest(connection=self.table.connection, url=self._build_url(), method=DELETE).get_response()
+        self.deleted = True
         return response.status_code
 
+    def batches(self, materialize=None):
+        """
+        Fetches the scanner batches one by one, until Stargate responds with 204 (no content). Only one
+        batch is held in memory at a time. Any other response than 200 or 204 is a failure: it raises an
+        exception (unless ``fail_silently`` is set, in which case it is logged and the scan stops).
+
+        :param callable materialize: If given, turns the list of raw rows of each batch into the list
+            of rows yielded. Timed as the ``decode`` phase of the batch request (see request hooks).
+        :return generator: Generator of lists of raw (not decoded) rows, unless materialized.
+        :raise requests.exceptions.HTTPError|starbase.exceptions.DatabaseError:
+        """
+        materialize_batch = None
+        if materialize is not None:
+            def materialize_batch(results):
+                if results and results.get('Row'):
+                    results['Row'] = materialize(results['Row'])
+                return results
+
+        while True:
+            response = HttpRequest(connection=self.table.connection, url=self._build_url(), method=GET,
+                                   fail_silently=self.fail_silently, materialize=materialize_batch).get_response()
+
+            if status_codes.STATUS_CODE_NO_CONTENT == response.status_code:
+                return
+
+            if status_codes.STATUS_CODE_OK != response.status_code:
+                message = _("Scanner {0} of table {1} failed with status {2}; scan incomplete.").format(
+                    self.id, self.table.name, response.status_code
+                    )
+                if not self.fail_silently:
+                    raise DatabaseError(message)
+                logger.warning(message)
+                return
+
+            results = response.content
+            if not results or not results.get('Row'):
+                return
+
+            yield results['Row']
+
     def results(self, with_row_id=False, raw=False, perfect_dict=None):
-        results = self.response.content
+        """
+        Streams the scanner rows. The scanner is deleted once all the rows are fetched (or the generator
+        is closed).
 
+        :param bool with_row_id: If set to True, returned along with row id.
+        :param bool raw: If set to True, decoded, but otherwise unprocessed rows are returned.
+        :param bool perfect_dict:
+        :return generator:
+        """
         if perfect_dict is None:
             perfect_dict = self.table.connection.perfect_dict
 
-        if results and results['Row']:
-            for item in results['Row']:
-                if raw:
-                    yield json_decode(item)
-                yield self.table.__class__._extract_row_data(
-                    json_decode(item),
-                    perfect_dict = perfect_dict,
-                    with_row_id=with_row_id
-                    )
+        # Protobuf rows come already decoded.
+        decode = self.table._base64_encoded
+        codecs = self.table.codecs or None
+        materialize_row = self.table.__class__._materialize_row
+
+        if raw:
+            materialize = (lambda rows: [decode_row(item) for item in rows]) if decode else None
+        else:
+            materialize = lambda rows: [
+                materialize_row(item, with_row_id=with_row_id, perfect_dict=perfect_dict, decode=decode,
+                                codecs=codecs)
+                for item in rows
+                ]
+
+        try:
+            for batch in self.batches(materialize):
+                for row in batch:
+                    yield row
+        finally:
+            if not self.deleted:
+                self.delete()
+
+    def columnar_results(self):
+        """
+        Fetches all the scanner rows into a columnar result, batch by batch. The scanner is deleted
+        afterwards.
+
+        :return starbase.client.table.columnar.ColumnarResult:
+        """
+        result = ColumnarResult(codecs=self.table.codecs or None, decode=self.table._base64_encoded)
+
+        def materialize(rows):
+            result.extend(rows)
+            return rows
+
+        try:
+            for batch in self.batches(materialize):
+                pass
+        finally:
+            if not self.deleted:
+                self.delete()
 
-        #for item in self.response.content:
-        #    yield item
+        return result
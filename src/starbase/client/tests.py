@@ -3,6 +3,9 @@ __author__ = 'Artur Barseghyan'
 __copyright__ = 'Copyright (c) 2013 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
 
+import base64
+import email.utils
+import json
 import threading
 import multiprocessing
 import unittest
@@ -10,6 +13,10 @@ import uuid
 import shutil
 import os
 import binascii
+import time
+import zlib
+
+from array import array
 
 PROJECT_DIR = lambda base : os.path.abspath(os.path.join(os.path.dirname(__file__), base).replace('\\','/'))
 
@@ -29,10 +36,21 @@ except ImportError:
     else:
         from urllib2 import build_opener
 
+import requests
 from requests.exceptions import HTTPError
 
 from starbase import Connection, Table
-from starbase.exceptions import DoesNotExist, ParseError
+from starbase.exceptions import DoesNotExist, ParseError, ImproperlyConfigured
+from starbase.client.cache import TTLCache, RowCache, BloomFilter
+from starbase.client.transport.hooks import RequestHook, RequestInfo, parse_url, operation_name
+from starbase.client.metrics import Histogram, MetricsRegistry
+from starbase.client.codecs import CODECS, CodecRegistry
+from starbase.client.helpers import build_json_data
+from starbase.client.table.columnar import ColumnarResult
+from starbase.client.table.batch import Batch
+from starbase.client.transport import HttpRequest
+from starbase.client.transport.methods import PUT
+from starbase.client.transport.retry import RetryPolicy, parse_retry_after
 
 HOST = '127.0.0.1'
 PORT = 8000
@@ -417,6 +435,47 @@ class StarbaseClient02TableTest(unittest.TestCase):
         """
         return self.test_06_table_batch_post_multiple_column_data(process_number=process_number, perfect_dict=True)
 
+    @print_info
+    def test_07a_table_background_batch_put(self):
+        """
+        Insert rows with a background batch (flushed from a flusher thread).
+        """
+        batch = self.table.batch(background=True, size=3, futures=True)
+
+        futures = []
+        for i in range(0, NUM_ROWS):
+            futures.append(batch.insert('row_background_{0}'.format(i), {
+                COLUMN_FROM_USER: {FIELD_FROM_USER_ID: str(i), FIELD_FROM_USER_NAME: 'John Doe'},
+                }))
+
+        batch.commit()
+        self.assertEqual([future.result() for future in futures], [200] * NUM_ROWS)
+        self.assertEqual(batch.outgoing(), 0)
+
+        res = batch.commit(finalize=True)
+        self.assertEqual(res.get('response', None), [200] * 4)
+        self.assertEqual(self.table.fetch('row_background_9', perfect_dict=True),
+                         {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: '9', FIELD_FROM_USER_NAME: 'John Doe'}})
+        return res
+
+    @print_info
+    def test_07b_table_batch_put_chunked(self):
+        """
+        Insert rows in batch, committed in chunks sent concurrently.
+        """
+        batch = self.table.batch(chunks=4, parallelism=4)
+
+        for i in range(0, NUM_ROWS):
+            batch.insert('row_chunked_{0}'.format(i), {
+                COLUMN_FROM_USER: {FIELD_FROM_USER_ID: str(i), FIELD_FROM_USER_NAME: 'John Doe'},
+                })
+
+        res = batch.commit(finalize=True)
+        self.assertEqual(res.get('response', None), [200] * 4)
+        self.assertEqual(self.table.fetch('row_chunked_9', perfect_dict=True),
+                         {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: '9', FIELD_FROM_USER_NAME: 'John Doe'}})
+        return res
+
     def __table_put_column_data_2(self, key, num_rows):
         res = []
 
@@ -1044,6 +1103,38 @@ class StarbaseClient02TableTest(unittest.TestCase):
 
         return (r1, r2, r3, r4)
 
+    @print_info
+    def test_24a_test_materialize_row(self):
+        """
+        Test ``_materialize_row`` method of ``starbase.client.Table`` (both raw and decoded input).
+        """
+        self.__set_test_23_data()
+
+        r1 = Table._materialize_row(self.sample_1['Row'], perfect_dict=True, decode=False)
+        self.assertEqual(r1, self.sample_1_output_pd)
+
+        r2 = Table._materialize_row(self.sample_4['Row'], perfect_dict=True, decode=False)
+        self.assertEqual(r2, self.sample_4_output_pd)
+
+        r3 = Table._materialize_row(self.sample_4['Row'], perfect_dict=False, decode=False)
+        self.assertEqual(r3, self.sample_4_output)
+
+        encoded_row = {
+            'key': base64.b64encode(b'key1').decode('utf8'),
+            'Cell': [
+                {'column': base64.b64encode(b'ColFam:Col1').decode('utf8'),
+                 '$': base64.b64encode(b'someData').decode('utf8'), 'timestamp': 1369247627546},
+                {'column': base64.b64encode(b'ColFam:Col1').decode('utf8'),
+                 '$': base64.b64encode(b'olderData').decode('utf8'), 'timestamp': 1369247627545},
+            ]
+        }
+
+        # The first (latest) value of a column wins in perfect dict mode.
+        r4 = Table._materialize_row(encoded_row, with_row_id=True, perfect_dict=True)
+        self.assertEqual(r4, {'key1': self.sample_1_output_pd})
+
+        return (r1, r2, r3, r4)
+
     def __insert_binary_file(self, url):
         """
         Insert a binary file. First download the file and then insert.
@@ -1319,5 +1410,565 @@ class StarbaseClient03TableTestDisabledIfExists(unittest.TestCase):
         return res
 
 
+class StarbaseClient04CodecsTest(unittest.TestCase):
+    """
+    Cell value codecs tests. No Stargate needed.
+    """
+    def setUp(self):
+        self.connection = Connection(HOST, PORT, content_type='json')
+        self.table = self.connection.table(TABLE_NAME, codecs={
+            COLUMN_FROM_USER: 'int64',
+            '{0}:{1}'.format(COLUMN_FROM_USER, FIELD_FROM_USER_NAME): 'utf8',
+            })
+        self.table.register_codec(COLUMN_MESSAGE, 'json')
+        self.table.register_codec('{0}:{1}'.format(COLUMN_MESSAGE, FIELD_MESSAGE_PRIORITY), 'float64')
+        self.columns = {
+            COLUMN_FROM_USER: {FIELD_FROM_USER_ID: -123, FIELD_FROM_USER_NAME: 'John Doe'},
+            COLUMN_MESSAGE: {FIELD_MESSAGE_BODY: {'lorem': ['ipsum', 1]}, FIELD_MESSAGE_PRIORITY: 0.25},
+            COLUMN_TO_USER: {FIELD_TO_USER_AVATAR: b'\x00\xff'},
+            }
+
+    @print_info
+    def test_01_codecs(self):
+        """
+        Test encoding/decoding with the available codecs.
+        """
+        for name, codec in CODECS.items():
+            value = {'bytes': b'\x00\xff', 'int64': -2**63, 'float64': 1.5, 'utf8': 'lorem', 'json': [1, 'a']}[name]
+            encoded = codec.encode(value)
+            self.assertTrue(isinstance(encoded, bytes))
+            self.assertEqual(codec.decode(encoded), value)
+
+        self.assertEqual(CODECS['int64'].encode(1), b'\x00\x00\x00\x00\x00\x00\x00\x01')
+        self.assertRaises(ImproperlyConfigured, self.table.register_codec, COLUMN_TO_USER, 'int128')
+
+    @print_info
+    def test_02_write_and_read(self):
+        """
+        Test that values are encoded with the registered codecs on writes and decoded on reads.
+        """
+        data = self.table._build_table_data('row1', self.columns, encode_content=True)
+        cells = dict(
+            (base64.b64decode(cell['column']), base64.b64decode(cell['$'])) for cell in data['Row'][0]['Cell']
+            )
+        self.assertEqual(cells['{0}:{1}'.format(COLUMN_FROM_USER, FIELD_FROM_USER_ID).encode('utf8')],
+                         b'\xff\xff\xff\xff\xff\xff\xff\x85')
+        self.assertEqual(cells['{0}:{1}'.format(COLUMN_TO_USER, FIELD_TO_USER_AVATAR).encode('utf8')], b'\x00\xff')
+
+        res = Table._materialize_row(data['Row'][0], perfect_dict=True, codecs=self.table.codecs)
+        self.assertEqual(res, self.columns)
+
+        return res
+
+
+class StarbaseClient05ColumnarTest(unittest.TestCase):
+    """
+    Columnar result tests. No Stargate needed.
+    """
+    def setUp(self):
+        self.codecs = CodecRegistry({COLUMN_FROM_USER: 'int64', COLUMN_MESSAGE: 'float64'})
+        self.rows = [
+            {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: 1}, COLUMN_MESSAGE: {FIELD_MESSAGE_PRIORITY: 0.5},
+             COLUMN_TO_USER: {FIELD_TO_USER_NAME: 'John Doe'}},
+            {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: 2}, COLUMN_TO_USER: {FIELD_TO_USER_NAME: 'Lorem Ipsum'}},
+            {COLUMN_MESSAGE: {FIELD_MESSAGE_PRIORITY: 1.5}},
+            ]
+
+    @print_info
+    def test_01_columnar_result(self):
+        """
+        Test building the columnar result out of raw rows.
+        """
+        result = ColumnarResult(codecs=self.codecs)
+        for index, columns in enumerate(self.rows):
+            result.append(build_json_data('row{0}'.format(index), columns, encode_content=True,
+                                          with_row_declaration=False,
+                                          codecs=self.codecs))
+
+        from_user_id = '{0}:{1}'.format(COLUMN_FROM_USER, FIELD_FROM_USER_ID)
+        message_priority = '{0}:{1}'.format(COLUMN_MESSAGE, FIELD_MESSAGE_PRIORITY)
+        to_user_name = '{0}:{1}'.format(COLUMN_TO_USER, FIELD_TO_USER_NAME)
+
+        self.assertEqual(result.keys, ['row0', 'row1', 'row2'])
+        self.assertEqual(result.columns[to_user_name], ['John Doe', 'Lorem Ipsum', None])
+
+        # Float arrays get NaN for missing values, int arrays the fill value; both are masked.
+        self.assertEqual(result.columns[message_priority].typecode, 'd')
+        self.assertEqual(result.columns[message_priority][0], 0.5)
+        self.assertTrue(result.columns[message_priority][1] != result.columns[message_priority][1])
+        self.assertEqual(result.columns[from_user_id], array('q', [1, 2, 0]))
+        self.assertEqual(result.masks, {from_user_id: array('B', [0, 0, 1]),
+                                        message_priority: array('B', [0, 1, 0])})
+
+        fill_result = ColumnarResult(codecs=self.codecs, int_fill_value=-1)
+        fill_result.extend(build_json_data('row{0}'.format(index), columns, encode_content=True,
+                                           with_row_declaration=False, codecs=self.codecs)
+                           for index, columns in enumerate(reversed(self.rows)))
+        self.assertEqual(fill_result.columns[from_user_id], array('q', [-1, 2, 1]))
+        self.assertEqual(fill_result.masks[from_user_id], array('B', [1, 0, 0]))
+
+        # Columns are padded once read, or when they next get a value.
+        lazy_result = ColumnarResult(codecs=self.codecs)
+        for index, columns in enumerate(self.rows[:2] + self.rows[:1]):
+            lazy_result.append(build_json_data('row{0}'.format(index), columns, encode_content=True,
+                                               with_row_declaration=False, codecs=self.codecs))
+        self.assertEqual(len(lazy_result._columns[message_priority]), 3)
+        self.assertEqual(lazy_result._columns[message_priority][2], 0.5)
+        lazy_result.append(build_json_data('row3', self.rows[2], encode_content=True, with_row_declaration=False,
+                                           codecs=self.codecs))
+        self.assertEqual(len(lazy_result._columns[to_user_name]), 3)
+        self.assertEqual(lazy_result.columns[to_user_name], ['John Doe', 'Lorem Ipsum', 'John Doe', None])
+        self.assertEqual(lazy_result.masks, {from_user_id: array('B', [0, 0, 0, 1]),
+                                             message_priority: array('B', [0, 1, 0, 0])})
+
+        return result
+
+
+class StarbaseClient06BatchTest(unittest.TestCase):
+    """
+    Batch stacking tests. No Stargate needed.
+    """
+    def setUp(self):
+        self.connection = Connection(HOST, PORT, content_type='json')
+        self.table = self.connection.table(TABLE_NAME)
+        self.columns = {
+            COLUMN_FROM_USER: {FIELD_FROM_USER_ID: '123', FIELD_FROM_USER_NAME: 'John Doe'},
+            COLUMN_MESSAGE: {FIELD_MESSAGE_BODY: 'Lorem ipsum dolor sit amet.'},
+            }
+
+    @print_info
+    def test_01_flush_thresholds(self):
+        """
+        Test that the stack is reported full once the size, bytes or cells threshold is reached.
+        """
+        batch = Batch(self.table, max_bytes=4096)
+        number_of_rows = 0
+        while not batch._append('PUT', 'row{0}'.format(number_of_rows), self.columns):
+            number_of_rows += 1
+
+        # Estimated size is close to the actual request body size.
+        size = len(json.dumps({"Row": batch._stack}))
+        self.assertTrue(batch._bytes >= 4096)
+        self.assertTrue(abs(batch._bytes - size) < size * 0.05)
+
+        batch = Batch(self.table, max_cells=7)
+        res = [batch._append('PUT', 'row{0}'.format(i), self.columns) for i in range(3)]
+        self.assertEqual(res, [False, False, True])
+
+        batch._clear_stack()
+        self.assertEqual((batch._stack, batch._bytes, batch._cells), ([], 0, 0))
+
+        batch = Batch(self.table, size=2)
+        res = [batch._append('PUT', 'row{0}'.format(i), self.columns) for i in range(3)]
+        self.assertEqual(res, [False, False, True])
+
+        return size
+
+    @print_info
+    def test_02_coalesce(self):
+        """
+        Test that mutations of the same row are merged, last write of a column winning.
+        """
+        batch = Batch(self.table, coalesce=True, max_bytes=65536)
+        batch._append('PUT', 'row1', self.columns)
+        batch._append('PUT', 'row2', self.columns)
+        batch._append('PUT', 'row1', {COLUMN_FROM_USER: {FIELD_FROM_USER_NAME: 'Lorem Ipsum'},
+                                      COLUMN_TO_USER: {FIELD_TO_USER_ID: '456'}})
+
+        self.assertEqual(len(batch._stack), 2)
+        self.assertEqual(batch._cells, 7)
+        self.assertEqual(batch._bytes, sum(batch._estimate_size(data)[0] for data in batch._stack))
+
+        res = Table._materialize_row(batch._stack[0], perfect_dict=True)
+        self.assertEqual(res[COLUMN_FROM_USER], {FIELD_FROM_USER_ID: '123', FIELD_FROM_USER_NAME: 'Lorem Ipsum'})
+        self.assertEqual(res[COLUMN_TO_USER], {FIELD_TO_USER_ID: '456'})
+        return res
+
+    @print_info
+    def test_03_split_stack(self):
+        """
+        Test splitting the stack into chunks for the parallel commit.
+        """
+        batch = Batch(self.table, chunks=3)
+        for i in range(10):
+            batch._append('PUT', 'row{0}'.format(i), self.columns)
+
+        res = batch._split_stack(batch.chunks)
+        self.assertEqual([len(rows) for rows in res], [4, 4, 2])
+        self.assertEqual(sum(res, []), batch._stack)
+        self.assertEqual(batch._split_stack(None), [batch._stack])
+        self.assertEqual(len(batch._split_stack(20)), 10)
+        return res
+
+
+class StarbaseClient07TransportTest(unittest.TestCase):
+    """
+    Transport tests. No Stargate needed.
+    """
+    @print_info
+    def test_01_compression(self):
+        """
+        Test that request bodies above the threshold are gzip compressed.
+        """
+        data = {"Row": [{"key": "cm93MQ==", "Cell": [{"column": "Y29sdW1uMTppZA==", "$": "MQ=="}]}] * 100}
+
+        connection = Connection(HOST, PORT, content_type='json')
+        res = HttpRequest.build_request_data(connection, 'table1/row1', data, PUT)
+        self.assertTrue('Content-Encoding' not in res['headers'])
+        self.assertTrue('Accept-Encoding' not in res['headers'])
+
+        connection = Connection(HOST, PORT, content_type='json', compression=True, compression_threshold=1024)
+        res = HttpRequest.build_request_data(connection, 'table1/row1', data, PUT)
+        self.assertEqual(res['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(res['headers']['Accept-Encoding'], 'gzip')
+        self.assertEqual(json.loads(zlib.decompress(res['data'], 16 + zlib.MAX_WBITS).decode('utf8')), data)
+
+        # Small bodies are sent as they are.
+        res = HttpRequest.build_request_data(connection, 'table1/row1', {"Row": data["Row"][:1]}, PUT)
+        self.assertTrue('Content-Encoding' not in res['headers'])
+        self.assertEqual(res['headers']['Accept-Encoding'], 'gzip')
+        return res
+
+    @print_info
+    def test_02_hooks(self):
+        """
+        Test that the request hooks are called with the request details.
+        """
+        self.assertEqual(parse_url(''), ('/', None))
+        self.assertEqual(parse_url('version/cluster'), ('version/cluster', None))
+        self.assertEqual(parse_url('table1/row1/column1:id'), ('{table}/{row}/{column}', 'table1'))
+        self.assertEqual(parse_url('table1/scanner/1234'), ('{table}/scanner/{scanner}', 'table1'))
+        self.assertEqual(parse_url('table1/multiget?row=row1&row=row2&v=2'),
+                         ('{table}/multiget?row={row}&v={v}', 'table1'))
+        self.assertEqual(operation_name('GET', '{table}/{row}/{column}'), 'fetch')
+        self.assertEqual(operation_name('DELETE', '{table}/schema'), 'drop')
+
+        class TestHook(RequestHook):
+            def __init__(self):
+                self.calls = []
+
+            def before_request(self, info):
+                self.calls.append(('before', info.operation, info.response_bytes))
+
+            def after_request(self, info):
+                self.calls.append(('after', info.operation, info.response_bytes))
+                self.info = info
+
+        class TestHttpRequest(HttpRequest):
+            def call(self, method, request_data):
+                response = requests.models.Response()
+                response.status_code = 200
+                response._content = json.dumps({'version': '1'}).encode('utf8')
+                return response
+
+        hook = TestHook()
+        connection = Connection(HOST, PORT, content_type='json', hooks=[hook])
+        res = TestHttpRequest(connection, 'table1/row1', data={'Row': []}, method=PUT).get_response()
+
+        self.assertEqual(hook.calls, [('before', 'insert', 0), ('after', 'insert', 16)])
+        self.assertEqual(hook.info.table, 'table1')
+        self.assertEqual(hook.info.status_code, 200)
+        self.assertEqual((res.request_bytes, res.response_bytes, res.retries), (11, 16, 0))
+        self.assertEqual(sorted(res.timings), ['decode', 'network', 'parse', 'serialize'])
+
+        connection.remove_hook(hook)
+        TestHttpRequest(connection, 'table1/row1').get_response()
+        self.assertEqual(len(hook.calls), 2)
+        return hook.info
+
+    @print_info
+    def test_03_retries(self):
+        """
+        Test that only the transient failures are retried, within the retry budget of the connection.
+        """
+        outcomes = []
+
+        class TestHttpRequest(HttpRequest):
+            def call(self, method, request_data):
+                outcome = outcomes.pop(0)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                response = requests.models.Response()
+                response.status_code = outcome
+                response._content = b''
+                return response
+
+        def get_response(connection, *statuses):
+            outcomes[:] = statuses
+            res = TestHttpRequest(connection, 'table1/row1').get_response()
+            return res.status_code, res.retries
+
+        connection = Connection(HOST, PORT, content_type='json', retries=3, retry_delay=0)
+
+        # Unavailable Stargate and connection errors are retried, missing rows are not.
+        self.assertEqual(get_response(connection, 503, requests.exceptions.ConnectionError(), 200), (200, 2))
+        self.assertEqual(get_response(connection, 404, 200), (404, 0))
+        outcomes[:] = [ValueError()]
+        self.assertRaises(ValueError, TestHttpRequest, connection, 'table1/row1')
+
+        # Given up on after 3 retries. A few failed requests do not spend the (default) retry budget.
+        for i in range(5):
+            self.assertEqual(get_response(connection, 503, 503, 503, 503, 200), (503, 3))
+        self.assertEqual(get_response(connection, 503, 200), (200, 1))
+
+        # Once the retry budget is spent, requests are not retried.
+        connection = Connection(HOST, PORT, content_type='json',
+                                retry_policy=RetryPolicy(retries=3, base_delay=0, budget=10))
+        self.assertEqual(get_response(connection, 503, 503, 503, 503, 200), (503, 3))
+        self.assertEqual(get_response(connection, 503, 200), (503, 0))
+        # Successful requests fill it up again.
+        for i in range(30):
+            get_response(connection, 200)
+        self.assertEqual(get_response(connection, 503, 200), (200, 1))
+
+        # No retries (the default).
+        connection = Connection(HOST, PORT, content_type='json')
+        self.assertEqual(get_response(connection, 503, 200), (503, 0))
+        outcomes[:] = [requests.exceptions.ConnectionError()]
+        self.assertRaises(requests.exceptions.ConnectionError, TestHttpRequest, connection, 'table1/row1')
+
+    @print_info
+    def test_04_retry_policy(self):
+        """
+        Test the retry delays (full jitter, Retry-After) and the deadline.
+        """
+        response = requests.models.Response()
+        response.status_code = 503
+
+        policy = RetryPolicy(retries=5, base_delay=1, max_delay=4, budget=None, seed=1)
+        state = policy.begin()
+        delays = [state.next_delay(response=response) for i in range(5)]
+        for i, delay in enumerate(delays):
+            self.assertTrue(0 <= delay <= min(4, 2 ** i))
+        self.assertEqual(len(set(delays)), 5)
+        self.assertTrue(state.next_delay(response=response) is None)
+
+        response.headers['Retry-After'] = '3'
+        self.assertTrue(policy.begin().next_delay(response=response) >= 3)
+        # Not waited for if beyond the maximum delay.
+        response.headers['Retry-After'] = '10'
+        self.assertTrue(policy.begin().next_delay(response=response) is None)
+
+        # Nor beyond the deadline.
+        policy = RetryPolicy(retries=5, base_delay=1, max_delay=4, deadline=2, budget=None)
+        response.headers['Retry-After'] = '3'
+        self.assertTrue(policy.begin().next_delay(response=response) is None)
+
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertTrue(55 < parse_retry_after(email.utils.formatdate(time.time() + 60, usegmt=True)) <= 60)
+        self.assertTrue(parse_retry_after('soon') is None)
+        return delays
+
+
+class StarbaseClient08CacheTest(unittest.TestCase):
+    """
+    Cache tests. No Stargate needed.
+    """
+    @print_info
+    def test_01_ttl_cache(self):
+        """
+        Test the TTL cache and the cached table existence checks.
+        """
+        cache = TTLCache(ttl=0.05)
+        cache.set('tables', frozenset([TABLE_NAME]))
+        self.assertEqual(cache.get('tables'), frozenset([TABLE_NAME]))
+        time.sleep(0.1)
+        self.assertTrue(cache.get('tables') is None)
+
+        cache.set('tables', frozenset([TABLE_NAME]))
+        cache.invalidate('tables')
+        self.assertTrue(cache.get('tables') is None)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2, 'entries': 0})
+
+        disabled_cache = TTLCache(ttl=0)
+        disabled_cache.set('tables', frozenset([TABLE_NAME]))
+        self.assertEqual(len(disabled_cache), 0)
+
+        # Table existence is checked against the cached table list.
+        connection = Connection(HOST, PORT, content_type='json', tables_cache_ttl=None)
+        connection.tables_cache.set('tables', frozenset([TABLE_NAME]))
+        self.assertTrue(connection.table(TABLE_NAME).exists())
+        return cache.stats()
+
+    @print_info
+    def test_02_schema_cache(self):
+        """
+        Test the cached table schemas and column families.
+        """
+        connection = Connection(HOST, PORT, content_type='json', schema_cache_ttl=None)
+        table = connection.table(TABLE_NAME)
+        table._cache_schema({'name': TABLE_NAME, 'ColumnSchema': [{'name': COLUMN_FROM_USER},
+                                                                   {'name': COLUMN_TO_USER}]})
+
+        self.assertEqual(table.column_families(), frozenset([COLUMN_FROM_USER, COLUMN_TO_USER]))
+        self.assertEqual(connection.table(TABLE_NAME).columns(), [COLUMN_FROM_USER, COLUMN_TO_USER])
+
+        # Schemas returned are copies.
+        res = table.schema()
+        res['ColumnSchema'].pop()
+        self.assertEqual(len(table.schema()['ColumnSchema']), 2)
+
+        table.invalidate_schema_cache()
+        self.assertTrue(connection.schema_cache.get(TABLE_NAME) is None)
+        return res
+
+    @print_info
+    def test_03_row_cache(self):
+        """
+        Test the LRU row cache: eviction, TTL, invalidation and the cached fetches.
+        """
+        cache = RowCache(max_entries=2)
+        for row in ('row1', 'row2', 'row3'):
+            cache.set((TABLE_NAME, row, None), {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: row}})
+        self.assertTrue(cache.get((TABLE_NAME, 'row1', None)) is None)
+        self.assertTrue(cache.get((TABLE_NAME, 'row2', None)) is not None)
+
+        # Least recently used row is evicted.
+        cache.set((TABLE_NAME, 'row4', None), {})
+        self.assertTrue(cache.get((TABLE_NAME, 'row3', None)) is None)
+        self.assertEqual(cache.stats()['evictions'], 2)
+
+        # Bounded by size.
+        cache = RowCache(max_entries=100, max_bytes=100)
+        for i in range(10):
+            cache.set((TABLE_NAME, 'row{0}'.format(i), None), 'x' * 30)
+        self.assertEqual(len(cache), 3)
+        self.assertTrue(cache.stats()['bytes'] <= 100)
+
+        cache = RowCache(max_entries=100, ttl=0.05)
+        cache.set((TABLE_NAME, 'row1', None), {})
+        time.sleep(0.1)
+        self.assertTrue(cache.get((TABLE_NAME, 'row1', None)) is None)
+
+        # All the variants of a row are invalidated, rows fetched before invalidation aren't cached.
+        cache.ttl = None
+        cache.set((TABLE_NAME, 'row1', 'a'), {})
+        cache.set((TABLE_NAME, 'row1', 'b'), {})
+        cache.set((TABLE_NAME, 'row2', 'a'), {})
+        generation = cache.generation
+        cache.invalidate_rows(TABLE_NAME, ['row1'])
+        self.assertEqual(len(cache), 1)
+        cache.set((TABLE_NAME, 'row1', 'a'), {}, generation=generation)
+        self.assertEqual(len(cache), 1)
+        cache.invalidate_table(TABLE_NAME)
+        self.assertEqual(len(cache), 0)
+
+        # Fetches are read through the row cache of the connection (copies returned).
+        connection = Connection(HOST, PORT, content_type='json', row_cache_size=10)
+        table = connection.table(TABLE_NAME)
+        row = {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: '123'}}
+        connection.row_cache.set(table._row_cache_key('row1', table._build_get_url('row1')), row)
+        res = table.fetch('row1')
+        self.assertEqual(res, row)
+        res[COLUMN_FROM_USER].clear()
+        self.assertEqual(table.fetch('row1'), row)
+
+        # Batches collect the rows to invalidate once committed.
+        batch = Batch(table)
+        batch._append('PUT', 'row1', row)
+        self.assertEqual(batch._row_keys, set(['row1']))
+        table.invalidate_row_cache(batch._row_keys)
+        self.assertEqual(len(connection.row_cache), 0)
+        self.assertEqual(connection.cache_stats()['rows']['hits'], 2)
+        return connection.cache_stats()
+
+    @print_info
+    def test_04_missing_rows(self):
+        """
+        Test that rows known not to exist (absent rows cache, Bloom filter) are not requested.
+        """
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        bloom_filter.update('row{0}'.format(i) for i in range(1000))
+        self.assertTrue(all('row{0}'.format(i) in bloom_filter for i in range(1000)))
+        false_positives = sum('other{0}'.format(i) in bloom_filter for i in range(10000))
+        self.assertTrue(false_positives < 300)
+
+        connection = Connection(HOST, PORT, content_type='json', missing_rows_cache_size=10)
+        table = connection.table(TABLE_NAME)
+        table._cache_missing_row('row1', 404, connection.missing_rows_cache.generation)
+        table._cache_missing_row('row2', 200, connection.missing_rows_cache.generation)
+        self.assertTrue(table._is_missing('row1'))
+        self.assertFalse(table._is_missing('row2'))
+
+        # Written rows are forgotten.
+        table.invalidate_row_cache(['row1'])
+        self.assertFalse(table._is_missing('row1'))
+
+        # Bloom filter only covers its key range; written rows are added to it.
+        table._register_bloom_filter(['row1', 'row2'], start_row='row', end_row='rox')
+        self.assertFalse(table._is_missing('row1'))
+        self.assertTrue(table._is_missing('row3'))
+        self.assertFalse(table._is_missing('other'))
+        Batch(table)._append('PUT', 'row3', {COLUMN_FROM_USER: {FIELD_FROM_USER_ID: '123'}})
+        self.assertFalse(table._is_missing('row3'))
+
+        self.assertEqual(table.fetch('row4'), None)
+        table.remove_bloom_filter()
+        self.assertFalse(table._is_missing('row4'))
+        return false_positives
+
+
+
+class StarbaseClient09MetricsTest(unittest.TestCase):
+    """
+    Metrics tests. No Stargate needed.
+    """
+    @print_info
+    def test_01_histogram(self):
+        """
+        Test the latency histogram percentiles.
+        """
+        histogram = Histogram()
+        self.assertTrue(histogram.percentile(50) is None)
+
+        # 1 to 10000 ms
+        for i in range(1, 10001):
+            histogram.record(i / 1000.0)
+
+        self.assertEqual(histogram.count, 10000)
+        for percentile in (50, 95, 99, 100):
+            expected = percentile * 100 / 1000.0
+            self.assertTrue(abs(histogram.percentile(percentile) - expected) <= expected / 64)
+        self.assertEqual(histogram.percentile(100), 10.0)
+        self.assertTrue(len(histogram._buckets) < 1000)
+        return histogram.snapshot()
+
+    @print_info
+    def test_02_registry(self):
+        """
+        Test collecting the metrics per table and operation, and rendering them in Prometheus format.
+        """
+        registry = MetricsRegistry()
+        for status_code in (200, 200, 404, 500):
+            info = RequestInfo('GET', '{0}/row1'.format(TABLE_NAME))
+            info.status_code = status_code
+            info.response_bytes = 100
+            info.timings['network'] = 0.01
+            registry.after_request(info)
+
+        info = RequestInfo('PUT', '{0}/row1'.format(TABLE_NAME), operation='batch')
+        info.error = ValueError()
+        registry.after_request(info)
+
+        res = registry.snapshot()
+        self.assertEqual(sorted(res[TABLE_NAME]), ['batch', 'fetch'])
+        self.assertEqual(res[TABLE_NAME]['fetch']['requests'], 4)
+        self.assertEqual(res[TABLE_NAME]['fetch']['errors'], 1)
+        self.assertEqual(res[TABLE_NAME]['fetch']['response_bytes'], 400)
+        self.assertEqual(res[TABLE_NAME]['fetch']['latency']['p99'], 0.01)
+        self.assertEqual(res[TABLE_NAME]['batch']['errors'], 1)
+
+        text = registry.render_prometheus()
+        labels = 'table="{0}",operation="fetch"'.format(TABLE_NAME)
+        self.assertTrue('# TYPE starbase_requests_total counter' in text)
+        self.assertTrue('starbase_requests_total{{{0}}} 4\n'.format(labels) in text)
+        self.assertTrue('starbase_request_duration_seconds{{{0},quantile="0.99"}} 0.01\n'.format(labels) in text)
+
+        # Registered as a request hook.
+        connection = Connection(HOST, PORT, content_type='json', metrics=registry)
+        self.assertTrue(registry in connection.hooks)
+        return text
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -2,11 +2,14 @@ __title__ = 'starbase.client.transport.__init__'
 __author__ = 'Artur Barseghyan'
 __copyright__ = 'Copyright (c) 2013-2014 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
-__all__ = ('HttpRequest', 'HttpResponse')
+__all__ = ('BaseHttpRequest', 'HttpRequest', 'HttpResponse', 'gzip_compress')
 
 import json
 import logging
 import time
+import zlib
+
+from timeit import default_timer as timer
 
 import requests
 from requests.auth import HTTPBasicAuth
@@ -15,22 +18,43 @@ from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 from six import string_types
 
-from starbase.json_decoder import json_decode
-from starbase.content_types import MEDIA_TYPE_JSON
+from starbase import protobuf
+from starbase.json_decoder import json_decode, decode_cell_set
+from starbase.content_types import (
+    MEDIA_TYPE_JSON, MEDIA_TYPE_PROTOBUF, CONTENT_TYPES_DICT
+)
 from starbase.client.transport.methods import (
     GET, PUT, POST, DELETE, METHODS, DEFAULT_METHOD
 )
 from starbase.client.transport import status_codes
+from starbase.client.transport.hooks import RequestInfo, TIMING_PHASES, call_hooks
 from starbase.translations import _
 
 logger = logging.getLogger(__name__)
 
+def gzip_compress(data, level=6):
+    """
+    Gzip compresses the data given.
+
+    :param bytes data:
+    :param int level: Compression level.
+    :return bytes:
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
 class HttpResponse(object):
     """
     HTTP response.
 
     :param content:
     :param bool raw:
+    :ivar int request_bytes: Size of the request body sent (compressed, if so).
+    :ivar int response_bytes: Size of the response body received (decompressed).
+    :ivar int retries: Number of times the request was retried.
+    :ivar dict timings: Seconds spent on serializing the request body, on the network, on parsing the
+        response body and on decoding the response content, the rows included (see
+        ``starbase.client.transport.hooks.RequestInfo``).
     """
     def __init__(self, content, raw):
         """
@@ -38,6 +62,10 @@ class HttpResponse(object):
         """
         self.content = content
         self.raw = raw
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.timings = dict((phase, 0.0) for phase in TIMING_PHASES)
 
     @property
     def status_code(self):
@@ -75,9 +103,12 @@ class HttpResponse(object):
                 return self.content
 
 
-class HttpRequest(object):
+class BaseHttpRequest(object):
     """
-    HTTP request.
+    Base HTTP request, shared by the synchronous (``HttpRequest``) and the asyncio
+    (``starbase.client.aio.transport.AsyncHttpRequest``) transports: request data, hooks, retries,
+    timings and response parsing. Subclasses send the request (``call``), following the ``prepare``,
+    ``attempted`` (per attempt) and ``finish`` steps.
 
     :param starbase.client.connection.Connection connection:
     :param str url:
@@ -85,40 +116,144 @@ class HttpRequest(object):
     :param bool decode_content: If set to True, response content is decoded.
     :param str method:
     :param bool fail_silently:
+    :param str content_type: If given, overrides the content type of the
+        connection (used for the endpoints not supporting protobuf).
+    :param str operation: Operation name passed to the request hooks. Derived
+        from the method and the URL if not given (see
+        ``starbase.client.transport.hooks``).
+    :param callable materialize: If given, turns the content of a successful
+        response into the final result (such as the rows of a fetch). Timed
+        as part of the ``decode`` phase, before the ``after_request`` hooks
+        are called.
     """
     def __init__(self, connection, url='', data={}, decode_content=False, \
-                 method=DEFAULT_METHOD, fail_silently=True):
+                 method=DEFAULT_METHOD, fail_silently=True, content_type=None,
+                 operation=None, materialize=None):
         """
         See the docs above.
         """
         assert method in METHODS
 
-        self.__connection = connection
+        self.connection = connection
         self.url = url
         self.data = data
+        self.method = method
         self.decode_content = decode_content
         self.fail_silently = fail_silently
-        self.verify_ssl = connection.verify_ssl
+        self.operation = operation
+        self.materialize = materialize
+        self.media_type = CONTENT_TYPES_DICT[content_type] \
+            if content_type else connection.content_type
+
+        self.response = None
+        self.timings = dict((phase, 0.0) for phase in TIMING_PHASES)
+        self.request_bytes = 0
+        self.retries = 0
+        self.info = None
+        self.completed = False
+        self.retry_state = None
+
+    def prepare(self):
+        """
+        Serializes the request and calls the ``before_request`` hooks.
 
-        if not self.verify_ssl:
-             requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+        :return dict: Request data (see ``build_request_data``).
+        """
+        started = timer()
+        request_data = self.build_request_data(
+            self.connection, self.url, self.data, self.method,
+            media_type = self.media_type
+            )
+        self.timings['serialize'] = timer() - started
+        self.request_bytes = len(request_data.get('data') or '')
+
+        # Request details are only collected if there are hooks to pass
+        # them to.
+        if self.connection.hooks:
+            self.info = RequestInfo(self.method, self.url, operation=self.operation)
+            self.info.request_bytes = self.request_bytes
+            self.info.timings = self.timings
+            call_hooks(self.connection.hooks, 'before_request', self.info)
+
+        self.retry_state = self.connection.retry_policy.begin()
+        return request_data
+
+    def attempted(self, started, error=None):
+        """
+        Records an attempt (its network time) and tells whether to retry it (transient failures only, see
+        ``starbase.client.transport.retry``).
+
+        :param float started: Timer value at the start of the attempt.
+        :param Exception error: Exception raised by the attempt, if any. Raised again if not retried.
+        :return float: Number of seconds to wait before retrying, or None if done.
+        """
+        self.timings['network'] += timer() - started
+
+        if error is not None:
+            delay = self.retry_state.next_delay(error=error)
+            if delay is None:
+                raise error
+            reason = error
+        else:
+            delay = self.retry_state.next_delay(response=self.response)
+            if delay is None:
+                return None
+            reason = self.response.reason
+
+        logger.warning(
+            _("Hbase returned error: {0}. Sleeping "
+              "for {1:.2f} seconds").format(reason, delay)
+            )
+        self.retries = self.retry_state.retries
+        return delay
+
+    @staticmethod
+    def build_request_data(connection, url, data, method, media_type=None):
+        """
+        Builds the endpoint URL, headers and the serialized body of the
+        request. Shared with the asyncio transport.
+
+        If compression is enabled on the connection, bodies larger than
+        ``compression_threshold`` are gzip compressed. Compressed responses
+        are decompressed by the HTTP client.
+
+        :param starbase.client.connection.Connection connection:
+        :param str url:
+        :param dict data:
+        :param str method:
+        :param str media_type: Defaults to the content type of the connection.
+        :return dict:
+        """
+        if media_type is None:
+            media_type = connection.content_type
 
         headers = {
-            'Accept': str(self.__connection.content_type),
-            'Content-type': str(self.__connection.content_type) + \
-                            '; charset=UTF-8'
+            'Accept': str(media_type),
+            'Content-type': str(media_type) + '; charset=UTF-8'
             }
-        endpoint_url = self.__connection.base_url + self.url
+        endpoint_url = connection.base_url + url
 
         is_xml_request = False
-        if isinstance(self.data, string_types) and self.data[:1] == '<':
+        if isinstance(data, string_types) and data[:1] == '<':
             is_xml_request = True
 
         if is_xml_request:
             headers['Content-type'] = 'text/xml'
+        elif media_type == MEDIA_TYPE_PROTOBUF:
+            headers['Content-type'] = str(media_type)
+            data = protobuf.encode(data)
         else:
             data = json.dumps(data)
 
+        if connection.compression:
+            headers['Accept-Encoding'] = 'gzip'
+
+            if DELETE != method and data and len(data) >= connection.compression_threshold:
+                if not isinstance(data, bytes):
+                    data = data.encode('utf8')
+                data = gzip_compress(data, connection.compression_level)
+                headers['Content-Encoding'] = 'gzip'
+
         request_data = {
             'url': endpoint_url,
             'headers': headers
@@ -127,60 +262,122 @@ class HttpRequest(object):
         if DELETE != method:
             request_data['data'] = data
 
-        if self.__connection.user and self.__connection.password:
-            request_data['auth'] = HTTPBasicAuth(
-                self.__connection.user,
-                self.__connection.password
-                )
+        return request_data
 
-        for i in range(connection.retries + 1):
-            self.response = self.call(method, request_data)
-
-            if self.response.status_code in status_codes.BAD_STATUS_CODES:
-                # If status code is 4** or 5** or raise an exception
-                # means, retry.
-                if i < connection.retries:
-                    delay = connection.retry_delay * (2**i)
-                    logger.warn(
-                        _("Hbase returned error: {0}. Sleeping "
-                          "for {1} seconds").format(self.response.reason, delay)
-                        )
-                    time.sleep(delay)
-                else:
-                    return None
-            else:
-                return None
+    @staticmethod
+    def get_response_bytes(response_raw):
+        """
+        Gets the size of the (decompressed) body of the raw response given.
 
-    def call(self, method, request_data):
+        :param requests.Response response_raw:
+        :return int:
         """
-        For the sake of simplicity the `requests` library replaced the
-        `urllib2`.
+        try:
+            return len(response_raw.content or b'')
+        except Exception:
+            return 0
 
-        Moved to seperate function to aid mocking in tests
+    def finish(self):
         """
-        if GET == method:
-            return requests.get(**request_data, verify=self.verify_ssl)
-        elif PUT == method:
-            return requests.put(**request_data, verify=self.verify_ssl)
-        elif POST == method:
-            return requests.post(**request_data, verify=self.verify_ssl)
-        elif DELETE == method:
-            return requests.delete(**request_data, verify=self.verify_ssl)
+        Parses (and materializes, see ``materialize``) the response received and calls the
+        ``after_request`` hooks.
 
-    def get_response(self):
+        :return starbase.client.transport.HttpResponse:
+        """
+        try:
+            response = self.build_response(
+                self.connection,
+                self.response,
+                decode_content = self.decode_content,
+                fail_silently = self.fail_silently,
+                url = self.url,
+                media_type = self.media_type,
+                timings = self.timings
+                )
+            if self.materialize is not None and self.response.ok:
+                started = timer()
+                response.content = self.materialize(response.content)
+                self.timings['decode'] += timer() - started
+        except Exception as e:
+            self.complete(error=e)
+            raise
+
+        response.request_bytes = self.request_bytes
+        response.response_bytes = self.get_response_bytes(self.response)
+        response.retries = self.retries
+        response.timings = self.timings
+        self.complete(response=response)
+        return response
+
+    def complete(self, response=None, error=None):
         """
+        Calls the ``after_request`` hooks (once).
+
+        :param starbase.client.transport.HttpResponse response:
+        :param Exception error:
+        """
+        if self.completed or self.info is None:
+            return
+        self.completed = True
+
+        info = self.info
+        info.retries = self.retries
+        info.error = error
+        if response is not None:
+            info.status_code = response.status_code
+            info.response_bytes = response.response_bytes
+        elif self.response is not None:
+            info.status_code = self.response.status_code
+            info.response_bytes = self.get_response_bytes(self.response)
+        call_hooks(self.connection.hooks, 'after_request', info)
+
+    @staticmethod
+    def build_response(connection, response_raw, decode_content=False,
+                       fail_silently=True, url='', media_type=None,
+                       timings=None):
+        """
+        Parses the raw response. Shared with the asyncio transport.
+
+        Protobuf responses are decoded into the same structures as JSON
+        ones, except that values are never base64 encoded (thus
+        ``decode_content`` has no effect on them).
+
+        :param starbase.client.connection.Connection connection:
+        :param requests.Response response_raw:
+        :param bool decode_content:
+        :param bool fail_silently:
+        :param str url: Requested URL (relative to the Stargate base URL).
+            Tells which protobuf message to expect.
+        :param str media_type: Defaults to the content type of the connection.
+        :param dict timings: If given, the time spent on parsing and decoding
+            is added to it.
         :return starbase.client.transport.HttpResponse:
         """
         response_content = None
+        started = timer()
 
-        response_raw = self.response
+        if media_type is None:
+            media_type = connection.content_type
 
-        if not self.fail_silently:
+        if not fail_silently:
             response_raw.raise_for_status()
 
-        if self.__connection.content_type == MEDIA_TYPE_JSON:
+        if media_type == MEDIA_TYPE_PROTOBUF:
+            if response_raw.ok and response_raw.content:
+                try:
+                    response_content = protobuf.decode(
+                        url, response_raw.content
+                        )
+                except Exception as e:
+                    if not fail_silently:
+                        raise
+            if timings is not None:
+                timings['parse'] += timer() - started
+            return HttpResponse(response_content, response_raw)
+
+        if media_type == MEDIA_TYPE_JSON:
             try:
-                response_content = self.response.json()
+                response_content = response_raw.json()
             except ValueError as e:
                 response_content = None
             except Exception as e:
@@ -188,10 +385,85 @@ class HttpRequest(object):
         else:
             raise NotImplementedError(
                 "Connection type {0} is "
-                "not implemented.".format(self.__connection.content_type)
+                "not implemented.".format(media_type)
                 )
 
-        if self.decode_content and self.response.ok: # Make sure OK is ok.
-            response_content = json_decode(response_content)
+        parsed = timer()
+        if timings is not None:
+            timings['parse'] += parsed - started
+
+        if decode_content and response_raw.ok: # Make sure OK is ok.
+            # Cell sets (by far the most common case) have a specialised
+            # decoder.
+            if isinstance(response_content, dict) \
+                    and 'Row' in response_content:
+                response_content = decode_cell_set(response_content)
+            else:
+                response_content = json_decode(response_content)
+
+            if timings is not None:
+                timings['decode'] += timer() - parsed
 
         return HttpResponse(response_content, response_raw)
+
+
+class HttpRequest(BaseHttpRequest):
+    """
+    HTTP request. Sent on initialisation.
+
+    See ``starbase.client.transport.BaseHttpRequest`` for the arguments.
+    """
+    def __init__(self, connection, url='', data={}, decode_content=False, \
+                 method=DEFAULT_METHOD, fail_silently=True, content_type=None,
+                 operation=None, materialize=None):
+        """
+        See the docs above.
+        """
+        super(HttpRequest, self).__init__(
+            connection, url=url, data=data, decode_content=decode_content, method=method,
+            fail_silently=fail_silently, content_type=content_type, operation=operation,
+            materialize=materialize
+            )
+        self.verify_ssl = connection.verify_ssl
+
+        if not self.verify_ssl:
+             requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+
+        request_data = self.prepare()
+
+        if connection.user and connection.password:
+            request_data['auth'] = HTTPBasicAuth(connection.user, connection.password)
+
+        try:
+            while True:
+                started = timer()
+                try:
+                    self.response = self.call(method, request_data)
+                except Exception as e:
+                    delay = self.attempted(started, error=e)
+                else:
+                    delay = self.attempted(started)
+                if delay is None:
+                    break
+                time.sleep(delay)
+        except Exception as e:
+            self.complete(error=e)
+            raise
+
+    def call(self, method, request_data):
+        """
+        For the sake of simplicity the `requests` library replaced the
+        `urllib2`. Requests are sent through the keep-alive connection pool
+        of the connection.
+
+        Moved to seperate function to aid mocking in tests
+        """
+        return self.connection.pool.request(
+            method, verify=self.verify_ssl, **request_data
+            )
+
+    def get_response(self):
+        """
+        :return starbase.client.transport.HttpResponse:
+        """
+        return self.finish()
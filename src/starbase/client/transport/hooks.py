@@ -0,0 +1,202 @@
+"""
+Request lifecycle hooks. Hooks registered on the connection are called before and after each request
+sent to the Stargate, with the details of the request (``RequestInfo``).
+
+>>> from starbase import Connection
+>>> from starbase.client.transport.hooks import RequestHook
+>>>
+>>> class SlowRequestsHook(RequestHook):
+>>>     def after_request(self, info):
+>>>         if info.duration > 0.5:
+>>>             print(info.operation, info.table, info.status_code, info.timings)
+>>>
+>>> connection = Connection(hooks=[SlowRequestsHook()])
+"""
+
+__title__ = 'starbase.client.transport.hooks'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('RequestHook', 'RequestInfo', 'parse_url', 'operation_name', 'call_hooks', 'TIMING_PHASES')
+
+import logging
+
+from six.moves.urllib.parse import unquote
+
+from starbase.translations import _
+
+logger = logging.getLogger(__name__)
+
+# Phases the time spent on a request is split into.
+TIMING_PHASES = ('serialize', 'network', 'parse', 'decode')
+
+# Resources not bound to a table.
+ROOT_RESOURCES = ('version', 'status')
+
+# Table resources (others are rows).
+TABLE_RESOURCES = ('schema', 'regions', 'multiget', 'scanner')
+
+# Operation names by method and URL template.
+OPERATIONS = {
+    ('GET', '/'): 'tables',
+    ('GET', 'version'): 'version',
+    ('GET', 'version/cluster'): 'cluster_version',
+    ('GET', 'status/cluster'): 'cluster_status',
+    ('GET', '{table}/schema'): 'schema',
+    ('PUT', '{table}/schema'): 'create',
+    ('POST', '{table}/schema'): 'alter',
+    ('DELETE', '{table}/schema'): 'drop',
+    ('GET', '{table}/regions'): 'regions',
+    ('GET', '{table}/multiget'): 'fetch_many',
+    ('PUT', '{table}/scanner'): 'scanner_open',
+    ('GET', '{table}/scanner/{scanner}'): 'scanner_next',
+    ('DELETE', '{table}/scanner/{scanner}'): 'scanner_close',
+    ('GET', '{table}/{row}'): 'fetch',
+    ('PUT', '{table}/{row}'): 'insert',
+    ('POST', '{table}/{row}'): 'update',
+    ('DELETE', '{table}/{row}'): 'remove',
+}
+
+def parse_url(url):
+    """
+    Turns the URL given (relative to the Stargate base URL) into a template, having the table name, row
+    keys, columns, timestamps, scanner ids and query values replaced by placeholders (so that requests
+    can be grouped by it).
+
+    :param str url:
+    :return tuple: URL template and table name (None for the resources not bound to a table).
+
+    :example:
+    >>> parse_url('table1/row1/column1:id')
+    ('{table}/{row}/{column}', 'table1')
+    >>> parse_url('table1/multiget?row=row1&row=row2&v=2')
+    ('{table}/multiget?row={row}&v={v}', 'table1')
+    """
+    path, _sep, query = url.partition('?')
+    parts = [part for part in path.split('/') if part]
+
+    if not parts:
+        return '/', None
+
+    if parts[0] in ROOT_RESOURCES:
+        return '/'.join(parts), None
+
+    table = unquote(parts[0])
+
+    if 1 == len(parts):
+        template = '{table}'
+    elif parts[1] in TABLE_RESOURCES:
+        template = '{table}/' + parts[1]
+        if 'scanner' == parts[1] and len(parts) > 2:
+            template += '/{scanner}'
+    else:
+        template = '/'.join(['{table}', '{row}', '{column}', '{timestamp}'][:min(len(parts), 4)])
+
+    if query:
+        keys = []
+        for pair in query.split('&'):
+            key = pair.partition('=')[0]
+            if key not in keys:
+                keys.append(key)
+        template += '?' + '&'.join('{0}={{{0}}}'.format(key) for key in keys)
+
+    return template, table
+
+def operation_name(method, url_template):
+    """
+    Gets the name of the operation (``fetch``, ``insert``, ``scanner_next``, etc.) done by the request
+    given.
+
+    :param str method:
+    :param str url_template: See ``parse_url``.
+    :return str:
+    """
+    base = url_template.partition('?')[0]
+    if base.startswith('{table}/{row}'):
+        base = '{table}/{row}'
+    return OPERATIONS.get((method, base), method.lower())
+
+def call_hooks(hooks, name, info):
+    """
+    Calls the method given of all the hooks. Failing hooks are logged, never breaking the request.
+
+    :param iterable hooks:
+    :param str name: ``before_request`` or ``after_request``.
+    :param starbase.client.transport.hooks.RequestInfo info:
+    """
+    for hook in hooks:
+        try:
+            getattr(hook, name)(info)
+        except Exception as e:
+            logger.warning(_("Request hook {0} failed: {1}").format(hook, e))
+
+
+class RequestInfo(object):
+    """
+    Details of a single request (retries included), passed to the hooks.
+
+    Set before the request is sent: ``method``, ``url``, ``url_template``, ``table``, ``operation``,
+    ``request_bytes`` and the ``serialize`` timing. The rest is set once the response is parsed (or the
+    request failed, see ``error``).
+
+    :param str method: HTTP method.
+    :param str url: URL relative to the Stargate base URL.
+    :param str operation: Operation name. Derived from the method and the URL if not given.
+    :ivar int request_bytes: Size of the request body sent (compressed, if so).
+    :ivar int response_bytes: Size of the response body received (decompressed).
+    :ivar int status_code:
+    :ivar int retries: Number of times the request was retried.
+    :ivar dict timings: Seconds spent on serializing the request body, on the network (all the attempts),
+        on parsing the response body and on decoding the response content (turning the cells into the
+        returned rows included).
+    :ivar Exception error: Exception raised, if any.
+    """
+    def __init__(self, method, url, operation=None):
+        """
+        See the docs above.
+        """
+        self.method = method
+        self.url = url
+        self.url_template, self.table = parse_url(url)
+        self.operation = operation or operation_name(method, self.url_template)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status_code = None
+        self.retries = 0
+        self.timings = dict((phase, 0.0) for phase in TIMING_PHASES)
+        self.error = None
+
+    def __repr__(self):
+        return "<starbase.client.transport.hooks.RequestInfo {0} {1} ({2})>".format(
+            self.method, self.url_template, self.operation
+            )
+
+    @property
+    def duration(self):
+        """
+        Total number of seconds spent on the request.
+
+        :return float:
+        """
+        return sum(self.timings.values())
+
+
+class RequestHook(object):
+    """
+    Base request hook. Register instances on the connection (``hooks`` argument or ``add_hook``) and
+    override the methods needed. Hooks are called in the thread (or the event loop) sending the request,
+    so they should be quick.
+    """
+    def before_request(self, info):
+        """
+        Called before the request is sent (once serialized).
+
+        :param starbase.client.transport.hooks.RequestInfo info:
+        """
+
+    def after_request(self, info):
+        """
+        Called once the response is parsed, or the request failed.
+
+        :param starbase.client.transport.hooks.RequestInfo info:
+        """
@@ -0,0 +1,210 @@
+__title__ = 'starbase.client.transport.pool'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('ConnectionPool',)
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from starbase.defaults import (
+    POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, POOL_IDLE_TIMEOUT
+)
+from starbase.client.transport.methods import GET
+from starbase.translations import _
+
+logger = logging.getLogger(__name__)
+
+
+class _ReleaseTimeMixin(object):
+    """Stamps the connections put back into the pool with the time they
+    were released at (``released_at``), so that idle ones can be told apart.
+    """
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.released_at = time.time()
+        super(_ReleaseTimeMixin, self)._put_conn(conn)
+
+
+class _HTTPConnectionPool(_ReleaseTimeMixin, HTTPConnectionPool):
+    pass
+
+
+class _HTTPSConnectionPool(_ReleaseTimeMixin, HTTPSConnectionPool):
+    pass
+
+
+class _HTTPAdapter(HTTPAdapter):
+    """HTTP adapter whose per-host pools stamp the released connections."""
+    def init_poolmanager(self, *args, **kwargs):
+        super(_HTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _HTTPConnectionPool,
+            'https': _HTTPSConnectionPool,
+        }
+
+
+class ConnectionPool(object):
+    """Pool of keep-alive HTTP connections.
+
+    Wraps a single ``requests.Session``, so that all requests made through
+    the pool re-use already established TCP (and TLS) connections instead of
+    opening a new one per request.
+
+    :param int pool_connections: Number of per-host connection pools to
+        cache.
+    :param int pool_maxsize: Maximum number of connections kept alive per
+        host.
+    :param bool pool_block: If set to True, requests wait for a free
+        connection once ``pool_maxsize`` connections are in use. Otherwise,
+        extra (not pooled) connections are opened.
+    :param float idle_timeout: If given, each pooled connection that has
+        not been used for ``idle_timeout`` seconds is closed before the next
+        request is made. Connections in use, or idle for a shorter time, are
+        left open.
+    """
+    def __init__(self, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK,
+                 idle_timeout=POOL_IDLE_TIMEOUT):
+        """Creates a new pool instance.
+
+        See docs above.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._evictions = 0
+
+        self.adapter = _HTTPAdapter(pool_connections=pool_connections,
+                                   pool_maxsize=pool_maxsize,
+                                   pool_block=pool_block)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def __repr__(self):
+        """Repr."""
+        return "<starbase.client.transport.pool.ConnectionPool " \
+               "({0}x{1})>".format(self.pool_connections, self.pool_maxsize)
+
+    def _host_pools(self):
+        """Per-host connection pools currently cached.
+
+        :return list:
+        """
+        pools = self.adapter.poolmanager.pools
+        host_pools = []
+        for key in list(pools.keys()):
+            try:
+                host_pools.append(pools[key])
+            except KeyError:
+                continue
+        return host_pools
+
+    def _evict_idle(self):
+        """Close the pooled connections that have been idle for too long.
+        """
+        if self.idle_timeout is None:
+            return
+
+        expired = time.time() - self.idle_timeout
+        evictions = 0
+        for pool in self._host_pools():
+            if pool.pool is None:
+                continue
+            # Holding the mutex of the queue, so that no connection is taken
+            # out of the pool while being closed.
+            with pool.pool.mutex:
+                for conn in pool.pool.queue:
+                    if conn is not None and conn.sock is not None \
+                            and getattr(conn, 'released_at', 0) < expired:
+                        conn.close()
+                        evictions += 1
+
+        if evictions:
+            with self._lock:
+                self._evictions += evictions
+            logger.debug(
+                _("Closed {0} idle pooled connections.").format(evictions)
+            )
+
+    def request(self, method, **kwargs):
+        """Make a request using one of the pooled connections.
+
+        :param str method: HTTP method (GET, PUT, POST, DELETE).
+        :param dict **kwargs: Passed to ``requests.Session.request``.
+        :return requests.Response:
+        """
+        self._evict_idle()
+        try:
+            return self.session.request(method, **kwargs)
+        finally:
+            with self._lock:
+                self._requests += 1
+
+    def prewarm(self, url, number_of_connections, **kwargs):
+        """Open ``number_of_connections`` connections to the ``url`` given.
+
+        Requests are made concurrently, so that each of them occupies a
+        separate connection, which is put back into the pool afterwards.
+
+        :param str url: Lightweight endpoint URL to request.
+        :param int number_of_connections:
+        :param dict **kwargs: Passed to ``requests.Session.request``.
+        """
+        number_of_connections = min(number_of_connections, self.pool_maxsize)
+
+        def warm():
+            try:
+                self.request(GET, url=url, **kwargs)
+            except requests.RequestException as e:
+                logger.warning(
+                    _("Failed to pre-warm connection: {0}").format(e)
+                )
+
+        threads = [threading.Thread(target=warm)
+                   for i in range(number_of_connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stats(self):
+        """Pool statistics.
+
+        :return dict: Dictionary with total number of requests made, number
+            of connections closed for being idle and per-host number of
+            connections opened, requests made and connections currently idle
+            (open, but not in use) in the pool.
+        """
+        hosts = {}
+        for pool in self._host_pools():
+            hosts['{0}://{1}:{2}'.format(pool.scheme, pool.host, pool.port)] = {
+                'connections': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': len([conn for conn in list(pool.pool.queue)
+                             if conn is not None and conn.sock is not None])
+                        if pool.pool is not None else 0,
+            }
+
+        with self._lock:
+            return {
+                'pool_connections': self.pool_connections,
+                'pool_maxsize': self.pool_maxsize,
+                'requests': self._requests,
+                'evictions': self._evictions,
+                'hosts': hosts,
+            }
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
@@ -0,0 +1,223 @@
+"""
+Retry policy of the failed requests. Only transient failures are retried: responses with one of the
+``status_codes`` (by default 408, 429, 500, 502, 503 and 504; a missing row, 404, is never retried) and
+the ``exceptions`` raised while sending the request (by default connection errors and timeouts).
+
+Delays grow exponentially, with full jitter (a random delay between zero and ``base_delay * 2 ** n``,
+capped at ``max_delay``), unless the Stargate tells how long to wait (``Retry-After`` header). Requests
+are not retried past the ``deadline`` of the call, nor once the retry budget of the connection is spent,
+so that an overloaded Stargate answering 503 to everything does not get even more requests.
+
+>>> from starbase import Connection
+>>> from starbase.client.transport.retry import RetryPolicy
+>>>
+>>> connection = Connection(retry_policy=RetryPolicy(retries=5, base_delay=0.1, max_delay=5, deadline=10))
+"""
+
+__title__ = 'starbase.client.transport.retry'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('RetryPolicy', 'RetryBudget', 'RetryState', 'parse_retry_after', 'RETRIABLE_EXCEPTIONS')
+
+import email.utils
+import random
+import threading
+import time
+
+from timeit import default_timer as timer
+
+from requests.exceptions import ConnectionError, Timeout
+
+from starbase.defaults import (
+    RETRIES, RETRY_DELAY, RETRY_MAX_DELAY, RETRY_DEADLINE, RETRY_BUDGET, RETRY_BUDGET_RATIO
+)
+from starbase.client.transport.status_codes import RETRIABLE_STATUS_CODES
+
+# Exceptions of the failures worth retrying: connection errors and timeouts (of both the synchronous and,
+# if available, the asyncio clients).
+RETRIABLE_EXCEPTIONS = (ConnectionError, Timeout)
+
+try:
+    import asyncio
+    import aiohttp
+    RETRIABLE_EXCEPTIONS += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+except ImportError:
+    pass
+
+def parse_retry_after(value):
+    """
+    Parses the value of the ``Retry-After`` header (number of seconds or HTTP date).
+
+    :param str value:
+    :return float: Number of seconds to wait, or None if not given or malformed.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(email.utils.mktime_tz(parsed) - time.time(), 0.0)
+
+
+class RetryBudget(object):
+    """
+    Thread safe retry budget (token bucket). Failed attempts take one token, successful ones give back
+    ``ratio`` tokens. Requests are only retried while more than half of the ``size`` tokens are left, so
+    that on a sustained failure rate retries stop (until enough requests succeed again).
+
+    :param int size: Number of tokens.
+    :param float ratio: Tokens given back per successful attempt.
+    """
+    def __init__(self, size=RETRY_BUDGET, ratio=RETRY_BUDGET_RATIO):
+        self.size = size
+        self.ratio = ratio
+        self.tokens = float(size)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<starbase.client.transport.retry.RetryBudget ({0:.1f}/{1})>".format(self.tokens, self.size)
+
+    def success(self):
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio, float(self.size))
+
+    def failure(self):
+        with self._lock:
+            self.tokens = max(self.tokens - 1, 0.0)
+
+    @property
+    def exhausted(self):
+        """
+        Tells whether retries are to be given up on.
+
+        :return bool:
+        """
+        return self.tokens <= self.size / 2.0
+
+
+class RetryPolicy(object):
+    """
+    Decides which failed requests are retried and how long to wait before doing so. Set on the connection
+    (``retry_policy`` argument); shared by all the requests of it, the retry budget included.
+
+    :param int retries: Maximum number of times to retry a failed request.
+    :param float base_delay: Delay cap of the first retry, in seconds. Doubles with each retry.
+    :param float max_delay: Maximum delay, in seconds. Longer ``Retry-After`` delays are not waited for
+        (the request is not retried).
+    :param float deadline: If given, number of seconds (counted from the first attempt) after which a
+        request is no longer retried.
+    :param set status_codes: Status codes of the responses to retry.
+    :param tuple exceptions: Exceptions to retry.
+    :param int budget: Size of the retry budget (see ``RetryBudget``). If set to None, no budget applies.
+    :param float budget_ratio: Tokens given back to the retry budget per successful attempt.
+    :param bool respect_retry_after: If set to True, the ``Retry-After`` header of the responses is
+        honoured.
+    :param int seed: Seed of the jitter (for reproducible delays).
+    """
+    def __init__(self, retries=RETRIES, base_delay=RETRY_DELAY, max_delay=RETRY_MAX_DELAY,
+                 deadline=RETRY_DEADLINE, status_codes=RETRIABLE_STATUS_CODES,
+                 exceptions=RETRIABLE_EXCEPTIONS, budget=RETRY_BUDGET, budget_ratio=RETRY_BUDGET_RATIO,
+                 respect_retry_after=True, seed=None):
+        """
+        See the docs above.
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.status_codes = frozenset(status_codes)
+        self.exceptions = tuple(exceptions)
+        self.budget = RetryBudget(budget, budget_ratio) if budget is not None else None
+        self.respect_retry_after = respect_retry_after
+        self._random = random.Random(seed)
+
+    def __repr__(self):
+        return "<starbase.client.transport.retry.RetryPolicy (retries={0})>".format(self.retries)
+
+    def is_retriable(self, response=None, error=None):
+        """
+        Tells whether the outcome of an attempt is a failure worth retrying.
+
+        :param requests.Response response:
+        :param Exception error: Exception raised while sending the request.
+        :return bool:
+        """
+        if error is not None:
+            return isinstance(error, self.exceptions)
+        return response is not None and response.status_code in self.status_codes
+
+    def backoff(self, retry):
+        """
+        Full jitter delay before the retry given.
+
+        :param int retry: Number of the retry (starting at 0).
+        :return float:
+        """
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+    def begin(self):
+        """
+        Starts keeping track of the attempts of a request.
+
+        :return starbase.client.transport.retry.RetryState:
+        """
+        return RetryState(self)
+
+
+class RetryState(object):
+    """
+    Attempts of a single request.
+
+    :param starbase.client.transport.retry.RetryPolicy policy:
+    :ivar int retries: Number of times the request was retried so far.
+    """
+    def __init__(self, policy):
+        self.policy = policy
+        self.retries = 0
+        self.started = timer()
+
+    def next_delay(self, response=None, error=None):
+        """
+        Records the outcome of an attempt and tells whether to retry.
+
+        :param requests.Response response:
+        :param Exception error: Exception raised while sending the request.
+        :return float: Number of seconds to wait before retrying, or None if the request is not to be
+            retried.
+        """
+        policy = self.policy
+
+        if not policy.is_retriable(response, error):
+            if policy.budget is not None:
+                policy.budget.success()
+            return None
+
+        if policy.budget is not None:
+            policy.budget.failure()
+            if policy.budget.exhausted:
+                return None
+
+        if self.retries >= policy.retries:
+            return None
+
+        delay = policy.backoff(self.retries)
+
+        if policy.respect_retry_after and response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                if retry_after > policy.max_delay:
+                    return None
+                delay = max(delay, retry_after)
+
+        if policy.deadline is not None and timer() - self.started + delay > policy.deadline:
+            return None
+
+        self.retries += 1
+        return delay
@@ -37,6 +37,7 @@ STATUS_CODE_REQUEST_URI_TOO_LONG = 414
 STATUS_CODE_UNSUPPORTED_MEDIA_TYPE = 415
 STATUS_CODE_REQUESTED_RANGE_NOT_SATISFIABLE = 416
 STATUS_CODE_EXPECTATION_FAILED = 417
+STATUS_CODE_TOO_MANY_REQUESTS = 429
 STATUS_CODE_INTERNAL_SERVER_ERROR = 500
 STATUS_CODE_NOT_IMPLEMENTED = 501
 STATUS_CODE_BAD_GATEWAY = 502
@@ -70,3 +71,13 @@ BAD_STATUS_CODES = set([
     STATUS_CODE_GATEWAY_TIMEOUT,
     STATUS_CODE_HTTP_VERSION_NOT_SUPPORTED
     ])
+
+# Status codes of the failures worth retrying (transient ones). See `starbase.client.transport.retry`.
+RETRIABLE_STATUS_CODES = set([
+    STATUS_CODE_REQUEST_TIMEOUT,
+    STATUS_CODE_TOO_MANY_REQUESTS,
+    STATUS_CODE_INTERNAL_SERVER_ERROR,
+    STATUS_CODE_BAD_GATEWAY,
+    STATUS_CODE_SERVICE_UNAVAILABLE,
+    STATUS_CODE_GATEWAY_TIMEOUT
+    ])
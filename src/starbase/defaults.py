@@ -4,7 +4,14 @@ __copyright__ = 'Copyright (c) 2013-2014 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
 __all__ = (
     'PERFECT_DICT', 'HOST', 'PORT', 'USER', 'PASSWORD', 'MAX_RETRIES',
-    'RETRY_DELAY', 'DEBUG',
+    'RETRY_DELAY', 'RETRY_MAX_DELAY', 'RETRY_DEADLINE', 'RETRY_BUDGET', 'RETRY_BUDGET_RATIO', 'POOL_CONNECTIONS', 'POOL_MAXSIZE', 'POOL_BLOCK',
+    'POOL_IDLE_TIMEOUT', 'POOL_PREWARM', 'MAX_IN_FLIGHT', 'PARALLELISM',
+    'SCAN_BUFFER_SIZE', 'MAX_URL_LENGTH', 'BATCH_FLUSH_SIZE',
+    'BATCH_FLUSH_INTERVAL', 'BATCH_MAX_PENDING', 'BATCH_MAX_PENDING_BYTES', 'BATCH_FLUSHERS',
+    'COMPRESSION_THRESHOLD', 'COMPRESSION_LEVEL', 'TABLES_CACHE_TTL',
+    'SCHEMA_CACHE_TTL', 'ROW_CACHE_SIZE', 'ROW_CACHE_MAX_BYTES', 'ROW_CACHE_TTL',
+    'MISSING_ROWS_CACHE_SIZE', 'MISSING_ROWS_CACHE_TTL', 'BLOOM_FILTER_ERROR_RATE',
+    'COLUMNAR_INT_FILL_VALUE', 'DEBUG',
 )
 
 # If set to True, perfect dict will be enabled.
@@ -25,4 +32,101 @@ PASSWORD = ''
 RETRIES = 0
 RETRY_DELAY = 2
 
+# Maximum number of seconds to wait before retrying a failed request (longer Retry-After delays are not
+# waited for)
+RETRY_MAX_DELAY = 30
+
+# Seconds after which a failed request is no longer retried, counted from the first attempt (None - no
+# deadline)
+RETRY_DEADLINE = None
+
+# Size of the retry budget of a connection (in retries). Failed attempts take one token, successful ones
+# give back `RETRY_BUDGET_RATIO` tokens; requests are only retried while more than half of the tokens are
+# left (None - no budget). Thus a burst of up to 50 failed attempts is retried, while a sustained failure
+# rate above about 1 in 11 attempts (see `RETRY_BUDGET_RATIO`) spends the budget
+RETRY_BUDGET = 100
+
+# Tokens given back to the retry budget per successful attempt
+RETRY_BUDGET_RATIO = 0.1
+
+# Number of per-host connection pools to cache
+POOL_CONNECTIONS = 10
+
+# Maximum number of keep-alive connections per host
+POOL_MAXSIZE = 10
+
+# If set to True, requests wait for a free pooled connection
+POOL_BLOCK = False
+
+# Seconds after which idle pooled connections are closed (None - never)
+POOL_IDLE_TIMEOUT = None
+
+# Number of connections to open when connection instance is created
+POOL_PREWARM = 0
+
+# Maximum number of concurrent requests of an asyncio connection
+MAX_IN_FLIGHT = 100
+
+# Number of worker threads used by the parallel operations
+PARALLELISM = 4
+
+# Number of rows buffered per region in parallel scans
+SCAN_BUFFER_SIZE = 1000
+
+# Maximum length of the URLs built for multi-row requests
+MAX_URL_LENGTH = 4096
+
+# Number of rows sent per request by the background batches
+BATCH_FLUSH_SIZE = 1000
+
+# Seconds after which background batches send the rows stacked so far
+BATCH_FLUSH_INTERVAL = 1.0
+
+# Maximum number of rows queued by background batches (producers block when
+# reached)
+BATCH_MAX_PENDING = 10000
+
+# Maximum estimated encoded size (in bytes) of the rows queued by background
+# batches and not sent yet (producers block when reached)
+BATCH_MAX_PENDING_BYTES = 64 * 1024 * 1024
+
+# Number of threads sending the background batch requests
+BATCH_FLUSHERS = 1
+
+# Minimum size (in bytes) of the request bodies gzip compressed (when
+# compression is enabled)
+COMPRESSION_THRESHOLD = 1024
+
+# Gzip compression level (1 - fastest, 9 - smallest)
+COMPRESSION_LEVEL = 6
+
+# Seconds the table list used by the table existence checks is cached for
+# (0 - not cached, None - until invalidated)
+TABLES_CACHE_TTL = 10
+
+# Seconds the table schemas are cached for (0 - not cached, None - until
+# invalidated)
+SCHEMA_CACHE_TTL = 10
+
+# Maximum number of rows cached by `Table.fetch` (0 - row cache disabled)
+ROW_CACHE_SIZE = 0
+
+# Maximum (estimated) size in bytes of the rows cached (None - unbounded)
+ROW_CACHE_MAX_BYTES = None
+
+# Seconds the rows are cached for (None - until evicted or invalidated)
+ROW_CACHE_TTL = 60
+
+# Maximum number of absent rows remembered by `Table.fetch` (0 - disabled)
+MISSING_ROWS_CACHE_SIZE = 0
+
+# Seconds the absent rows are remembered for (None - until evicted or written)
+MISSING_ROWS_CACHE_TTL = 10
+
+# False positive probability of the row key Bloom filters (see `Table.build_bloom_filter`)
+BLOOM_FILTER_ERROR_RATE = 0.01
+
+# Value of the missing cells of the `int64` columns of the columnar results (see `ColumnarResult.masks`)
+COLUMNAR_INT_FILL_VALUE = 0
+
 DEBUG = False
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+In-memory Stargate emulator, to develop, test, benchmark and load test against with no HBase cluster
+around. Served over HTTP on localhost (``EmulatorServer``, for both the synchronous and the asyncio
+clients) or in-process (``EmulatorAdapter``, synchronous client only). Latency and errors can be
+injected (see ``Emulator``).
+
+>>> from starbase import Connection
+>>> from starbase.emulator import Emulator, EmulatorServer
+>>>
+>>> emulator = Emulator(latency=(0.001, 0.01), error_rate=0.001)
+>>> emulator.create_table('table1', 'column1', 'column2')
+>>>
+>>> with EmulatorServer(emulator) as server:
+>>>     connection = Connection(url=server.url, retries=3, retry_delay=0)
+>>>     table = connection.table('table1')
+>>>     table.insert('row1', {'column1': {'id': '1'}})
+>>>     table.fetch('row1')
+"""
+
+__title__ = 'starbase.emulator'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('Emulator', 'EmulatorError', 'EmulatorServer', 'EmulatorAdapter', 'Store')
+
+from starbase.emulator.store import Store
+from starbase.emulator.stargate import Emulator, EmulatorError
+from starbase.emulator.server import EmulatorServer, EmulatorAdapter
@@ -0,0 +1,311 @@
+"""
+Scanner filters of the emulator. Filters are given the way Stargate takes them: JSON strings like
+``{"type": "RowFilter", "op": "EQUAL", "comparator": {"type": "RegexStringComparator", "value": "^row"}}``.
+Values of the ``BinaryComparator``, ``BinaryPrefixComparator`` and ``NullComparator`` comparators, and of
+the ``PrefixFilter``, ``InclusiveStopFilter`` and ``ColumnPrefixFilter`` filters (and the family and
+qualifier of the ``SingleColumnValueFilter``) are base64 encoded.
+
+Filters work on whole rows: they are given the row key along with the list of the (column, timestamp,
+value) tuples of the row and return the cells to keep (an empty list skips the row).
+"""
+
+__title__ = 'starbase.emulator.filters'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('build_filter', 'Filter', 'FILTERS')
+
+import base64
+import json
+import operator
+import re
+
+from six import string_types
+
+# Compare operators by name. Cells pass if ``operator(cell value, comparator value)`` holds.
+OPERATORS = {
+    'LESS': operator.lt,
+    'LESS_OR_EQUAL': operator.le,
+    'EQUAL': operator.eq,
+    'NOT_EQUAL': operator.ne,
+    'GREATER_OR_EQUAL': operator.ge,
+    'GREATER': operator.gt,
+    'NO_OP': lambda first, second: True,
+}
+
+def _decode(value):
+    """
+    :param str value: Base64 encoded value.
+    :return bytes:
+    """
+    return base64.b64decode(value or '')
+
+
+class Comparator(object):
+    """
+    Compares values with the comparator value. Returns a negative number, zero or a positive number if
+    the value is less than, equal to or greater than the comparator value.
+
+    :param dict spec: ``{"type": ..., "value": ...}``.
+    """
+    def __init__(self, spec):
+        self.type = spec.get('type')
+        value = spec.get('value')
+
+        if self.type in ('BinaryComparator', 'BinaryPrefixComparator', 'NullComparator'):
+            self.value = _decode(value)
+        elif 'RegexStringComparator' == self.type:
+            self.value = re.compile(value)
+        elif 'SubstringComparator' == self.type:
+            self.value = (value or '').lower()
+        else:
+            raise ValueError("Unsupported comparator {0}.".format(self.type))
+
+    def compare(self, value):
+        """
+        :param bytes value:
+        :return int:
+        """
+        if 'BinaryComparator' == self.type or 'NullComparator' == self.type:
+            return (value > self.value) - (value < self.value)
+
+        if 'BinaryPrefixComparator' == self.type:
+            value = value[:len(self.value)]
+            return (value > self.value) - (value < self.value)
+
+        text = value.decode('utf8', 'replace')
+        if 'RegexStringComparator' == self.type:
+            return 0 if self.value.search(text) else 1
+        return 0 if self.value in text.lower() else 1
+
+
+class Filter(object):
+    """
+    Base filter. Filters are created per scanner, so they may keep state (``PageFilter``,
+    ``WhileMatchFilter``, etc.). Once ``exhausted``, the scanner stops.
+
+    :param dict spec: Filter definition.
+    """
+    def __init__(self, spec):
+        self.spec = spec
+        self.exhausted = False
+
+    def __repr__(self):
+        return "<starbase.emulator.filters.{0}>".format(self.__class__.__name__)
+
+    def apply(self, key, cells):
+        """
+        :param bytes key: Row key.
+        :param list cells: List of (column, timestamp, value) tuples of the row.
+        :return list: Cells to keep.
+        """
+        return cells
+
+
+class CompareFilter(Filter):
+    """
+    Base of the filters comparing a part of the row (or of the cells) with a comparator.
+    """
+    def __init__(self, spec):
+        super(CompareFilter, self).__init__(spec)
+        try:
+            self.operator = OPERATORS[spec.get('op', 'EQUAL')]
+        except KeyError:
+            raise ValueError("Unsupported compare operator {0}.".format(spec.get('op')))
+        self.comparator = Comparator(spec.get('comparator') or {})
+
+    def matches(self, value):
+        """
+        :param bytes value:
+        :return bool:
+        """
+        return self.operator(self.comparator.compare(value), 0)
+
+
+class RowFilter(CompareFilter):
+    def apply(self, key, cells):
+        return cells if self.matches(key) else []
+
+
+class FamilyFilter(CompareFilter):
+    def apply(self, key, cells):
+        return [cell for cell in cells if self.matches(cell[0].split(b':', 1)[0])]
+
+
+class QualifierFilter(CompareFilter):
+    def apply(self, key, cells):
+        return [cell for cell in cells if self.matches(cell[0].split(b':', 1)[1])]
+
+
+class ValueFilter(CompareFilter):
+    def apply(self, key, cells):
+        return [cell for cell in cells if self.matches(cell[2])]
+
+
+class SingleColumnValueFilter(CompareFilter):
+    """
+    Keeps the rows whose column (``family`` and ``qualifier``) value matches. Rows not having the column
+    are kept, unless ``ifMissing`` is set to true.
+    """
+    def __init__(self, spec):
+        super(SingleColumnValueFilter, self).__init__(spec)
+        self.column = _decode(spec.get('family')) + b':' + _decode(spec.get('qualifier'))
+        self.if_missing = spec.get('ifMissing') in (True, 'true')
+
+    def apply(self, key, cells):
+        for column, timestamp, value in cells:
+            if column == self.column:
+                return cells if self.matches(value) else []
+        return [] if self.if_missing else cells
+
+
+class PrefixFilter(Filter):
+    def __init__(self, spec):
+        super(PrefixFilter, self).__init__(spec)
+        self.prefix = _decode(spec.get('value'))
+
+    def apply(self, key, cells):
+        return cells if key.startswith(self.prefix) else []
+
+
+class InclusiveStopFilter(Filter):
+    def __init__(self, spec):
+        super(InclusiveStopFilter, self).__init__(spec)
+        self.stop_row = _decode(spec.get('value'))
+
+    def apply(self, key, cells):
+        if key > self.stop_row:
+            self.exhausted = True
+            return []
+        return cells
+
+
+class PageFilter(Filter):
+    """
+    Stops the scanner once ``value`` rows passed.
+    """
+    def __init__(self, spec):
+        super(PageFilter, self).__init__(spec)
+        self.limit = int(spec.get('value'))
+        self.count = 0
+
+    def apply(self, key, cells):
+        if self.count >= self.limit:
+            self.exhausted = True
+            return []
+        self.count += 1
+        return cells
+
+
+class ColumnPrefixFilter(Filter):
+    def __init__(self, spec):
+        super(ColumnPrefixFilter, self).__init__(spec)
+        self.prefixes = [_decode(self.spec.get('value'))]
+
+    def apply(self, key, cells):
+        return [cell for cell in cells if any(cell[0].split(b':', 1)[1].startswith(prefix)
+                                              for prefix in self.prefixes)]
+
+
+class MultipleColumnPrefixFilter(ColumnPrefixFilter):
+    def __init__(self, spec):
+        super(MultipleColumnPrefixFilter, self).__init__(spec)
+        self.prefixes = [_decode(prefix) for prefix in spec.get('prefixes') or []]
+
+
+class ColumnCountGetFilter(Filter):
+    def apply(self, key, cells):
+        return cells[:int(self.spec.get('limit'))]
+
+
+class TimestampsFilter(Filter):
+    def apply(self, key, cells):
+        timestamps = set(int(timestamp) for timestamp in self.spec.get('timestamps') or [])
+        return [cell for cell in cells if cell[1] in timestamps]
+
+
+class FirstKeyOnlyFilter(Filter):
+    def apply(self, key, cells):
+        return cells[:1]
+
+
+class KeyOnlyFilter(Filter):
+    def apply(self, key, cells):
+        return [(column, timestamp, b'') for column, timestamp, value in cells]
+
+
+class SkipFilter(Filter):
+    """
+    Skips the whole row if the wrapped filter drops any of its cells.
+    """
+    def __init__(self, spec):
+        super(SkipFilter, self).__init__(spec)
+        self.filter = build_filter(spec['filters'][0])
+
+    def apply(self, key, cells):
+        return cells if len(self.filter.apply(key, cells)) == len(cells) else []
+
+
+class WhileMatchFilter(SkipFilter):
+    """
+    Stops the scanner at the first row the wrapped filter drops (any of the cells of).
+    """
+    def apply(self, key, cells):
+        result = super(WhileMatchFilter, self).apply(key, cells)
+        if cells and not result:
+            self.exhausted = True
+        return result
+
+
+class FilterList(Filter):
+    """
+    Combines filters: with ``MUST_PASS_ALL``, cells have to pass all of them (they're applied in
+    order); with ``MUST_PASS_ONE``, any of them.
+    """
+    def __init__(self, spec):
+        super(FilterList, self).__init__(spec)
+        self.must_pass_all = 'MUST_PASS_ONE' != spec.get('op', 'MUST_PASS_ALL')
+        self.filters = [build_filter(item) for item in spec.get('filters') or []]
+
+    def apply(self, key, cells):
+        if self.must_pass_all:
+            for item in self.filters:
+                cells = item.apply(key, cells)
+                if item.exhausted:
+                    self.exhausted = True
+                if not cells:
+                    break
+            return cells
+
+        passed = {}
+        for item in self.filters:
+            for cell in item.apply(key, cells):
+                passed.setdefault(cell[:2], cell)
+        if self.filters and all(item.exhausted for item in self.filters):
+            self.exhausted = True
+        return [passed[cell[:2]] for cell in cells if cell[:2] in passed]
+
+
+# Filter classes by type name.
+FILTERS = dict((cls.__name__, cls) for cls in (
+    RowFilter, FamilyFilter, QualifierFilter, ValueFilter, SingleColumnValueFilter, PrefixFilter,
+    InclusiveStopFilter, PageFilter, ColumnPrefixFilter, MultipleColumnPrefixFilter, ColumnCountGetFilter,
+    TimestampsFilter, FirstKeyOnlyFilter, KeyOnlyFilter, SkipFilter, WhileMatchFilter, FilterList,
+))
+
+def build_filter(spec):
+    """
+    Builds the filter given.
+
+    :param str|dict spec: Filter definition (JSON string or already parsed).
+    :return starbase.emulator.filters.Filter:
+    :raise ValueError: If the filter (or its comparator) is not supported or malformed.
+    """
+    if isinstance(spec, string_types):
+        spec = json.loads(spec)
+
+    try:
+        cls = FILTERS[spec.get('type')]
+    except (KeyError, AttributeError):
+        raise ValueError("Unsupported filter {0}.".format(spec))
+    return cls(spec)
@@ -0,0 +1,186 @@
+__title__ = 'starbase.emulator.server'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('EmulatorServer', 'EmulatorAdapter')
+
+import gzip
+import io
+import threading
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from starbase.emulator.stargate import Emulator
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Passes the HTTP requests to the emulator of the server.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        emulator = self.server.emulator
+        status_code, headers, content = emulator.handle(self.command, self.path, dict(self.headers.items()),
+                                                        body, base_url=self.server.url)
+
+        if content and emulator.compress_responses and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            buffer = io.BytesIO()
+            with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+                f.write(content)
+            content = buffer.getvalue()
+            headers['Content-Encoding'] = 'gzip'
+
+        self.send_response(status_code)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _handle
+
+
+class EmulatorServer(object):
+    """
+    Serves the emulator over HTTP (on localhost by default), in a background thread. Works with both the
+    synchronous and the asyncio clients.
+
+    :param starbase.emulator.stargate.Emulator emulator: Created if not given.
+    :param str host:
+    :param int port: A free port is picked if set to 0.
+
+    :example:
+    >>> from starbase import Connection
+    >>> from starbase.emulator import EmulatorServer
+    >>> with EmulatorServer() as server:
+    >>>     server.emulator.create_table('table1', 'column1', 'column2')
+    >>>     connection = Connection(url=server.url)
+    >>>     connection.table('table1').insert('row1', {'column1': {'id': '1'}})
+    """
+    def __init__(self, emulator=None, host='127.0.0.1', port=0):
+        self.emulator = emulator if emulator is not None else Emulator()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def __repr__(self):
+        return "<starbase.emulator.server.EmulatorServer ({0}:{1})>".format(self.host, self.port)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        """
+        Base URL of the server (to be given to the connection).
+
+        :return str:
+        """
+        return 'http://{0}:{1}/'.format(self.host, self.port)
+
+    def start(self):
+        """
+        Starts serving.
+        """
+        self._server = _ThreadingHTTPServer((self.host, self.port), _RequestHandler)
+        self.port = self._server.server_address[1]
+        self._server.emulator = self.emulator
+        self._server.url = self.url
+        self._thread = threading.Thread(target=self._server.serve_forever, name='starbase-emulator')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops serving.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+
+class EmulatorAdapter(BaseAdapter):
+    """
+    Transport adapter of the ``requests`` library passing the requests to the emulator, in-process
+    (no sockets involved). Synchronous client only.
+
+    :param starbase.emulator.stargate.Emulator emulator: Created if not given.
+
+    :example:
+    >>> from starbase import Connection
+    >>> from starbase.emulator import EmulatorAdapter
+    >>> connection = Connection()
+    >>> adapter = EmulatorAdapter.mount(connection)
+    >>> adapter.emulator.create_table('table1', 'column1', 'column2')
+    """
+    def __init__(self, emulator=None):
+        super(EmulatorAdapter, self).__init__()
+        self.emulator = emulator if emulator is not None else Emulator()
+
+    def __repr__(self):
+        return "<starbase.emulator.server.EmulatorAdapter>"
+
+    @classmethod
+    def mount(cls, connection, emulator=None):
+        """
+        Mounts a new adapter on the connection given: all the requests of the connection go to the
+        emulator.
+
+        :param starbase.client.connection.Connection connection:
+        :param starbase.emulator.stargate.Emulator emulator: Created if not given.
+        :return starbase.emulator.server.EmulatorAdapter:
+        """
+        adapter = cls(emulator)
+        connection.pool.session.mount(connection.base_url, adapter)
+        return adapter
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        body = request.body or b''
+        if not isinstance(body, bytes):
+            body = body.encode('utf8')
+
+        status_code, headers, content = self.emulator.handle(
+            request.method, request.url, dict(request.headers.items()), body,
+            base_url='{0}://{1}/'.format(url.scheme, url.netloc)
+            )
+
+        response = Response()
+        response.status_code = status_code
+        response.reason = BaseHTTPServer.BaseHTTPRequestHandler.responses.get(status_code, ('',))[0]
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,635 @@
+__title__ = 'starbase.emulator.stargate'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('Emulator', 'EmulatorError', 'SCANNER_BATCH_SIZE')
+
+import base64
+import gzip
+import io
+import itertools
+import json
+import random
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+from six.moves.urllib.parse import urlsplit, parse_qs, unquote, unquote_to_bytes
+
+from starbase import protobuf
+from starbase.content_types import MEDIA_TYPE_JSON, MEDIA_TYPE_PROTOBUF
+from starbase.client.transport import status_codes
+from starbase.client.transport.hooks import parse_url, operation_name
+from starbase.emulator.store import Store, now
+from starbase.emulator.filters import build_filter
+
+# Number of cells per scanner batch, unless the scanner is created with another ``batch``.
+SCANNER_BATCH_SIZE = 100
+
+# Reported by the `version` resource.
+VERSION = {
+    'Server': 'jetty/6.1.26',
+    'REST': '0.0.2',
+    'OS': 'starbase emulator',
+    'JVM': 'n/a',
+    'Jersey': '1.8',
+}
+
+# Reported by the `version/cluster` resource.
+CLUSTER_VERSION = '0.94.7'
+
+# Region server all the regions are reported to be served by.
+REGION_SERVER = 'localhost:60020'
+
+def b64encode(value):
+    return base64.b64encode(value).decode('utf8')
+
+def b64decode(value):
+    return base64.b64decode(value or '')
+
+
+class EmulatorError(Exception):
+    """
+    Raised while handling a request to respond with an error status code.
+
+    :param int status_code:
+    :param str message:
+    """
+    def __init__(self, status_code, message=''):
+        super(EmulatorError, self).__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class _Scanner(object):
+    """
+    Open scanner. Keeps the last row key returned, so that rows written in the meantime are seen (as
+    with HBase, scanners are not snapshots).
+    """
+    def __init__(self, table, start_row=None, end_row=None, columns=None, start_time=None, end_time=None,
+                 max_versions=1, batch=SCANNER_BATCH_SIZE, filter=None):
+        self.table = table
+        self.start_row = start_row
+        self.end_row = end_row
+        self.columns = columns
+        self.start_time = start_time
+        self.end_time = end_time
+        self.max_versions = max_versions
+        self.batch = batch
+        self.filter = filter
+        self.last_key = None
+        self.exhausted = False
+
+
+class Emulator(object):
+    """
+    In-memory Stargate emulator. Implements the Stargate REST resources used by starbase (table list,
+    version, cluster version and status, table schema and regions, row fetch, store and delete,
+    multiget and scanners with filters) on top of a sorted in-memory store. JSON and protobuf content
+    types are supported (XML for schema and scanner definitions).
+
+    Requests are handled by ``handle``. To be used by the clients, serve the emulator over HTTP
+    (``starbase.emulator.server.EmulatorServer``) or mount it on a connection
+    (``starbase.emulator.server.EmulatorAdapter``).
+
+    Latency and errors can be injected, to load test the clients: each request is delayed by
+    ``latency`` seconds and fails with the ``error_status_code`` with the ``error_rate`` probability.
+    Failed requests have no effect on the data.
+
+    :param starbase.emulator.store.Store store: Created if not given.
+    :param float|tuple latency: Seconds each request is delayed by. A (min, max) tuple for a random
+        (uniform) delay.
+    :param float error_rate: Probability (0 - 1) of a request to fail.
+    :param int error_status_code: Status code of the failed requests.
+    :param int seed: Seed of the random latency and errors (for reproducible runs).
+    :param bool compress_responses: If set to True, responses are gzip compressed for the clients
+        accepting it (as with the Stargate gzip filter enabled). Used by the HTTP server only.
+
+    :example:
+    >>> from starbase.emulator import Emulator, EmulatorServer
+    >>> emulator = Emulator(latency=(0.001, 0.005), error_rate=0.01)
+    >>> emulator.create_table('table1', 'column1', 'column2')
+    >>> with EmulatorServer(emulator) as server:
+    >>>     connection = Connection(url=server.url)
+    """
+    def __init__(self, store=None, latency=0, error_rate=0, error_status_code=503, seed=None,
+                 compress_responses=False):
+        self.store = store if store is not None else Store()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        self.compress_responses = compress_responses
+        self.requests = 0
+        self.operations = {}
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        self._failures = []
+        self._scanners = {}
+        self._scanner_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "<starbase.emulator.stargate.Emulator ({0} tables)>".format(len(self.store.tables))
+
+    # ******************** Seeding and fault injection ********************
+
+    def create_table(self, name, *columns):
+        """
+        Creates a table (see ``starbase.emulator.store.Store.create_table``).
+
+        :param str name:
+        :param list *columns: Column family names.
+        :return starbase.emulator.store.EmulatedTable:
+        """
+        return self.store.create_table(name, *columns)
+
+    def split(self, name, split_keys):
+        """
+        Splits the table into regions (see ``starbase.emulator.store.Store.split``).
+
+        :param str name: Table name.
+        :param list split_keys: Row keys the regions start at.
+        """
+        self.store.split(name, split_keys)
+
+    def fail_next(self, count=1, status_code=503, operation=None):
+        """
+        Makes the next requests fail.
+
+        :param int count: Number of requests to fail.
+        :param int status_code:
+        :param str operation: If given, only the requests of the operation (see
+            ``starbase.client.transport.hooks.operation_name``) fail.
+        """
+        with self._lock:
+            self._failures.append([count, status_code, operation])
+
+    def reset_stats(self):
+        """
+        Resets the request counters.
+        """
+        with self._lock:
+            self.requests = 0
+            self.operations = {}
+            self.injected_errors = 0
+
+    def _inject(self, operation):
+        """
+        Counts the request, delays it and tells whether it has to fail.
+
+        :param str operation:
+        :return int: Status code to fail with (None if the request should be handled).
+        """
+        with self._lock:
+            self.requests += 1
+            self.operations[operation] = self.operations.get(operation, 0) + 1
+
+            status_code = None
+            for failure in self._failures:
+                if failure[2] is None or failure[2] == operation:
+                    failure[0] -= 1
+                    status_code = failure[1]
+                    break
+            self._failures = [failure for failure in self._failures if failure[0] > 0]
+
+            if status_code is None and self.error_rate and self._random.random() < self.error_rate:
+                status_code = self.error_status_code
+
+            if isinstance(self.latency, (list, tuple)):
+                latency = self._random.uniform(*self.latency)
+            else:
+                latency = self.latency
+
+            if status_code is not None:
+                self.injected_errors += 1
+
+        if latency:
+            time.sleep(latency)
+        return status_code
+
+    # ******************** Request handling ********************
+
+    def handle(self, method, url, headers=None, body=b'', base_url='http://localhost:8000/'):
+        """
+        Handles a request.
+
+        :param str method: HTTP method.
+        :param str url: Requested path (and query), e.g. ``/table1/row1?v=2``. Full URLs are accepted
+            as well.
+        :param dict headers: Request headers.
+        :param bytes body: Request body.
+        :param str base_url: Base URL of the emulator (to build the scanner URLs with).
+        :return tuple: Status code, dict of response headers and response body (bytes).
+        """
+        url = urlsplit(url)
+        path = url.path.lstrip('/')
+        headers = dict((key.lower(), value) for key, value in (headers or {}).items())
+        protobuf_response = MEDIA_TYPE_PROTOBUF in (headers.get('accept') or '')
+
+        operation = operation_name(method, parse_url(path)[0])
+        status_code = self._inject(operation)
+        if status_code is not None:
+            return self._error(status_code, "Injected error.")
+
+        try:
+            if body and 'gzip' == headers.get('content-encoding'):
+                body = gzip.GzipFile(fileobj=io.BytesIO(body)).read()
+            request = _Request(method, path.split('/') if path else [], parse_qs(url.query), headers, body,
+                               base_url)
+            with self.store.lock:
+                status_code, content = self._dispatch(request)
+        except EmulatorError as e:
+            return self._error(e.status_code, e.message)
+        except (ValueError, KeyError, TypeError, ElementTree.ParseError) as e:
+            return self._error(status_codes.STATUS_CODE_BAD_REQUEST, "Bad request: {0}".format(e))
+
+        response_headers = request.response_headers
+        if content is None:
+            return status_code, response_headers, b''
+
+        if protobuf_response and request.encode is not None:
+            response_headers['Content-Type'] = MEDIA_TYPE_PROTOBUF
+            return status_code, response_headers, request.encode(content)
+
+        response_headers['Content-Type'] = MEDIA_TYPE_JSON
+        return status_code, response_headers, json.dumps(content).encode('utf8')
+
+    @staticmethod
+    def _error(status_code, message):
+        return status_code, {'Content-Type': 'text/plain'}, message.encode('utf8')
+
+    def _dispatch(self, request):
+        """
+        :return tuple: Status code and content (None for no content).
+        """
+        parts = request.parts
+        method = request.method
+
+        if not parts or parts == ['']:
+            self._allow(request, 'GET')
+            request.encode = protobuf.encode_table_list
+            return 200, {'table': [{'name': name} for name in sorted(self.store.tables)]}
+
+        if 'version' == parts[0]:
+            self._allow(request, 'GET')
+            if len(parts) > 1 and 'cluster' == parts[1]:
+                return 200, CLUSTER_VERSION
+            request.encode = protobuf.encode_version
+            return 200, VERSION
+
+        if 'status' == parts[0]:
+            self._allow(request, 'GET')
+            return 200, self._cluster_status()
+
+        name = unquote(parts[0])
+        resource = parts[1] if len(parts) > 1 else ''
+
+        if 'schema' == resource:
+            return self._schema(request, name)
+
+        table = self.store.get(name)
+        if table is None:
+            # As Stargate does, writes to missing tables fail with 500, reads with 404.
+            if resource not in ('regions', 'multiget', 'scanner') and 'GET' != method:
+                raise EmulatorError(status_codes.STATUS_CODE_INTERNAL_SERVER_ERROR,
+                                    "Table {0} not found.".format(name))
+            raise EmulatorError(status_codes.STATUS_CODE_NOT_FOUND, "Table {0} not found.".format(name))
+
+        if 'regions' == resource:
+            self._allow(request, 'GET')
+            request.encode = protobuf.encode_table_info
+            return 200, self._regions(table)
+
+        if 'multiget' == resource:
+            self._allow(request, 'GET')
+            return self._multiget(request, table)
+
+        if 'scanner' == resource:
+            if len(parts) < 3 or not parts[2]:
+                self._allow(request, 'PUT', 'POST')
+                return self._create_scanner(request, table)
+            return self._scanner(request, table, parts[2])
+
+        if not resource:
+            raise EmulatorError(status_codes.STATUS_CODE_METHOD_NOT_ALLOWED, "No row key given.")
+
+        return self._row(request, table, unquote_to_bytes(resource))
+
+    @staticmethod
+    def _allow(request, *methods):
+        if request.method not in methods:
+            raise EmulatorError(status_codes.STATUS_CODE_METHOD_NOT_ALLOWED,
+                                "Method {0} not allowed.".format(request.method))
+
+    def _cluster_status(self):
+        regions = []
+        for table in self.store.tables.values():
+            for index, (start_row, end_row) in enumerate(table.regions()):
+                regions.append({
+                    'name': b64encode(self._region_name(table, start_row, index).encode('utf8')),
+                    'stores': len(table.families),
+                    'storefiles': 0,
+                    'storefileSizeMB': 0,
+                    'memstoreSizeMB': 0,
+                    'storefileIndexSizeMB': 0,
+                    'readRequestsCount': 0,
+                    'writeRequestsCount': 0,
+                })
+        return {
+            'regions': len(regions),
+            'requests': self.requests,
+            'averageLoad': float(len(regions)),
+            'DeadNodes': [],
+            'LiveNodes': [{
+                'name': REGION_SERVER,
+                'startCode': 0,
+                'requests': self.requests,
+                'heapSizeMB': 0,
+                'maxHeapSizeMB': 0,
+                'Region': regions,
+            }],
+        }
+
+    @staticmethod
+    def _region_name(table, start_row, index):
+        return '{0},{1},{2}'.format(table.name, start_row.decode('utf8', 'replace'), index + 1)
+
+    def _regions(self, table):
+        return {
+            'name': table.name,
+            'Region': [
+                {
+                    'name': self._region_name(table, start_row, index),
+                    'startKey': b64encode(start_row),
+                    'endKey': b64encode(end_row),
+                    'id': index + 1,
+                    'location': REGION_SERVER,
+                }
+                for index, (start_row, end_row) in enumerate(table.regions())
+            ]
+        }
+
+    def _schema(self, request, name):
+        table = self.store.get(name)
+
+        if 'GET' == request.method:
+            if table is None:
+                raise EmulatorError(status_codes.STATUS_CODE_NOT_FOUND, "Table {0} not found.".format(name))
+            request.encode = protobuf.encode_table_schema
+            return 200, table.schema
+
+        if 'DELETE' == request.method:
+            if not self.store.drop(name):
+                raise EmulatorError(status_codes.STATUS_CODE_SERVICE_UNAVAILABLE,
+                                    "Table {0} not found.".format(name))
+            for scanner_id in [key for key, value in self._scanners.items() if value.table is table]:
+                del self._scanners[scanner_id]
+            return 200, None
+
+        self._allow(request, 'PUT', 'POST')
+        schema = request.parse_schema()
+        if table is None:
+            self.store.create(name, schema)
+            return 201, None
+        table.set_schema(schema, replace='PUT' == request.method)
+        return 200, None
+
+    def _multiget(self, request, table):
+        max_versions = int(request.query.get('v', ['1'])[0])
+
+        rows = []
+        for spec in request.query.get('row', []):
+            segments = spec.split('/')
+            key = unquote_to_bytes(segments[0])
+            columns = _parse_columns(segments[1] if len(segments) > 1 else '')
+            start_time, end_time = _parse_timestamp(segments[2] if len(segments) > 2 else '')
+            cells = table.get(key, columns=columns, start_time=start_time, end_time=end_time,
+                              max_versions=max_versions)
+            if cells:
+                rows.append((key, cells))
+
+        if not rows:
+            raise EmulatorError(status_codes.STATUS_CODE_NOT_FOUND, "No rows found.")
+        request.encode = protobuf.encode_cell_set
+        return 200, request.cell_set(rows)
+
+    def _row(self, request, table, key):
+        parts = request.parts
+        columns = _parse_columns(parts[2] if len(parts) > 2 else '')
+        start_time, end_time = _parse_timestamp(parts[3] if len(parts) > 3 else '')
+
+        if 'GET' == request.method:
+            max_versions = int(request.query.get('v', ['1'])[0])
+            cells = table.get(key, columns=columns, start_time=start_time, end_time=end_time,
+                              max_versions=max_versions)
+            if not cells:
+                raise EmulatorError(status_codes.STATUS_CODE_NOT_FOUND, "Row not found.")
+            request.encode = protobuf.encode_cell_set
+            return 200, request.cell_set([(key, cells)])
+
+        if 'DELETE' == request.method:
+            timestamp = end_time - 1 if end_time is not None else None
+            table.delete(key, columns=columns, timestamp=timestamp)
+            return 200, None
+
+        self._allow(request, 'PUT', 'POST')
+        rows = request.parse_cell_set()
+        families = table.families
+        for row_key, cells in rows:
+            for column, timestamp, value in cells:
+                if table.family_of(column) not in families:
+                    raise EmulatorError(status_codes.STATUS_CODE_SERVICE_UNAVAILABLE,
+                                        "Column family {0} does not exist.".format(table.family_of(column)))
+
+        for row_key, cells in rows:
+            for column, timestamp, value in cells:
+                table.put(row_key, column, value, timestamp)
+        return 200, None
+
+    def _create_scanner(self, request, table):
+        data = request.parse_scanner()
+        filter_spec = data.get('filter')
+        scanner = _Scanner(
+            table,
+            start_row = data.get('startRow') or None,
+            end_row = data.get('endRow') or None,
+            columns = [column.rstrip(b':') for column in data.get('column') or []] or None,
+            start_time = int(data['startTime']) if data.get('startTime') else None,
+            end_time = int(data['endTime']) if data.get('endTime') else None,
+            max_versions = int(data.get('maxVersions') or 1),
+            batch = int(data.get('batch') or SCANNER_BATCH_SIZE),
+            filter = build_filter(filter_spec) if filter_spec else None,
+            )
+
+        scanner_id = '{0}{1:x}'.format(now(), next(self._scanner_ids))
+        self._scanners[scanner_id] = scanner
+        request.response_headers['Location'] = '{0}{1}/scanner/{2}'.format(request.base_url, table.name,
+                                                                           scanner_id)
+        return 201, None
+
+    def _scanner(self, request, table, scanner_id):
+        scanner = self._scanners.get(scanner_id)
+        if scanner is None or scanner.table is not table:
+            raise EmulatorError(status_codes.STATUS_CODE_NOT_FOUND, "Scanner {0} not found.".format(scanner_id))
+
+        if 'DELETE' == request.method:
+            del self._scanners[scanner_id]
+            return 200, None
+
+        self._allow(request, 'GET')
+        if scanner.exhausted:
+            return 204, None
+
+        # Rows are never split; a batch ends once it holds ``batch`` cells or more.
+        rows = []
+        number_of_cells = 0
+        for key in table.scan(scanner.start_row, scanner.end_row, after=scanner.last_key):
+            scanner.last_key = key
+            cells = table.get(key, columns=scanner.columns, start_time=scanner.start_time,
+                              end_time=scanner.end_time, max_versions=scanner.max_versions)
+            if cells and scanner.filter is not None:
+                cells = scanner.filter.apply(key, cells)
+                if scanner.filter.exhausted:
+                    scanner.exhausted = True
+            if cells:
+                rows.append((key, cells))
+                number_of_cells += len(cells)
+            if scanner.exhausted or number_of_cells >= scanner.batch:
+                break
+        else:
+            scanner.exhausted = True
+
+        if not rows:
+            return 204, None
+        request.encode = protobuf.encode_cell_set
+        return 200, request.cell_set(rows)
+
+
+def _parse_columns(spec):
+    """
+    :param str spec: Comma separated column families or columns, as given in the URL.
+    :return list: Column families or columns, as bytes (None if not given).
+    """
+    columns = [unquote_to_bytes(column).rstrip(b':') for column in spec.split(',') if column]
+    return columns or None
+
+def _parse_timestamp(spec):
+    """
+    :param str spec: Timestamp (``timestamp``) or time range (``start,end``), as given in the URL.
+    :return tuple: Start (inclusive) and end (exclusive) of the time range.
+    """
+    if not spec:
+        return None, None
+    if ',' in spec:
+        start_time, end_time = spec.split(',', 1)
+        return int(start_time), int(end_time)
+    return int(spec), int(spec) + 1
+
+
+class _Request(object):
+    """
+    Request being handled. Parses the request body (JSON, protobuf or XML). Resources that can be
+    responded with protobuf set the ``encode`` function of the response content.
+    """
+    def __init__(self, method, parts, query, headers, body, base_url):
+        self.method = method
+        self.parts = parts
+        self.query = query
+        self.headers = headers
+        self.body = body or b''
+        self.base_url = base_url
+        self.encode = None
+        self.response_headers = {}
+        self.content_type = headers.get('content-type') or ''
+        self.protobuf = MEDIA_TYPE_PROTOBUF in self.content_type
+        self.protobuf_response = MEDIA_TYPE_PROTOBUF in (headers.get('accept') or '')
+
+    @property
+    def is_xml(self):
+        return 'xml' in self.content_type or self.body[:1] == b'<'
+
+    def json(self):
+        return json.loads(self.body.decode('utf8')) if self.body.strip() else {}
+
+    def parse_schema(self):
+        """
+        :return dict: ``{"name": ..., "ColumnSchema": [...]}``.
+        """
+        if self.protobuf:
+            return protobuf.decode_table_schema(self.body)
+
+        if self.is_xml:
+            element = ElementTree.fromstring(self.body)
+            schema = dict(element.attrib)
+            schema['ColumnSchema'] = [dict(column.attrib) for column in element.findall('ColumnSchema')]
+            return schema
+
+        return self.json()
+
+    def parse_cell_set(self):
+        """
+        :return list: List of (row key, cells) tuples. Cells are (column, timestamp, value) tuples.
+        """
+        if self.protobuf:
+            data = protobuf.decode_cell_set(self.body)
+            decode = protobuf._to_bytes
+        else:
+            data = self.json()
+            decode = b64decode
+
+        rows = []
+        for row in protobuf._listify(data.get('Row')):
+            cells = [
+                (decode(cell['column']), int(cell['timestamp']) if cell.get('timestamp') else None,
+                 decode(cell.get('$', '')))
+                for cell in protobuf._listify(row.get('Cell'))
+            ]
+            rows.append((decode(row['key']), cells))
+        return rows
+
+    def parse_scanner(self):
+        """
+        :return dict: Scanner definition. Start/end rows and columns are given as bytes.
+        """
+        if self.protobuf:
+            data = protobuf.decode_scanner(self.body)
+            data['column'] = [protobuf._to_bytes(column) for column in data.get('column') or []]
+            return data
+
+        if self.is_xml:
+            element = ElementTree.fromstring(self.body)
+            data = dict(element.attrib)
+            filter_element = element.find('filter')
+            if filter_element is not None:
+                data['filter'] = filter_element.text
+            data['column'] = [column.text for column in element.findall('column')]
+        else:
+            data = self.json()
+
+        for key in ('startRow', 'endRow'):
+            if data.get(key):
+                data[key] = b64decode(data[key])
+        data['column'] = [b64decode(column) for column in protobuf._listify(data.get('column'))]
+        return data
+
+    def cell_set(self, rows):
+        """
+        Builds the cell set structure of the response (base64 encoded, unless protobuf is responded
+        with).
+
+        :param list rows: List of (row key, cells) tuples.
+        :return dict:
+        """
+        if self.protobuf_response:
+            return {'Row': [
+                {'key': key, 'Cell': [{'column': column, 'timestamp': timestamp, '$': value}
+                                      for column, timestamp, value in cells]}
+                for key, cells in rows
+            ]}
+
+        return {'Row': [
+            {'key': b64encode(key), 'Cell': [{'column': b64encode(column), 'timestamp': timestamp,
+                                              '$': b64encode(value)}
+                                             for column, timestamp, value in cells]}
+            for key, cells in rows
+        ]}
@@ -0,0 +1,309 @@
+__title__ = 'starbase.emulator.store'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('Store', 'EmulatedTable', 'DEFAULT_COLUMN_SCHEMA', 'now')
+
+import bisect
+import threading
+import time
+
+# Column family attributes Stargate reports, unless given on table creation.
+DEFAULT_COLUMN_SCHEMA = (
+    ('BLOCKSIZE', '65536'),
+    ('BLOOMFILTER', 'NONE'),
+    ('BLOCKCACHE', 'true'),
+    ('COMPRESSION', 'NONE'),
+    ('VERSIONS', '3'),
+    ('REPLICATION_SCOPE', '0'),
+    ('TTL', '2147483647'),
+    ('IN_MEMORY', 'false'),
+)
+
+# Table attributes Stargate reports.
+DEFAULT_TABLE_SCHEMA = (
+    ('IS_META', 'false'),
+    ('IS_ROOT', 'false'),
+)
+
+def now():
+    """
+    Current timestamp (milliseconds), as HBase sets it on the cells written without one.
+
+    :return int:
+    """
+    return int(time.time() * 1000)
+
+
+class EmulatedTable(object):
+    """
+    Table of the emulator. Row keys are kept sorted (for the scanners and the regions); cells are kept
+    per row and column, the most recent version first. Not thread safe (see ``Store.lock``).
+
+    Row keys, columns (``family:qualifier``) and values are bytes.
+
+    :param str name: Table name.
+    :param dict schema: Table schema, as sent by the client on creation (``{"ColumnSchema": [...]}``).
+    """
+    def __init__(self, name, schema=None):
+        self.name = name
+        self.keys = []
+        self.rows = {}
+        self.split_keys = []
+        self.schema = None
+        self.set_schema(schema or {})
+
+    def __repr__(self):
+        return "<starbase.emulator.store.EmulatedTable ({0}, {1} rows)>".format(self.name, len(self.keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set_schema(self, schema, replace=True):
+        """
+        Sets the schema of the table. Cells of the column families removed are dropped.
+
+        :param dict schema: ``{"ColumnSchema": [{"name": ...}, ...]}``.
+        :param bool replace: If set to False, the column families given are added to (or updated in)
+            the existing ones.
+        """
+        families = {} if replace or self.schema is None else self.families.copy()
+
+        for column in schema.get('ColumnSchema') or []:
+            name = column['name'].rstrip(':')
+            attributes = dict(DEFAULT_COLUMN_SCHEMA)
+            attributes.update((key, str(value)) for key, value in column.items() if 'name' != key)
+            attributes['name'] = name
+            families[name] = attributes
+
+        self.schema = dict(DEFAULT_TABLE_SCHEMA)
+        self.schema.update((key, value) for key, value in schema.items() if key not in ('name', 'ColumnSchema'))
+        self.schema['name'] = self.name
+        self.schema['ColumnSchema'] = [families[name] for name in sorted(families)]
+
+        for key in list(self.keys):
+            cells = self.rows[key]
+            for column in [column for column in cells if self.family_of(column) not in families]:
+                del cells[column]
+            if not cells:
+                self._remove_key(key)
+
+    @property
+    def families(self):
+        """
+        Column family attributes keyed by name.
+
+        :return dict:
+        """
+        return dict((column['name'], column) for column in self.schema['ColumnSchema'])
+
+    @staticmethod
+    def family_of(column):
+        """
+        :param bytes column: ``family:qualifier``.
+        :return str:
+        """
+        return column.split(b':', 1)[0].decode('utf8')
+
+    def _remove_key(self, key):
+        del self.rows[key]
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+    def put(self, key, column, value, timestamp=None):
+        """
+        Writes a cell version. Versions above the ``VERSIONS`` of the column family are dropped.
+
+        :param bytes key:
+        :param bytes column: ``family:qualifier`` (or ``family``, for an empty qualifier).
+        :param bytes value:
+        :param int timestamp: Defaults to now.
+        :raise KeyError: If the column family does not exist.
+        """
+        if b':' not in column:
+            column += b':'
+        family = self.families[self.family_of(column)]
+        timestamp = now() if timestamp is None else int(timestamp)
+
+        cells = self.rows.get(key)
+        if cells is None:
+            cells = self.rows[key] = {}
+            bisect.insort(self.keys, key)
+
+        versions = [version for version in cells.get(column, ()) if version[0] != timestamp]
+        versions.append((timestamp, value))
+        versions.sort(key=lambda version: -version[0])
+        cells[column] = versions[:max(int(family['VERSIONS']), 1)]
+
+    def get(self, key, columns=None, start_time=None, end_time=None, max_versions=1):
+        """
+        Reads the cells of a row.
+
+        :param bytes key:
+        :param list columns: Column families (``family``) or columns (``family:qualifier``), as bytes.
+        :param int start_time: If given, only the versions written at or after it are returned.
+        :param int end_time: If given, only the versions written before it are returned.
+        :param int max_versions: Maximum number of versions per column.
+        :return list: List of (column, timestamp, value) tuples, sorted by column, the most recent
+            version first. Empty if there's no such row (or no cell matches).
+        """
+        cells = self.rows.get(key)
+        if not cells:
+            return []
+
+        result = []
+        for column in sorted(cells):
+            if columns and not any(column == spec or (b':' not in spec and column.startswith(spec + b':'))
+                                   for spec in columns):
+                continue
+
+            versions = 0
+            for timestamp, value in cells[column]:
+                if start_time is not None and timestamp < start_time:
+                    continue
+                if end_time is not None and timestamp >= end_time:
+                    continue
+                result.append((column, timestamp, value))
+                versions += 1
+                if versions >= max_versions:
+                    break
+        return result
+
+    def delete(self, key, columns=None, timestamp=None):
+        """
+        Deletes a row, or some of its columns (or column families).
+
+        :param bytes key:
+        :param list columns: Column families or columns, as bytes. All if not given.
+        :param int timestamp: If given, only the versions written at or before it are deleted.
+        :return bool: True if anything was deleted.
+        """
+        cells = self.rows.get(key)
+        if not cells:
+            return False
+
+        deleted = False
+        for column in list(cells):
+            if columns and not any(column == spec or column.startswith(spec.rstrip(b':') + b':')
+                                   for spec in columns):
+                continue
+
+            if timestamp is None:
+                del cells[column]
+                deleted = True
+                continue
+
+            versions = [version for version in cells[column] if version[0] > timestamp]
+            deleted = deleted or len(versions) != len(cells[column])
+            if versions:
+                cells[column] = versions
+            else:
+                del cells[column]
+
+        if not cells:
+            self._remove_key(key)
+        return deleted
+
+    def scan(self, start_row=None, end_row=None, after=None):
+        """
+        Iterates through the row keys in order. Rows written while iterating are seen if they sort after
+        the current key.
+
+        :param bytes start_row: First row key (inclusive).
+        :param bytes end_row: Last row key (exclusive).
+        :param bytes after: If given, iteration resumes after this row key.
+        :return generator: Generator of row keys.
+        """
+        if after is not None:
+            index = bisect.bisect_right(self.keys, after)
+        elif start_row:
+            index = bisect.bisect_left(self.keys, start_row)
+        else:
+            index = 0
+
+        while index < len(self.keys):
+            key = self.keys[index]
+            if end_row and key >= end_row:
+                return
+            yield key
+            # Resume after the key yielded, the rows may have changed in the meantime.
+            index = bisect.bisect_right(self.keys, key)
+
+    def regions(self):
+        """
+        Region boundaries of the table (see ``Store.split``).
+
+        :return list: List of (start key, end key) tuples. Empty bytes stand for the table boundaries.
+        """
+        boundaries = [b''] + list(self.split_keys) + [b'']
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+class Store(object):
+    """
+    In-memory, sorted storage of the emulator tables. Operations on the tables should be done holding
+    the ``lock``.
+    """
+    def __init__(self):
+        self.tables = {}
+        self.lock = threading.RLock()
+
+    def __repr__(self):
+        return "<starbase.emulator.store.Store ({0} tables)>".format(len(self.tables))
+
+    def get(self, name):
+        """
+        :param str name: Table name.
+        :return starbase.emulator.store.EmulatedTable: None if there's no such table.
+        """
+        return self.tables.get(name)
+
+    def create(self, name, schema=None):
+        """
+        Creates a table.
+
+        :param str name:
+        :param dict schema: ``{"ColumnSchema": [{"name": ...}, ...]}``.
+        :return starbase.emulator.store.EmulatedTable:
+        """
+        with self.lock:
+            table = self.tables[name] = EmulatedTable(name, schema)
+            return table
+
+    def create_table(self, name, *columns):
+        """
+        Creates a table with the column families given (shortcut for seeding the emulator).
+
+        :param str name:
+        :param list *columns: Column family names.
+        :return starbase.emulator.store.EmulatedTable:
+        """
+        return self.create(name, {'ColumnSchema': [{'name': column} for column in columns]})
+
+    def drop(self, name):
+        """
+        :param str name:
+        :return bool: True if the table existed.
+        """
+        with self.lock:
+            return self.tables.pop(name, None) is not None
+
+    def split(self, name, split_keys):
+        """
+        Sets the region boundaries of the table (by default, tables have a single region).
+
+        :param str name: Table name.
+        :param list split_keys: Row keys (bytes or str) the regions start at.
+        """
+        with self.lock:
+            self.tables[name].split_keys = sorted(
+                key if isinstance(key, bytes) else key.encode('utf8') for key in split_keys
+                )
+
+    def clear(self):
+        """
+        Drops all the tables.
+        """
+        with self.lock:
+            self.tables.clear()
@@ -0,0 +1,391 @@
+import unittest
+
+from requests.models import HTTPError
+
+from starbase import Connection
+from starbase.client.transport.hooks import RequestHook
+from starbase.emulator import Emulator, EmulatorServer, EmulatorAdapter
+
+ROW_FILTER = '{{"type": "RowFilter", "op": "EQUAL", "comparator": ' \
+             '{{"type": "RegexStringComparator", "value": "^{0}"}}}}'
+
+class EmulatorTest(unittest.TestCase):
+    """
+    Stargate emulator tests (through the client, in-process).
+    """
+    content_type = 'json'
+
+    def setUp(self):
+        self.connection = Connection(content_type=self.content_type)
+        self.emulator = EmulatorAdapter.mount(self.connection).emulator
+        self.table = self.connection.table('table1')
+        self.table.create('column1', 'column2')
+
+    def test_01_cluster(self):
+        """
+        Test version, cluster version, status and table list.
+        """
+        self.assertEqual(self.connection.version['REST'], '0.0.2')
+        self.assertEqual(self.connection.cluster_version, '0.94.7')
+        self.assertEqual(self.connection.cluster_status['regions'], 1)
+        self.assertEqual(self.connection.tables(), ['table1'])
+
+        # Tables missing from the cached table list are looked up once more.
+        self.emulator.create_table('table2', 'column1')
+        self.assertTrue(self.connection.table_exists('table2'))
+        self.emulator.reset_stats()
+        self.assertFalse(self.connection.table_exists('table3'))
+        self.assertEqual(self.emulator.operations['tables'], 1)
+
+    def test_02_rows(self):
+        """
+        Test row fetch, store and delete.
+        """
+        self.assertEqual(self.table.insert('row1', {'column1': {'id': '1', 'name': 'a'}, 'column2': {'age': '3'}}),
+                         200)
+        self.assertEqual(self.table.fetch('row1'), {'column1': {'id': '1', 'name': 'a'}, 'column2': {'age': '3'}})
+        self.assertEqual(self.table.fetch('row1', ['column2']), {'column2': {'age': '3'}})
+        self.assertEqual(self.table.fetch('row1', {'column1': ['name']}), {'column1': {'name': 'a'}})
+
+        self.table.update('row1', {'column1': {'name': 'b'}})
+        self.assertEqual(self.table.fetch('row1', {'column1': ['name']}), {'column1': {'name': 'b'}})
+
+        versions = self.emulator.store.get('table1').get(b'row1', [b'column1:name'], max_versions=2)
+        self.assertEqual([value for column, timestamp, value in versions], [b'b', b'a'])
+
+        self.assertEqual(self.table.fetch_many(['row1', 'row2']),
+                         {'row1': self.table.fetch('row1'), 'row2': None})
+        # Rows are keyed the way they were requested.
+        self.table.insert('row2', {'column1': {'id': '2'}})
+        self.assertEqual(self.table.fetch_many([b'row1', 'row2', b'row3']),
+                         {b'row1': self.table.fetch('row1'), 'row2': {'column1': {'id': '2'}}, b'row3': None})
+        self.assertEqual(set(self.table.fetch_many([b'row1', 'row2'], raw=True)), set([b'row1', 'row2']))
+        self.table.remove('row2')
+
+        self.table.remove('row1', 'column2')
+        self.assertEqual(self.table.fetch('row1'), {'column1': {'id': '1', 'name': 'b'}})
+        self.table.remove('row1')
+        self.assertEqual(self.table.fetch('row1'), None)
+
+        # Missing tables and column families.
+        self.assertEqual(self.table.insert('row1', {'column3': {'id': '1'}}), 503)
+        missing = self.connection.table('table2')
+        missing.disable_if_exists_checks()
+        self.assertEqual(missing.insert('row1', {'column1': {'id': '1'}}), 500)
+        self.assertEqual(missing.fetch('row1'), None)
+
+    def test_03_scanner(self):
+        """
+        Test scanners (batches, key ranges and filters).
+        """
+        batch = self.table.batch()
+        for i in range(50):
+            batch.insert('row{0:02d}'.format(i), {'column1': {'id': str(i)}, 'column2': {'age': '1'}})
+        batch.commit(finalize=True)
+        self.emulator.reset_stats()
+
+        rows = list(self.table.fetch_all_rows(with_row_id=True, batch_size=10))
+        self.assertEqual([list(row.keys())[0] for row in rows], ['row{0:02d}'.format(i) for i in range(50)])
+        # 10 cells per batch (5 rows), then no content.
+        self.assertEqual(self.emulator.operations['scanner_next'], 11)
+        self.assertEqual(self.emulator.operations['scanner_close'], 1)
+
+        rows = list(self.table.fetch_all_rows(with_row_id=True, start_row='row10', end_row='row20'))
+        self.assertEqual(len(rows), 10)
+
+        rows = list(self.table.fetch_all_rows(with_row_id=True, filter_string=ROW_FILTER.format('row1')))
+        self.assertEqual(len(rows), 10)
+
+        bloom_filter = self.table.build_bloom_filter()
+        self.assertEqual(len(bloom_filter), 50)
+
+        self.emulator.split('table1', ['row25'])
+        self.assertEqual(len(self.table.regions()['Region']), 2)
+        self.assertEqual(len(list(self.table.fetch_all_rows_parallel())), 50)
+
+    def test_04_schema(self):
+        """
+        Test schema changes.
+        """
+        self.assertEqual(self.table.columns(), ['column1', 'column2'])
+        self.table.add_columns('column3')
+        self.assertEqual(self.table.columns(), ['column1', 'column2', 'column3'])
+        self.table.drop_columns('column1')
+        self.assertEqual(self.table.columns(), ['column2', 'column3'])
+
+        # Column families added behind the schema cache are kept.
+        self.emulator.store.get('table1').set_schema({'ColumnSchema': [{'name': 'column4'}]}, replace=False)
+        self.assertEqual(self.table.columns(), ['column2', 'column3'])
+        self.table.drop_columns('column2')
+        self.assertEqual(self.table.columns(), ['column3', 'column4'])
+
+        self.assertEqual(self.table.drop(), 200)
+        self.assertEqual(self.table.drop(), 503)
+
+    def test_05_fault_injection(self):
+        """
+        Test error injection.
+        """
+        self.emulator.fail_next(2, status_code=503, operation='insert')
+        self.assertEqual(self.table.insert('row1', {'column1': {'id': '1'}}), 503)
+        self.assertRaises(HTTPError, self.table.insert, 'row1', {'column1': {'id': '1'}}, fail_silently=False)
+        self.assertEqual(self.table.insert('row1', {'column1': {'id': '1'}}), 200)
+        self.assertEqual(self.emulator.injected_errors, 2)
+
+        self.emulator.error_rate = 1
+        self.connection.retries = 2
+        self.connection.retry_delay = 0
+        self.emulator.reset_stats()
+        self.assertEqual(self.table.fetch('row1'), None)
+        self.assertEqual(self.emulator.operations['fetch'], 3)
+
+    def test_06_scanner_errors(self):
+        """
+        Test that failed scanner batches are not taken for the end of the scan.
+        """
+        batch = self.table.batch()
+        for i in range(50):
+            batch.insert('row{0:02d}'.format(i), {'column1': {'id': str(i)}})
+        batch.commit(finalize=True)
+
+        for fail_silently in (False, True):
+            self.emulator.reset_stats()
+            rows = self.table.fetch_all_rows(with_row_id=True, batch_size=10, fail_silently=fail_silently)
+            self.assertEqual(list(next(rows).keys()), ['row00'])
+            # The second batch fails.
+            self.emulator.fail_next(1, status_code=500, operation='scanner_next')
+            if fail_silently:
+                self.assertEqual(len(list(rows)), 9)
+            else:
+                self.assertRaises(HTTPError, list, rows)
+            self.assertEqual(self.emulator.operations['scanner_close'], 1)
+
+    def test_07_bloom_filter(self):
+        """
+        Test that Bloom filters are only registered out of complete scans, along with the rows written
+        meanwhile.
+        """
+        batch = self.table.batch()
+        for i in range(50):
+            batch.insert('row{0:02d}'.format(i), {'column1': {'id': str(i)}})
+        batch.commit(finalize=True)
+
+        self.emulator.fail_next(1, status_code=500, operation='scanner_next')
+        self.assertRaises(HTTPError, self.table.build_bloom_filter, batch_size=10, fail_silently=False)
+        self.emulator.fail_next(1, status_code=500, operation='scanner_next')
+        self.assertEqual(self.table.build_bloom_filter(batch_size=10), None)
+        self.assertEqual(self.connection.bloom_filters, {})
+        self.assertEqual(self.table.fetch('row40'), {'column1': {'id': '40'}})
+
+        table = self.table
+
+        class WritingHook(RequestHook):
+            # Writes a row (to the part of the table already scanned) once the first batch is fetched.
+            def after_request(self, info):
+                if 'scanner_next' == info.operation and not table.connection.remove_hook(self):
+                    table.insert('row05a', {'column1': {'id': '5a'}})
+
+        self.connection.add_hook(WritingHook())
+        bloom_filter = self.table.build_bloom_filter(batch_size=10)
+        self.assertEqual(len(bloom_filter), 51)
+        self.assertTrue(b'row05a' in bloom_filter)
+        self.assertEqual(self.table.fetch('row05a'), {'column1': {'id': '5a'}})
+        self.assertEqual(self.connection.bloom_filter_writes, {})
+
+    def test_08_decode_timings(self):
+        """
+        Test that the time spent on materializing the rows is reported to the hooks as decoding.
+        """
+        batch = self.table.batch()
+        for i in range(20):
+            batch.insert('row{0:02d}'.format(i), {'column1': {'id': str(i)}, 'column2': {'age': '1'}})
+        batch.commit(finalize=True)
+
+        timings = {}
+
+        class TimingHook(RequestHook):
+            def after_request(self, info):
+                timings.setdefault(info.operation, []).append(info.timings['decode'])
+
+        self.connection.add_hook(TimingHook())
+        self.assertEqual(self.table.fetch('row01'), {'column1': {'id': '1'}, 'column2': {'age': '1'}})
+        self.assertEqual(len(self.table.fetch_many(['row01', 'row02'])), 2)
+        self.assertEqual(len(list(self.table.fetch_all_rows(batch_size=10))), 20)
+        self.assertEqual(len(self.table.fetch_all_rows(columnar=True)), 20)
+
+        for operation in ('fetch', 'fetch_many', 'scanner_next'):
+            self.assertTrue(timings[operation][0] > 0, operation)
+
+    def test_09_batch_chunk_failures(self):
+        """
+        Test that the failed chunks of a commit are reported by ``finalize`` (along with their rows), while
+        the stack is cleared.
+        """
+        keys = ['row{0:02d}'.format(i) for i in range(20)]
+
+        for fail_silently in (True, False):
+            batch = self.table.batch(chunks=4, parallelism=1)
+            for key in keys:
+                batch.insert(key, {'column1': {'id': key}})
+            self.emulator.reset_stats()
+
+            # The first of the 4 chunks (5 rows each) fails, the others are committed.
+            self.emulator.fail_next(1, status_code=503, operation='insert')
+            if fail_silently:
+                batch.commit()
+            else:
+                self.assertRaises(HTTPError, batch.commit, fail_silently=False)
+            self.assertEqual(self.emulator.operations['insert'], 4)
+            self.assertEqual(batch.outgoing(), 0)
+            fetched = self.table.fetch_many(keys)
+            self.assertEqual([key for key in keys if fetched[key] is None], keys[:5])
+
+            response = batch.finalize()
+            self.assertEqual(response['response'], [503, 200, 200, 200] if fail_silently else [200, 200, 200])
+            self.assertEqual(len(response['failed']), 1)
+            failed = response['failed'][0]
+            if fail_silently:
+                self.assertEqual(failed['response'], 503)
+            else:
+                self.assertTrue(isinstance(failed['response'], HTTPError))
+            self.assertEqual(len(failed['rows']), 5)
+            self.assertTrue(response['url'] is not None)
+            self.assertEqual(batch.finalize(), {'url': None, 'method': None, 'response': [], 'failed': []})
+
+    def test_10_xml_scanner_config(self):
+        """
+        Test that the key range, batch size and filter are merged into XML scanner definitions.
+        """
+        batch = self.table.batch()
+        for i in range(6):
+            batch.insert('row{0}'.format(i), {'column1': {'id': str(i)}})
+        batch.commit(finalize=True)
+        self.emulator.reset_stats()
+
+        scanner_config = '<Scanner maxVersions="1"></Scanner>'
+        rows = list(self.table.fetch_all_rows(with_row_id=True, scanner_config=scanner_config,
+                                              start_row='row2', end_row='row5', batch_size=1))
+        self.assertEqual([list(row.keys())[0] for row in rows], ['row2', 'row3', 'row4'])
+        # One cell per batch, then no content.
+        self.assertEqual(self.emulator.operations['scanner_next'], 4)
+
+        rows = list(self.table.fetch_all_rows(with_row_id=True, scanner_config=scanner_config,
+                                              filter_string=ROW_FILTER.format('row1')))
+        self.assertEqual([list(row.keys())[0] for row in rows], ['row1'])
+
+        # Without other arguments, the definition is sent as is.
+        self.assertEqual(len(list(self.table.fetch_all_rows(scanner_config=scanner_config))), 6)
+
+    def test_11_xml_scanner_config_parallel(self):
+        """
+        Test that each region is scanned within its bounds with an XML scanner definition.
+        """
+        batch = self.table.batch()
+        for i in range(6):
+            batch.insert('row{0}'.format(i), {'column1': {'id': str(i)}})
+        batch.commit(finalize=True)
+        self.emulator.split('table1', ['row2', 'row4'])
+        self.assertEqual(len(self.table.regions()['Region']), 3)
+
+        scanner_config = '<Scanner maxVersions="1"></Scanner>'
+        rows = self.table.fetch_all_rows_parallel(with_row_id=True, scanner_config=scanner_config, ordered=True)
+        self.assertEqual([list(row.keys())[0] for row in rows], ['row{0}'.format(i) for i in range(6)])
+
+        rows = self.table.fetch_all_rows_parallel(with_row_id=True, scanner_config=scanner_config,
+                                                  start_row='row1', end_row='row5')
+        self.assertEqual(sorted(list(row.keys())[0] for row in rows), ['row1', 'row2', 'row3', 'row4'])
+
+
+    def test_12_background_batch_pending_bytes(self):
+        """
+        Test that background batch producers block on the estimated size of the rows not sent yet.
+        """
+        keys = ['row{0:02d}'.format(i) for i in range(20)]
+        # Room for a few rows, while neither the size nor the flush interval would send them.
+        batch = self.table.batch(background=True, size=1000, flush_interval=60, max_pending_bytes=300)
+        pending = []
+
+        class PendingHook(RequestHook):
+            def after_request(self, info):
+                pending.append(batch._pending_bytes)
+
+        self.connection.add_hook(PendingHook())
+        self.emulator.reset_stats()
+        for key in keys:
+            batch.insert(key, {'column1': {'id': key}})
+        batch.commit(finalize=True)
+
+        self.assertTrue(self.emulator.operations['insert'] > 1)
+        self.assertTrue(max(pending) <= 300)
+        self.assertEqual(batch._pending_bytes, 0)
+        self.assertTrue(None not in self.table.fetch_many(keys).values())
+
+
+class EmulatorProtobufTest(EmulatorTest):
+    """
+    Stargate emulator tests, protobuf content type.
+    """
+    content_type = 'protobuf'
+
+
+class EmulatorServerTest(unittest.TestCase):
+    """
+    Stargate emulator served over HTTP.
+    """
+    def test_01_server(self):
+        emulator = Emulator()
+        emulator.create_table('table1', 'column1')
+
+        with EmulatorServer(emulator) as server:
+            connection = Connection(url=server.url, compression=True, compression_threshold=0)
+            table = connection.table('table1')
+            self.assertEqual(table.insert('row1', {'column1': {'id': '1'}}), 200)
+            self.assertEqual(table.fetch('row1'), {'column1': {'id': '1'}})
+            self.assertEqual(emulator.requests, 3)
+            connection.close()
+
+    def test_02_connection_pool(self):
+        """
+        Test connection reuse, pre-warming, idle connection eviction and pool closing.
+        """
+        emulator = Emulator(latency=0.1)
+        emulator.create_table('table1', 'column1')
+
+        with EmulatorServer(emulator) as server:
+            connection = Connection(url=server.url, pool_maxsize=4, pool_idle_timeout=60)
+            host = server.url.rstrip('/')
+
+            # Pre-warmed connections are opened concurrently and kept alive.
+            connection.prewarm(3)
+            stats = connection.pool_stats()
+            self.assertEqual(stats['requests'], 3)
+            self.assertEqual(stats['hosts'][host], {'connections': 3, 'requests': 3, 'idle': 3})
+
+            # Sequential requests re-use them.
+            emulator.latency = 0
+            table = connection.table('table1')
+            table.disable_if_exists_checks()
+            for i in range(10):
+                table.insert('row{0}'.format(i), {'column1': {'id': str(i)}})
+            stats = connection.pool_stats()
+            self.assertEqual(stats['requests'], 13)
+            self.assertEqual(stats['hosts'][host]['connections'], 3)
+            self.assertEqual(stats['evictions'], 0)
+
+            # Only the connections idle for too long are closed, the one in use is kept.
+            pool, = connection.pool._host_pools()
+            idle = [conn for conn in pool.pool.queue if conn is not None]
+            for conn in idle[:-1]:
+                conn.released_at -= 120
+            self.assertEqual(table.fetch('row1'), {'column1': {'id': '1'}})
+            stats = connection.pool_stats()
+            self.assertEqual(stats['evictions'], 2)
+            self.assertEqual(stats['hosts'][host]['idle'], 1)
+            self.assertEqual(emulator.requests, 14)
+
+            connection.close()
+            self.assertEqual(connection.pool_stats()['hosts'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
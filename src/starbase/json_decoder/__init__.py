@@ -1,17 +1,21 @@
 """
 Recursively decodes values of entire dictionary (JSON) using `base64.decodestring`. Optionally ignores keys
 given in `keys_to_skip`. It's also possible to give a custom `decoder` instead of `base64.decodestring`.
+
+For the Stargate cell sets (`Row`/`Cell`/`key`/`column`/`$`/`timestamp`) use the specialised (and much
+faster) `decode_cell_set` and `decode_row`.
 """
 
 __title__ = 'starbase.json_decoder'
 __author__ = 'Artur Barseghyan'
 __copyright__ = 'Copyright (c) 2013-2014 Artur Barseghyan'
 __license__ = 'GPL 2.0/LGPL 2.1'
-__all__ = ('json_decode',)
+__all__ = ('json_decode', 'decode_cell_set', 'decode_row', 'decode_value')
 
 from six import PY3
 from six import string_types, integer_types
 import base64
+import binascii
 
 DEBUG = False
 
@@ -20,7 +24,9 @@ if PY3:
 else:
     decodestring = base64.decodestring
 
-def json_decode(json_data, keys_to_bypass_decoding=['timestamp'], keys_to_skip=[], decoder=decodestring):
+NUMBER_TYPES = tuple(list(integer_types) + [float])
+
+def json_decode(json_data, keys_to_bypass_decoding=('timestamp',), keys_to_skip=(), decoder=decodestring):
     """
     Recursively decodes values of entire dictionary (JSON) using `base64.decodestring`. Optionally ignores (does not
     include in the final dictionary) keys given in `keys_to_skip`.
@@ -119,19 +125,14 @@ def json_decode(json_data, keys_to_bypass_decoding=['timestamp'], keys_to_skip=[
     # if list, tuple or set is given, iterate through the list and recursively call `json_decode` on each child item.
     for key, value in json_data.items():
         if key not in keys_to_skip:
-            # Making sure nothing breaks if we get integers, longs or floats.
-            number_types = list(integer_types)
-            number_types.append(float)
-            number_types = tuple(number_types)
-            if isinstance(value, number_types):
-                value = str(value)
-                # When decoding (really decoding and not encoding) we sometimes deal with integers or floats in the
-                # JSON given. In order to have those values encoded too, we encode them to strings, but then also
-                # add to the list of keys to bypass decoding, because integers and floats can't be decoded.
-                keys_to_bypass_decoding.append(key)
+            # Making sure nothing breaks if we get integers, longs or floats. When decoding (really decoding and
+            # not encoding) we sometimes deal with integers or floats in the JSON given. Those can't be decoded,
+            # thus are just converted to strings.
+            if isinstance(value, NUMBER_TYPES):
+                decoded_json_data.update({key: str(value)})
 
             # If value is a string, we just encode it.
-            if isinstance(value, string_types):
+            elif isinstance(value, string_types):
                 if key not in keys_to_bypass_decoding:
                     if PY3:
                         decoded_json_data.update({key: decoder(value.encode()).decode()})
@@ -162,3 +163,75 @@ def json_decode(json_data, keys_to_bypass_decoding=['timestamp'], keys_to_skip=[
                 raise ValueError("Not allowed type for JSON dictionary: {0}".format(type(value)))
 
     return decoded_json_data
+
+def decode_value(value, decoder=binascii.a2b_base64):
+    """
+    Decodes a single base64 encoded value. Values which aren't valid UTF-8 (binary data) are returned as
+    bytes.
+
+    :param str value:
+    :param callable decoder:
+    :return str:
+    """
+    if PY3:
+        data = decoder(value)
+        try:
+            return data.decode()
+        except UnicodeDecodeError:
+            return data
+    return decoder(value)
+
+def decode_row(row_data, decoder=binascii.a2b_base64):
+    """
+    Decodes a single Stargate row (as found in the `Row` list of a cell set) in one pass. Gives the same
+    result as `json_decode`, but knows the row structure upfront. Input is not modified. Values which aren't
+    valid UTF-8 (binary data) are returned as bytes.
+
+    :param dict row_data: Example value {'key': 'cm93MQ==', 'Cell': [{'column': 'YTp4', '$': 'MQ==',
+        'timestamp': 1369030584274}]}
+    :param callable decoder: Decoder of (base64 encoded) strings.
+    :return dict: Example value {'key': 'row1', 'Cell': [{'column': 'a:x', '$': '1',
+        'timestamp': '1369030584274'}]}
+    """
+    cells = row_data.get('Cell') or []
+    if isinstance(cells, dict):
+        cells = [cells]
+
+    decoded_cells = []
+    append = decoded_cells.append
+    if PY3:
+        for cell in cells:
+            value = decoder(cell.get('$', ''))
+            try:
+                value = value.decode()
+            except UnicodeDecodeError:
+                pass
+            decoded_cell = {'column': decoder(cell['column']).decode(), '$': value}
+            timestamp = cell.get('timestamp')
+            if timestamp is not None:
+                decoded_cell['timestamp'] = str(timestamp)
+            append(decoded_cell)
+    else:
+        for cell in cells:
+            decoded_cell = {'column': decoder(cell['column']), '$': decoder(cell.get('$', ''))}
+            timestamp = cell.get('timestamp')
+            if timestamp is not None:
+                decoded_cell['timestamp'] = str(timestamp)
+            append(decoded_cell)
+
+    return {'key': decode_value(row_data['key'], decoder), 'Cell': decoded_cells}
+
+def decode_cell_set(json_data, decoder=binascii.a2b_base64):
+    """
+    Decodes the Stargate cell set (as returned on row fetches and by scanners) in one pass. Gives the same
+    result as `json_decode`, but is much faster. Input is not modified.
+
+    :param dict json_data: Example value {'Row': [{'key': 'cm93MQ==', 'Cell': [...]}]}
+    :param callable decoder: Decoder of (base64 encoded) strings.
+    :return dict:
+    """
+    rows = json_data.get('Row') or []
+    if isinstance(rows, dict):
+        rows = [rows]
+
+    return {'Row': [decode_row(row_data, decoder=decoder) for row_data in rows]}
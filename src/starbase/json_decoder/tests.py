@@ -3,7 +3,7 @@ import base64
 
 from six import print_
 
-from starbase.json_decoder import json_decode
+from starbase.json_decoder import json_decode, decode_cell_set
 
 class Registry(object):
     pass
@@ -157,6 +157,37 @@ class JSONDecoderTest(unittest.TestCase):
         """
         return self.__test_02_decode_data(test_encoded_data=self.test_encoded_data_2)
 
+    @print_info
+    def __test_03_decode_cell_set(self, test_encoded_data):
+        """
+        Test that the specialised cell set decoder gives the same result as the generic one.
+        """
+        res = decode_cell_set(test_encoded_data)
+        self.assertEqual(res, json_decode(test_encoded_data))
+        return res
+
+    def test_03_1_decode_cell_set(self):
+        """
+        Test decode cell set.
+        """
+        return self.__test_03_decode_cell_set(test_encoded_data=self.test_encoded_data_1)
+
+    def test_03_2_decode_cell_set(self):
+        """
+        Test decode cell set.
+        """
+        return self.__test_03_decode_cell_set(test_encoded_data=self.test_encoded_data_2)
+
+    def test_04_no_shared_state_mutation(self):
+        """
+        Test that decoding does not modify the keys to bypass decoding given.
+        """
+        keys_to_bypass_decoding = ['timestamp']
+        json_decode(self.test_encoded_data_1, keys_to_bypass_decoding=keys_to_bypass_decoding)
+        json_decode({'Row': [{'key': 'cm93MQ==', 'Cell': [{'column': 'YTp4', '$': 1}]}]},
+                    keys_to_bypass_decoding=keys_to_bypass_decoding)
+        self.assertEqual(keys_to_bypass_decoding, ['timestamp'])
+
 
 if __name__ == '__main__':
     unittest.main()
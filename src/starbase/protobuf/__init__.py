@@ -0,0 +1,460 @@
+"""
+Encodes/decodes the Stargate protobuf messages (``CellSet``, ``Row``, ``Cell``, ``Scanner``,
+``TableSchema``, ``ColumnSchema``, ``TableList``, ``TableInfo`` and ``Version``) to and from the same
+dictionaries the JSON content type works with. Implements just enough of the protobuf wire format for
+that, so that no protobuf library is required.
+
+Unlike with JSON, row keys, column names and values are not base64 encoded, neither when sent nor when
+received.
+"""
+
+__title__ = 'starbase.protobuf'
+__author__ = 'Artur Barseghyan'
+__copyright__ = 'Copyright (c) 2013-2016 Artur Barseghyan'
+__license__ = 'GPL 2.0/LGPL 2.1'
+__all__ = ('encode', 'decode', 'encode_cell_set', 'decode_cell_set', 'encode_scanner', 'decode_scanner',
+           'encode_table_schema', 'decode_table_schema', 'encode_table_list', 'decode_table_list',
+           'encode_table_info', 'decode_table_info', 'encode_version', 'decode_version')
+
+import base64
+import struct
+
+from six import PY3, binary_type, text_type, integer_types
+
+from starbase.exceptions import ParseError
+
+WIRE_TYPE_VARINT = 0
+WIRE_TYPE_FIXED64 = 1
+WIRE_TYPE_LENGTH_DELIMITED = 2
+WIRE_TYPE_FIXED32 = 5
+
+# ******************** Wire format ********************
+
+def _encode_varint(value):
+    """
+    Encodes an integer as varint. Negative integers are encoded as 64-bit two's complement.
+
+    :param int value:
+    :return bytes:
+    """
+    value &= 0xFFFFFFFFFFFFFFFF
+    result = bytearray()
+    while value > 0x7F:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+def _decode_varint(buffer, position):
+    """
+    Decodes the varint starting at the position given.
+
+    :param bytes buffer:
+    :param int position:
+    :return tuple: Decoded value and the position right after it.
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        if not PY3:
+            byte = ord(byte)
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+def _to_signed(value):
+    """
+    Interprets the decoded varint as signed 64-bit integer.
+    """
+    return value - (1 << 64) if value & (1 << 63) else value
+
+def _to_bytes(value):
+    """
+    Converts the value given into bytes (strings are UTF-8 encoded).
+    """
+    if isinstance(value, binary_type):
+        return value
+    if not isinstance(value, text_type):
+        value = text_type(value)
+    return value.encode('utf8')
+
+def _to_text(value):
+    """
+    Converts the bytes given into text, if it's valid UTF-8. Otherwise, bytes are returned as is.
+    """
+    try:
+        return value.decode('utf8')
+    except UnicodeDecodeError:
+        return value
+
+def _field_varint(number, value):
+    return _encode_varint(number << 3 | WIRE_TYPE_VARINT) + _encode_varint(int(value))
+
+def _field_bytes(number, value):
+    value = _to_bytes(value)
+    return _encode_varint(number << 3 | WIRE_TYPE_LENGTH_DELIMITED) + _encode_varint(len(value)) + value
+
+def _iter_fields(buffer):
+    """
+    Iterates through the fields of the message given.
+
+    :param bytes buffer:
+    :return generator: Generator of (field number, value) tuples. Values of length-delimited fields are
+        given as bytes, values of varint fields as (unsigned) integers.
+    """
+    position = 0
+    length = len(buffer)
+    while position < length:
+        key, position = _decode_varint(buffer, position)
+        number, wire_type = key >> 3, key & 0x07
+        if WIRE_TYPE_VARINT == wire_type:
+            value, position = _decode_varint(buffer, position)
+        elif WIRE_TYPE_LENGTH_DELIMITED == wire_type:
+            size, position = _decode_varint(buffer, position)
+            value = buffer[position:position + size]
+            position += size
+        elif WIRE_TYPE_FIXED64 == wire_type:
+            value = struct.unpack('<Q', buffer[position:position + 8])[0]
+            position += 8
+        elif WIRE_TYPE_FIXED32 == wire_type:
+            value = struct.unpack('<I', buffer[position:position + 4])[0]
+            position += 4
+        else:
+            raise ParseError("Unsupported protobuf wire type {0}.".format(wire_type))
+        yield number, value
+
+def _listify(value):
+    """
+    JSON content may hold a single dict instead of list of dicts.
+    """
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return [value]
+    return value
+
+# ******************** CellSet, Row, Cell ********************
+
+def encode_cell_set(data):
+    """
+    Encodes the ``{"Row": [{"key": ..., "Cell": [{"column": ..., "$": ..., "timestamp": ...}]}]}``
+    structure (as built by ``starbase.client.helpers.build_json_data`` with ``encode_content`` set to
+    False) into ``CellSet`` message.
+
+    :param dict data:
+    :return bytes:
+    """
+    rows = []
+    for row in _listify(data.get('Row')):
+        cells = []
+        for cell in _listify(row.get('Cell')):
+            message = _field_bytes(2, cell['column']) + _field_bytes(4, cell.get('$', b''))
+            if cell.get('timestamp'):
+                message += _field_varint(3, cell['timestamp'])
+            cells.append(_field_bytes(2, message))
+        rows.append(_field_bytes(1, _field_bytes(1, row['key']) + b''.join(cells)))
+    return b''.join(rows)
+
+def _decode_cell(buffer):
+    cell = {}
+    for number, value in _iter_fields(buffer):
+        if 2 == number:
+            cell['column'] = _to_text(value)
+        elif 3 == number:
+            cell['timestamp'] = str(_to_signed(value))
+        elif 4 == number:
+            cell['$'] = _to_text(value)
+    cell.setdefault('$', '')
+    return cell
+
+def _decode_row(buffer):
+    row = {'Cell': []}
+    for number, value in _iter_fields(buffer):
+        if 1 == number:
+            row['key'] = _to_text(value)
+        elif 2 == number:
+            row['Cell'].append(_decode_cell(value))
+    return row
+
+def decode_cell_set(buffer):
+    """
+    Decodes the ``CellSet`` message into the same structure ``starbase.json_decoder.json_decode``
+    produces for the JSON content type.
+
+    :param bytes buffer:
+    :return dict:
+    """
+    return {'Row': [_decode_row(value) for number, value in _iter_fields(buffer) if 1 == number]}
+
+# ******************** Scanner ********************
+
+SCANNER_BYTES_FIELDS = (('startRow', 1), ('endRow', 2))
+SCANNER_VARINT_FIELDS = (('batch', 4), ('startTime', 5), ('endTime', 6), ('maxVersions', 7),
+                         ('caching', 9), ('cacheBlocks', 11), ('limit', 12))
+
+def encode_scanner(data):
+    """
+    Encodes the scanner configuration (as built by ``starbase.client.table.Table._build_scanner_data``
+    with ``encode_rows`` set to False) into ``Scanner`` message.
+
+    :param dict data:
+    :return bytes:
+    """
+    message = b''
+    for key, number in SCANNER_BYTES_FIELDS:
+        if data.get(key):
+            message += _field_bytes(number, data[key])
+    for column in _listify(data.get('column')):
+        message += _field_bytes(3, column)
+    for key, number in SCANNER_VARINT_FIELDS:
+        if data.get(key) is not None:
+            message += _field_varint(number, data[key])
+    if data.get('filter'):
+        message += _field_bytes(8, data['filter'])
+    for label in _listify(data.get('labels')):
+        message += _field_bytes(10, label)
+    return message
+
+def decode_scanner(buffer):
+    """
+    Decodes the ``Scanner`` message (the opposite of ``encode_scanner``). Start and end rows are given
+    as bytes.
+
+    :param bytes buffer:
+    :return dict:
+    """
+    bytes_fields = dict((number, key) for key, number in SCANNER_BYTES_FIELDS)
+    varint_fields = dict((number, key) for key, number in SCANNER_VARINT_FIELDS)
+    data = {}
+    for number, value in _iter_fields(buffer):
+        if number in bytes_fields:
+            data[bytes_fields[number]] = value
+        elif number in varint_fields:
+            data[varint_fields[number]] = value
+        elif 3 == number:
+            data.setdefault('column', []).append(_to_text(value))
+        elif 8 == number:
+            data['filter'] = value.decode('utf8')
+        elif 10 == number:
+            data.setdefault('labels', []).append(value.decode('utf8'))
+    return data
+
+# ******************** TableSchema, ColumnSchema ********************
+
+COLUMN_SCHEMA_VARINT_FIELDS = (('TTL', 3), ('VERSIONS', 4))
+TABLE_SCHEMA_BOOL_FIELDS = (('IN_MEMORY', 4), ('READ_ONLY', 5))
+
+def _encode_attribute(name, value):
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    return _field_bytes(1, name) + _field_bytes(2, value)
+
+def _decode_attribute(buffer):
+    name = value = ''
+    for number, field_value in _iter_fields(buffer):
+        if 1 == number:
+            name = field_value.decode('utf8')
+        elif 2 == number:
+            value = field_value.decode('utf8')
+    return name, value
+
+def encode_table_schema(data):
+    """
+    Encodes the ``{"name": ..., "ColumnSchema": [{"name": ...}]}`` structure into ``TableSchema``
+    message. Unknown keys are sent as attributes.
+
+    :param dict data:
+    :return bytes:
+    """
+    message = _field_bytes(1, data['name'])
+    for key, value in data.items():
+        if key not in ('name', 'ColumnSchema') and key not in dict(TABLE_SCHEMA_BOOL_FIELDS):
+            message += _field_bytes(2, _encode_attribute(key, value))
+    for column in _listify(data.get('ColumnSchema')):
+        column_message = _field_bytes(1, column['name'])
+        for key, value in column.items():
+            if key not in ('name', 'COMPRESSION') and key not in dict(COLUMN_SCHEMA_VARINT_FIELDS):
+                column_message += _field_bytes(2, _encode_attribute(key, value))
+        for key, number in COLUMN_SCHEMA_VARINT_FIELDS:
+            if column.get(key) is not None:
+                column_message += _field_varint(number, column[key])
+        if column.get('COMPRESSION'):
+            column_message += _field_bytes(5, column['COMPRESSION'])
+        message += _field_bytes(3, column_message)
+    for key, number in TABLE_SCHEMA_BOOL_FIELDS:
+        if data.get(key) is not None:
+            message += _field_varint(number, data[key] in (True, 'true', 'TRUE'))
+    return message
+
+def _decode_column_schema(buffer):
+    column = {}
+    for number, value in _iter_fields(buffer):
+        if 1 == number:
+            column['name'] = value.decode('utf8')
+        elif 2 == number:
+            name, attribute_value = _decode_attribute(value)
+            column[name] = attribute_value
+        elif 3 == number:
+            column['TTL'] = str(value)
+        elif 4 == number:
+            column['VERSIONS'] = str(value)
+        elif 5 == number:
+            column['COMPRESSION'] = value.decode('utf8')
+    return column
+
+def decode_table_schema(buffer):
+    """
+    Decodes the ``TableSchema`` message into the structure Stargate returns for the JSON content type.
+
+    :param bytes buffer:
+    :return dict:
+    """
+    schema = {'ColumnSchema': []}
+    for number, value in _iter_fields(buffer):
+        if 1 == number:
+            schema['name'] = value.decode('utf8')
+        elif 2 == number:
+            name, attribute_value = _decode_attribute(value)
+            schema[name] = attribute_value
+        elif 3 == number:
+            schema['ColumnSchema'].append(_decode_column_schema(value))
+        elif 4 == number:
+            schema['IN_MEMORY'] = 'true' if value else 'false'
+        elif 5 == number:
+            schema['READ_ONLY'] = 'true' if value else 'false'
+    return schema
+
+# ******************** TableList, TableInfo, Version ********************
+
+def encode_table_list(data):
+    """
+    Encodes the ``{"table": [{"name": ...}]}`` structure into ``TableList`` message.
+
+    :param dict data:
+    :return bytes:
+    """
+    return b''.join(_field_bytes(1, table['name']) for table in _listify(data.get('table')))
+
+def decode_table_list(buffer):
+    """
+    Decodes the ``TableList`` message.
+
+    :param bytes buffer:
+    :return dict: ``{"table": [{"name": ...}]}``
+    """
+    return {'table': [{'name': value.decode('utf8')} for number, value in _iter_fields(buffer)
+                      if 1 == number]}
+
+def _decode_region(buffer):
+    region = {'startKey': '', 'endKey': ''}
+    for number, value in _iter_fields(buffer):
+        if 1 == number:
+            region['name'] = value.decode('utf8')
+        elif 2 == number:
+            region['startKey'] = base64.b64encode(value).decode('utf8')
+        elif 3 == number:
+            region['endKey'] = base64.b64encode(value).decode('utf8')
+        elif 4 == number:
+            region['id'] = _to_signed(value)
+        elif 5 == number:
+            region['location'] = value.decode('utf8')
+    return region
+
+def encode_table_info(data):
+    """
+    Encodes the ``{"name": ..., "Region": [...]}`` structure (region start/end keys base64 encoded, as
+    with JSON) into ``TableInfo`` message.
+
+    :param dict data:
+    :return bytes:
+    """
+    message = _field_bytes(1, data['name'])
+    for region in _listify(data.get('Region')):
+        region_message = _field_bytes(1, region['name']) \
+            + _field_bytes(2, base64.b64decode(region.get('startKey') or '')) \
+            + _field_bytes(3, base64.b64decode(region.get('endKey') or ''))
+        if region.get('id') is not None:
+            region_message += _field_varint(4, region['id'])
+        if region.get('location'):
+            region_message += _field_bytes(5, region['location'])
+        message += _field_bytes(2, region_message)
+    return message
+
+def decode_table_info(buffer):
+    """
+    Decodes the ``TableInfo`` message. As with JSON, region start/end keys are base64 encoded.
+
+    :param bytes buffer:
+    :return dict: ``{"name": ..., "Region": [...]}``
+    """
+    info = {'Region': []}
+    for number, value in _iter_fields(buffer):
+        if 1 == number:
+            info['name'] = value.decode('utf8')
+        elif 2 == number:
+            info['Region'].append(_decode_region(value))
+    return info
+
+VERSION_FIELDS = {1: 'REST', 2: 'JVM', 3: 'OS', 4: 'Server', 5: 'Jersey'}
+
+def encode_version(data):
+    """
+    Encodes the version structure into ``Version`` message.
+
+    :param dict data:
+    :return bytes:
+    """
+    return b''.join(_field_bytes(number, data[key]) for number, key in sorted(VERSION_FIELDS.items())
+                    if data.get(key))
+
+def decode_version(buffer):
+    """
+    Decodes the ``Version`` message.
+
+    :param bytes buffer:
+    :return dict:
+    """
+    return dict((VERSION_FIELDS[number], value.decode('utf8'))
+                for number, value in _iter_fields(buffer) if number in VERSION_FIELDS)
+
+# ******************** Dispatching ********************
+
+def encode(data):
+    """
+    Encodes the request data given into the matching protobuf message (``CellSet`` for row data,
+    ``TableSchema`` for schema data and ``Scanner`` otherwise).
+
+    :param dict data:
+    :return bytes:
+    """
+    if not data:
+        return b''
+    if 'Row' in data:
+        return encode_cell_set(data)
+    if 'ColumnSchema' in data:
+        return encode_table_schema(data)
+    return encode_scanner(data)
+
+def decode(url, buffer):
+    """
+    Decodes the response content into the matching message, based on the URL requested.
+
+    :param str url: URL, relative to the Stargate base URL.
+    :param bytes buffer:
+    :return dict:
+    """
+    path = url.split('?')[0].strip('/')
+    parts = path.split('/')
+
+    if not path:
+        return decode_table_list(buffer)
+    if 'version' == parts[0]:
+        return decode_version(buffer)
+    if 2 == len(parts) and 'schema' == parts[1]:
+        return decode_table_schema(buffer)
+    if 2 == len(parts) and 'regions' == parts[1]:
+        return decode_table_info(buffer)
+    return decode_cell_set(buffer)
@@ -0,0 +1,123 @@
+import unittest
+import base64
+
+from starbase import protobuf
+
+class ProtobufTest(unittest.TestCase):
+    """
+    Protobuf encoder/decoder tests.
+    """
+    def setUp(self):
+        self.test_cell_set = {
+            'Row': [
+                {
+                    'key': 'row1',
+                    'Cell': [
+                        {'column': 'sensor:id', '$': '345', 'timestamp': 1369030584274},
+                        {'column': 'sensor:unit_of_measure', '$': 'dB', 'timestamp': 1369030584274},
+                        {'column': 'machine:id', '$': '', 'timestamp': 1369030584274},
+                    ]
+                },
+                {
+                    'key': 'row2',
+                    'Cell': [
+                        {'column': 'machine:id', '$': '123', 'timestamp': 1369030584275},
+                    ]
+                },
+            ]
+        }
+
+    def test_01_varint(self):
+        """
+        Test varint encoding/decoding, including negative (64-bit) integers.
+        """
+        for value in (0, 1, 127, 128, 300, 2 ** 32, 2 ** 63 - 1):
+            self.assertEqual(protobuf._decode_varint(protobuf._encode_varint(value), 0)[0], value)
+
+        encoded = protobuf._encode_varint(-1)
+        self.assertEqual(len(encoded), 10)
+        self.assertEqual(protobuf._to_signed(protobuf._decode_varint(encoded, 0)[0]), -1)
+
+    def test_02_cell_set(self):
+        """
+        Test cell set encoding/decoding.
+        """
+        res = protobuf.decode('table1/row1', protobuf.encode(self.test_cell_set))
+
+        self.assertEqual(len(res['Row']), 2)
+        self.assertEqual(res['Row'][0]['key'], 'row1')
+        self.assertEqual(res['Row'][0]['Cell'][0], {'column': 'sensor:id', '$': '345', 'timestamp': '1369030584274'})
+        self.assertEqual(res['Row'][0]['Cell'][2]['$'], '')
+        self.assertEqual(res['Row'][1]['Cell'][0]['$'], '123')
+
+    def test_03_cell_set_binary(self):
+        """
+        Test that values are sent as raw bytes (no base64) and non UTF-8 values are kept as bytes.
+        """
+        encoded = protobuf.encode_cell_set({'Row': [{'key': b'\xff\x00', 'Cell': [{'column': 'a:b', '$': 5}]}]})
+        self.assertIn(b'\xff\x00', encoded)
+
+        res = protobuf.decode_cell_set(encoded)
+        self.assertEqual(res['Row'][0]['key'], b'\xff\x00')
+        self.assertEqual(res['Row'][0]['Cell'][0]['$'], '5')
+
+    def test_04_scanner(self):
+        """
+        Test scanner encoding.
+        """
+        encoded = protobuf.encode({'startRow': b'row1', 'endRow': b'row9', 'batch': 10, 'filter': '{}'})
+        fields = list(protobuf._iter_fields(encoded))
+        self.assertEqual(fields, [(1, b'row1'), (2, b'row9'), (4, 10), (8, b'{}')])
+
+    def test_05_table_schema(self):
+        """
+        Test table schema encoding/decoding.
+        """
+        schema = {
+            'name': 'table1',
+            'IS_META': 'false',
+            'ColumnSchema': [{'name': 'column1', 'VERSIONS': '3', 'BLOOMFILTER': 'NONE'}, {'name': 'column2'}]
+        }
+        res = protobuf.decode('table1/schema', protobuf.encode(schema))
+        self.assertEqual(res, schema)
+
+    def test_06_table_list_and_info(self):
+        """
+        Test table list and table info decoding.
+        """
+        table_list = protobuf._field_bytes(1, 'table1') + protobuf._field_bytes(1, 'table2')
+        self.assertEqual(protobuf.decode('', table_list), {'table': [{'name': 'table1'}, {'name': 'table2'}]})
+
+        region = protobuf._field_bytes(1, 'region1') + protobuf._field_bytes(3, b'm') + protobuf._field_varint(4, 7)
+        table_info = protobuf._field_bytes(1, 'table1') + protobuf._field_bytes(2, region)
+        res = protobuf.decode('table1/regions', table_info)
+        self.assertEqual(res['name'], 'table1')
+        self.assertEqual(res['Region'], [{'name': 'region1', 'startKey': '', 'id': 7,
+                                          'endKey': base64.b64encode(b'm').decode('utf8')}])
+
+    def test_07_server_messages(self):
+        """
+        Test encoding of the messages Stargate sends (and decoding of the ones it receives), as done by
+        the emulator.
+        """
+        scanner = {'startRow': b'row1', 'endRow': b'row9', 'batch': 10, 'column': ['column1'],
+                   'filter': '{"type": "FirstKeyOnlyFilter"}'}
+        self.assertEqual(protobuf.decode_scanner(protobuf.encode_scanner(scanner)), scanner)
+
+        table_list = {'table': [{'name': 'table1'}, {'name': 'table2'}]}
+        self.assertEqual(protobuf.decode('', protobuf.encode_table_list(table_list)), table_list)
+
+        table_info = {'name': 'table1', 'Region': [
+            {'name': 'region1', 'startKey': '', 'endKey': base64.b64encode(b'm').decode('utf8'), 'id': 1,
+             'location': 'localhost:60020'},
+            {'name': 'region2', 'startKey': base64.b64encode(b'm').decode('utf8'), 'endKey': '', 'id': 2,
+             'location': 'localhost:60020'},
+        ]}
+        self.assertEqual(protobuf.decode('table1/regions', protobuf.encode_table_info(table_info)), table_info)
+
+        version = {'REST': '0.0.2', 'Server': 'jetty/6.1.26'}
+        self.assertEqual(protobuf.decode('version', protobuf.encode_version(version)), version)
+
+
+if __name__ == '__main__':
+    unittest.main()